@@ -0,0 +1,97 @@
+#########################################
+# Benchmark of the TCR/TSR XML generation of updateTCR.py (no network).
+# Builds N synthetic TCERs (categories, linked resources, logs) and reports records/second
+# for generateTCRContent and generateTSRContent.
+#
+#   python benchmarkTCR.py
+#   python benchmarkTCR.py --records 100000 --suites 200 --runs 3
+#########################################
+import contextlib
+import optparse
+import os
+import statistics
+import time
+
+import updateTCR
+#########################################
+
+
+STATES = ["Passed", "Failed", "Blocked", "Incomplete", "Passed", "Passed"]
+
+
+class FixedAttachments:
+    """Stands in for AttachmentManager: a Location per log without uploading anything."""
+
+    def locations(self, url, paths):
+        return [url + "/" + os.path.basename(p) for p in paths]
+
+
+def syntheticTcers(records, suites):
+    tcers = []
+    for i in range(records):
+        suite = i % suites
+        tcers.append({
+            "ID": str(100000 + i),
+            "Name": f"TC_{i:06d} check <limits> & recovery",
+            "Test Suite Execution Record ID": str(5000 + suite),
+            "Test Suite Execution Records": f"Suite_{suite}",
+            "Last Result": STATES[i % len(STATES)],
+            "Test Plan ID": "42",
+            "Test Case ID": str(200000 + i),
+            "Build Record ID": "77",
+            "Test Script ID": "" if i % 2 else str(300000 + i),
+            "Log Path": f"logs/tc_{i}.log;logs/suite_{suite}.log",
+            "[Category] Environment": "CI",
+            "[Category] Platform": "linux-x86_64",
+        })
+    return tcers
+
+
+def measure(fn, items, runs):
+    """Median seconds of 'runs' passes of fn over items."""
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        for x in items:
+            fn(x)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def cli():
+    p = optparse.OptionParser(description="Records/second of the TCR/TSR XML generation (no network)")
+    p.add_option('--records', '-n', default=100000, type="int", help="Synthetic TCERs. Default is 100000")
+    p.add_option('--suites', '-s', default=100, type="int", help="Test suite execution records. Default is 100")
+    p.add_option('--runs', '-r', default=3, type="int", help="Passes per measure (median is reported). Default is 3")
+    p.add_option('--projectArea', '-a', default="HHS (Test)", help="Project area used in the URLs")
+    p.add_option('--streamID', '-t', default="_stream01", help="Stream ID used in the attachment URL")
+    options, arguments = p.parse_args()
+
+    tcers = syntheticTcers(options.records, max(1, options.suites))
+    attachments = FixedAttachments()
+    projectArea, streamID = options.projectArea, options.streamID
+
+    # TCR: as with --workers > 1, log lines of each record are buffered
+    def tcr(x):
+        updateTCR.runBuffered(updateTCR.generateTCRContent, x, projectArea, streamID, attachments)
+
+    sample, _ = updateTCR.runBuffered(updateTCR.generateTCRContent, tcers[0], projectArea, streamID, attachments)
+    if len(sample) == 0:
+        print("FAIL: generateTCRContent returned an empty body")
+        return 1
+    tcrSeconds = measure(tcr, tcers, options.runs)
+
+    suites = list(updateTCR.getTestSuites(tcers).values())
+    resultIDs = [str(900000 + i) for i in range(len(tcers) // len(suites))]
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tsrSeconds = measure(lambda s: updateTCR.generateTSRContent(s, projectArea, None, resultIDs), suites, options.runs)
+
+    print(f"Records: {len(tcers)}, suites: {len(suites)}, runs: {options.runs} (median)")
+    print(f"TCR body: {len(sample)} bytes")
+    print(f"generateTCRContent: {tcrSeconds:.2f} s, {len(tcers) / tcrSeconds:,.0f} records/s")
+    print(f"generateTSRContent: {tsrSeconds:.2f} s, {len(tcers) / tsrSeconds:,.0f} suite elements/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(cli())
@@ -34,19 +34,22 @@ if not exist "%VENV_PY%" (
     )
 )
 
-REM === Install required packages inside venv ===
-echo [INFO] Upgrading pip...
-"%VENV_PY%" -m pip install --upgrade pip
+REM === Install required packages inside venv (only when missing) ===
+"%VENV_PY%" -c "import requests, dotenv" >nul 2>&1
 if errorlevel 1 (
-    echo [ERROR] pip upgrade failed.
-    exit /b 1
-)
+    echo [INFO] Upgrading pip...
+    "%VENV_PY%" -m pip install --upgrade pip
+    if errorlevel 1 (
+        echo [ERROR] pip upgrade failed.
+        exit /b 1
+    )
 
-echo [INFO] Installing required packages: requests, python-dotenv
-"%VENV_PY%" -m pip install requests python-dotenv
-if errorlevel 1 (
-    echo [ERROR] Package installation failed.
-    exit /b 1
+    echo [INFO] Installing required packages: requests, python-dotenv
+    "%VENV_PY%" -m pip install requests python-dotenv
+    if errorlevel 1 (
+        echo [ERROR] Package installation failed.
+        exit /b 1
+    )
 )
 
 REM === Build paths for uploader arguments ===
@@ -0,0 +1,297 @@
+#########################################
+# In-process Jazz/RQM HTTP client used by updateTCR.py (replaces one curl process per call).
+# - one requests.Session: keep-alive connections + TLS handshake reused across calls
+# - cookies kept in memory (no cookie jar file)
+# - structured responses: status, headers, body, Location, Result ID, authrequired
+# - AttachmentManager: each distinct log file uploaded once per run, concurrently
+#########################################
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+except Exception:
+    pass
+#########################################
+
+
+AUTH_MSG_HEADER = "X-com-ibm-team-repository-web-auth-msg"
+RESULT_ID_PATTERN = re.compile(r"<rqm:resultId xmlns:rqm=\"http://schema.ibm.com/rqm/2007#executionresult\">(\d+)")
+XML_CONTENT_TYPE = "application/xml; charset=UTF-8"
+
+
+class JazzResponse:
+    """Result of one call. status 0 means a network error (no response from the server)."""
+
+    def __init__(self, status=0, reason="", headers=None, text="", error=""):
+        self.status = status
+        self.reason = reason
+        self.headers = headers if headers is not None else requests.structures.CaseInsensitiveDict()
+        self.text = text
+        self.error = error
+
+    @classmethod
+    def fromResponse(cls, r):
+        return cls(r.status_code, r.reason or "", r.headers, r.text)
+
+    @property
+    def ok(self):
+        return self.status in (200, 201)
+
+    @property
+    def statusCodeNum(self):
+        return str(self.status) if self.status else ""
+
+    @property
+    def statusCodeFull(self):
+        return f"{self.status} {self.reason}".strip() if self.status else ""
+
+    @property
+    def location(self):
+        return self.headers.get("Location", "")
+
+    @property
+    def contentLocation(self):
+        return self.headers.get("Content-Location", "")
+
+    @property
+    def resultId(self):
+        m = RESULT_ID_PATTERN.search(self.text)
+        return m.group(1) if m is not None else ""
+
+    @property
+    def authRequired(self):
+        return self.headers.get(AUTH_MSG_HEADER, "") == "authrequired"
+
+
+class JazzClient:
+    """
+    One Jazz/RQM session per run, shared by all worker threads. verify=False mirrors "curl -k".
+    Redirects are followed for GET only: login and POST report the first response
+    (login Location, Location/Result ID of the created resource), as "curl -i" did.
+    """
+
+    def __init__(self, baseUrl, context="qm/", verify=False, poolSize=10, timeout=(10, 300)):
+        self.baseUrl = baseUrl.rstrip("/") + "/"
+        self.context = context
+        self.verify = verify
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._credentials = None
+        self._loginLock = threading.Lock()
+        self.generation = 0  # bumped by every login: identifies the session a response belongs to
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("verify", self.verify)
+        try:
+            return JazzResponse.fromResponse(self.session.request(method, url, **kwargs))
+        except requests.RequestException as e:
+            print("STDERR:", e)
+            return JazzResponse(error=str(e))
+
+    # --- authentication ---------------------------------------------------------------
+
+    def login(self, user, password):
+        """Form login (j_security_check). Succeeded when Location is set and is not auth/authfailed."""
+        with self._loginLock:
+            self._credentials = (user, password)
+            return self._login(user, password)
+
+    def reauthenticate(self, generation):
+        """
+        Login again after an "authrequired" response obtained with session 'generation'.
+        Workers that saw the same session expire share a single login: whoever comes
+        after the first one finds a newer generation and just retries its request.
+        """
+        with self._loginLock:
+            if generation == self.generation and self._credentials is not None:
+                self._login(*self._credentials)
+            return self.generation
+
+    def _login(self, user, password):
+        response = self._request(
+            "POST",
+            self.baseUrl + self.context + "j_security_check",
+            data={"j_username": user, "j_password": password},
+            allow_redirects=False,
+        )
+        if response.location:
+            # like curl -L: follow the redirect to collect the session cookies
+            self._request("GET", requests.compat.urljoin(self.baseUrl, response.location))
+        self.generation += 1
+        return response
+
+    @staticmethod
+    def loginSucceeded(response):
+        return len(response.location) > 0 and "auth/authfailed" not in response.location
+
+    # --- resources ---------------------------------------------------------------------
+
+    def get(self, url):
+        return self._request("GET", url)
+
+    def postXml(self, url, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self._request(
+            "POST", url, data=data, headers={"Content-Type": XML_CONTENT_TYPE}, allow_redirects=False
+        )
+
+    def uploadAttachment(self, url, filePath):
+        """Multipart field "data" (like curl -F "data=@file"); Location is the created attachment."""
+        name = os.path.basename(filePath)
+        contentType = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        try:
+            with open(filePath, "rb") as f:
+                return self._request("POST", url, files={"data": (name, f, contentType)}, allow_redirects=False)
+        except OSError as e:
+            print("STDERR:", e)
+            return JazzResponse(error=str(e))
+
+
+@contextmanager
+def fileLock(path):
+    """Exclusive lock across processes on 'path' (created if missing), held for the with-block."""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # retries for ~10 s, then OSError
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class AttachmentManager:
+    """
+    Uploads attachments for generateTCRContent, once per distinct file.
+    - key: attachment service URL + sha256 + file name, so a log shared by many TCERs
+      (e.g. suite-level logs) is uploaded once and its Location reused everywhere
+    - uploads run on their own pool; a file requested while its upload is in flight
+      waits for that same upload instead of starting another one
+    - failed uploads (no Location) are not remembered: the next reference tries again
+    - cacheFile (optional): JSON map key -> Location kept across runs; save() merges with
+      what other runs wrote meanwhile under <cacheFile>.lock, so pushes running side by side
+      can share it without losing each other's entries
+    """
+
+    def __init__(self, client, workers=4, cacheFile=None):
+        self.client = client
+        self.cacheFile = cacheFile
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="jazz-attachment")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._hashes = {}
+        self._known = {}
+        self.stats = {"referenced": 0, "uploaded": 0, "reused": 0, "failed": 0}
+        if cacheFile:
+            self._known = self._load()
+        self._added = {}  # uploaded by this run, merged into cacheFile by save()
+
+    def _load(self):
+        try:
+            with open(self.cacheFile, "r", encoding="utf-8") as f:
+                return dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            return {}
+
+    def locations(self, url, paths):
+        """Location of every path (same order, "" when the upload failed)."""
+        futures = [self._locationFuture(url, p) for p in paths]
+        return [f.result() for f in futures]
+
+    def _fileHash(self, path):
+        st = os.stat(path)
+        ident = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+        digest = self._hashes.get(ident)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            digest = self._hashes[ident] = h.hexdigest()
+        return digest
+
+    def _locationFuture(self, url, path):
+        try:
+            key = "|".join((url, self._fileHash(path), os.path.basename(path)))
+        except OSError:
+            key = None  # missing/unreadable file: the upload reports the error
+        with self._lock:
+            self.stats["referenced"] += 1
+            if key is not None and key in self._known:
+                self.stats["reused"] += 1
+                done = Future()
+                done.set_result(self._known[key])
+                return done
+            if key is not None and key in self._inflight:
+                self.stats["reused"] += 1
+                return self._inflight[key]
+            future = self._pool.submit(self._upload, url, path, key)
+            if key is not None:
+                self._inflight[key] = future
+            return future
+
+    def _upload(self, url, path, key):
+        location = ""
+        try:
+            location = self.client.uploadAttachment(url, path).location
+        finally:
+            # also on an unexpected exception: the next reference must upload again,
+            # not get this failed future
+            with self._lock:
+                self._inflight.pop(key, None)
+                if location:
+                    self.stats["uploaded"] += 1
+                    if key is not None:
+                        self._known[key] = self._added[key] = location
+                else:
+                    self.stats["failed"] += 1
+        return location
+
+    def save(self):
+        if not self.cacheFile:
+            return
+        with self._lock:
+            added = dict(self._added)
+        # read-merge-replace under the lock: a run saving meanwhile cannot drop our entries
+        with fileLock(self.cacheFile + ".lock"):
+            data = self._load()
+            data.update(added)
+            tmp = f"{self.cacheFile}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.cacheFile)
+
+    def close(self):
+        self._pool.shutdown()
+        self.save()
@@ -0,0 +1,165 @@
+#########################################
+# XML template layer for updateTCR.py (TCR/TSR bodies).
+# - Entries templates ("<placeholder>" markers) compiled once into str.format patterns
+# - every value is XML-escaped (titles, categories, links, ids)
+# - resource URL prefixes computed once per (project area, resource name)
+#########################################
+import re
+#########################################
+
+
+STATE_PREFIX = "com.ibm.rqm.execution.common.state."
+
+
+def escape(value):
+    """Escape a value for XML text or a double-quoted attribute."""
+    # chained replace: much faster than str.translate on short strings
+    return str(value).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\"", "&quot;")
+
+
+class Template:
+    """
+    An Entries value compiled once. Only the given field names are placeholders:
+    "<p>" or "<title>" stay literal tags unless listed in 'fields'.
+    """
+
+    def __init__(self, text, fields=None, parts=None):
+        if parts is None:
+            pattern = "<(" + "|".join(re.escape(f) for f in fields) + ")>"
+            parts = re.split(pattern, text)  # literal, field, literal, field, ..., literal
+        self._parts = parts
+        self.fields = tuple(dict.fromkeys(parts[1::2]))  # distinct, in order of appearance
+        # positional pattern: field i of 'fields' is {i} wherever it appears
+        self._format = "".join(
+            p.replace("{", "{{").replace("}", "}}") if i % 2 == 0 else "{%d}" % self.fields.index(p)
+            for i, p in enumerate(parts)
+        ).format
+
+    def render(self, *values):
+        """Fill the placeholders (in 'fields' order) with XML-escaped values."""
+        return self._format(*map(escape, values))
+
+    def fill(self, **values):
+        """Fill the placeholders by name, as they are (URLs, tag names)."""
+        return self._format(*(values[f] for f in self.fields))
+
+    def bind(self, **values):
+        """New Template with the fields known now (e.g. resource_name) filled in as they are."""
+        parts = [self._parts[0]]
+        for field, literal in zip(self._parts[1::2], self._parts[2::2]):
+            if field in values:
+                parts[-1] += str(values[field]) + literal
+            else:
+                parts += [field, literal]
+        return Template(None, parts=parts)
+
+
+class XmlTemplates:
+    """
+    All fragments used by generateTCRContent/generateTSRContent, compiled from the Entries enum.
+    Fragments with a fixed resource name (open/close tags, links) are built once and cached.
+    """
+
+    FIELDS = ("resource_name", "resource_url", "title", "description", "category_name", "category_value",
+              "status_label", "status", "link_path", "link_name")
+
+    def __init__(self, entries):
+        self.version = entries.VERSION.value
+        self.detailsOpen = entries.DETAILS_OPEN_TAG.value
+        self.detailsClose = entries.DETAILS_CLOSE_TAG.value
+        compiled = lambda name: Template(getattr(entries, name).value, self.FIELDS)
+        self._open = compiled("NS2_RESOURCE_OPEN_TAG")
+        self._close = compiled("NS2_RESOURCE_CLOSE_TAG")
+        self._link = compiled("NS2_RESOURCE_LINK")
+        self._ns18Link = compiled("NS18_RESOURCE_LINK")
+        self._title = compiled("NS4_TITLE")
+        self._category = compiled("NS2_CATEGORY")
+        self._stateLabel = compiled("NS2_STATE_LABEL")
+        self._state = compiled("NS6_STATE")
+        self._detailsLink = compiled("DETAILS_LINK")
+        # state label ("Passed", "perm_failed", ...) -> state URI, same lookup as getEntryValue(label.upper())
+        self.states = {e.name: e.value for e in entries if e.value.startswith(STATE_PREFIX)}
+        self._opens, self._closes, self._links = {}, {}, {}
+        self._ns18Links = {}
+
+    def open(self, resourceName):
+        """XML declaration + opening tag of the resource document."""
+        tag = self._opens.get(resourceName)
+        if tag is None:
+            tag = self._opens[resourceName] = self.version + self._open.fill(resource_name=resourceName)
+        return tag
+
+    def close(self, resourceName):
+        tag = self._closes.get(resourceName)
+        if tag is None:
+            tag = self._closes[resourceName] = self._close.fill(resource_name=resourceName)
+        return tag
+
+    def title(self, title):
+        return self._title.render(title)
+
+    def category(self, name, value):
+        return self._category.render(name, value)
+
+    def link(self, resourceName, url):
+        """<ns2:resourceName href="url"/>"""
+        fmt = self._links.get(resourceName)
+        if fmt is None:
+            fmt = self._links[resourceName] = self._link.bind(resource_name=resourceName)
+        return fmt.render(url)
+
+    def ns18Link(self, resourceName, url):
+        """<ns18:resourceName href="url"/>"""
+        fmt = self._ns18Links.get(resourceName)
+        if fmt is None:
+            fmt = self._ns18Links[resourceName] = self._ns18Link.bind(resource_name=resourceName)
+        return fmt.render(url)
+
+    @staticmethod
+    def element(tag, text):
+        """<tag>text</tag> with escaped text (suite statistics, times, index)."""
+        return f"<{tag}>{escape(text)}</{tag}>"
+
+    def state(self, stateLabel):
+        """<ns2:stateLabel> + <ns6:state> (state is "" for an unknown label, as before)."""
+        state = self.states.get(stateLabel.upper(), "")
+        return self._stateLabel.render(stateLabel) + self._state.render(state)
+
+    def detailsLink(self, path, name):
+        return self._detailsLink.render(path, name)
+
+
+class ServiceUrls:
+    """
+    Resource URLs of one project area (and optional stream / global configuration).
+    The alias, the per-resource prefixes and the configuration suffix are computed once.
+    """
+
+    def __init__(self, entries, projectArea, streamID=None):
+        self.alias = projectArea.replace(" ", "+").replace("(", "%28").replace(")", "%29")
+        base = Template(entries.RESOURCE_URL_WITHOUT_GC.value, ("project_area", "resource_name"))
+        self._prefix = base.bind(project_area=self.alias)
+        self._urn = Template(entries.URN_ID.value, ("resource_name", "resource_id"))
+        self.configContext = ""
+        if streamID is not None and len(streamID) > 0:
+            self.configContext = entries.CONFIG_CONTEXT.value.replace("<stream_id>", streamID)
+        self._prefixes = {}
+        self._urnPrefixes = {}
+
+    def prefix(self, resourceName):
+        p = self._prefixes.get(resourceName)
+        if p is None:
+            p = self._prefixes[resourceName] = self._prefix.fill(resource_name=resourceName)
+        return p
+
+    def url(self, resourceName="executionresult", resourceID=None, withConfig=True):
+        if resourceID is not None and len(resourceID) > 0:
+            # prefix + "urn:com.ibm.rqm:<resource_name>:" computed once per resource name
+            p = self._urnPrefixes.get(resourceName)
+            if p is None:
+                urn = self._urn.bind(resource_name=resourceName).fill(resource_id="")
+                p = self._urnPrefixes[resourceName] = self.prefix(resourceName) + urn
+            url = p + resourceID
+        else:
+            url = self.prefix(resourceName)
+        return url + self.configContext if withConfig else url
@@ -1,18 +1,48 @@
-from .uploader import (
-    upload_test_artifacts,  # API "pura": summary + eccezioni
-    upload_test_artifacts_safe,  # API "safe": UploadResult con exit_code
-    UploadError,
-    UploadResult,
-)
-from .models import JFrogConfig, UploadSummary
-
-__all__ = [
-    "upload_test_artifacts",
-    "upload_test_artifacts_safe",
-    "UploadError",
-    "UploadResult",
-    "JFrogConfig",
-    "UploadSummary",
-]
+from typing import TYPE_CHECKING
+
+# Export caricati al primo accesso (PEP 562): "python -m jfrog_uploader --help" e il
+# dry-run non pagano l'import di requests/urllib3 e dello stack dell'uploader.
+_EXPORTS = {
+    "upload_test_artifacts": ".uploader",  # API "pura": summary + eccezioni
+    "upload_test_artifacts_safe": ".uploader",  # API "safe": UploadResult con exit_code
+    "upload_test_artifacts_batch": ".uploader",  # API batch: molti job, una sessione
+    "UploadError": ".uploader",
+    "UploadResult": ".uploader",
+    "JFrogConfig": ".models",
+    "UploadSummary": ".models",
+    "BatchJob": ".models",
+    "BatchSummary": ".models",
+    "register_metrics_sink": ".metrics",
+    "unregister_metrics_sink": ".metrics",
+}
+
+__all__ = list(_EXPORTS)
 
 __version__ = "0.1.0"
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .uploader import (
+        upload_test_artifacts,
+        upload_test_artifacts_safe,
+        upload_test_artifacts_batch,
+        UploadError,
+        UploadResult,
+    )
+    from .models import JFrogConfig, UploadSummary, BatchJob, BatchSummary
+    from .metrics import register_metrics_sink, unregister_metrics_sink
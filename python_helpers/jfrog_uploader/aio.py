@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import quote
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+from .models import ArchiveStats, JFrogConfig, UploadSummary
+from .progress import rate_limiter
+from .transport import RetryPolicy
+from .uploader import UploadError
+from .utils import (
+    as_matrix_properties,
+    build_remote_folder_name,
+    checksums_of_file,
+    current_datetime,
+    default_checksum_cache,
+    build_archive,
+    CompressionPolicy,
+    DEFAULT_COMPRESSION,
+    normalize_dest,
+    remove_temp_zip,
+    zip_to_stream,
+)
+
+BODY_CHUNK_SIZE = 1024 * 1024
+
+
+def _require_aiohttp() -> None:
+    if aiohttp is None:
+        raise RuntimeError("AsyncJFrogClient requires aiohttp (pip install aiohttp)")
+
+
+async def _iter_body(
+    body: Union[Path, BinaryIO], chunk_size: int = BODY_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """Legge il body a blocchi in un thread: l'event loop non resta mai bloccato sul disco."""
+    if hasattr(body, "read"):
+        f, owned = body, False
+        await asyncio.to_thread(f.seek, 0)
+    else:
+        f, owned = await asyncio.to_thread(Path(body).open, "rb"), True
+    try:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            limiter = rate_limiter()
+            if limiter is not None:
+                # stesso bucket dei PUT sincroni; l'attesa blocca un thread, non il loop
+                await asyncio.to_thread(limiter.consume, len(chunk))
+            yield chunk
+    finally:
+        if owned:
+            await asyncio.to_thread(f.close)
+
+
+class AsyncJFrogClient:
+    """
+    Variante asyncio di JFrogClient (stessa superficie: stat / exists / put_file):
+    - una ClientSession con pool limitato a 'concurrency' connessioni
+    - semaforo su ogni richiesta: centinaia di upload/check da un solo event loop
+    - stessa RetryPolicy del client sincrono (backoff, Retry-After)
+    Da usare come context manager: `async with AsyncJFrogClient(...) as c:`.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        repo: str,
+        access_token: Optional[str] = None,
+        api_key: Optional[str] = None,
+        connect_timeout: int = 10,
+        read_timeout: int = 300,
+        verbose: Optional[bool] = None,
+        concurrency: int = 16,
+        retry: Optional[RetryPolicy] = None,
+    ) -> None:
+        _require_aiohttp()
+        self.base_url = base_url.rstrip("/")
+        self.repo = repo
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.verbose = bool(verbose or os.environ.get("JFROG_DEBUG"))
+        self.concurrency = max(1, int(concurrency))
+        self.retry = retry or RetryPolicy()
+        self.headers: Dict[str, str] = {}
+        if access_token:
+            self.headers["Authorization"] = f"Bearer {access_token}"
+        elif api_key:
+            self.headers["X-JFrog-Art-Api"] = api_key
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._sem = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> "AsyncJFrogClient":
+        self._ensure_session()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _ensure_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout, sock_read=self.read_timeout
+                ),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # --- util ---------------------------------------------------------------
+
+    def _log(self, event: str, **data) -> None:
+        if self.verbose:
+            print(json.dumps({"event": event, **data}), flush=True)
+
+    def _compose_url(self, remote_path: str, matrix_props: str = "") -> str:
+        p = remote_path.lstrip("/")
+        return (
+            f"{self.base_url}/artifactory/"
+            f"{quote(self.repo, safe='')}/"
+            f"{quote(p, safe='/')}{matrix_props or ''}"
+        )
+
+    def _compose_storage_url(self, remote_path: str) -> str:
+        p = remote_path.lstrip("/")
+        return (
+            f"{self.base_url}/artifactory/api/storage/"
+            f"{quote(self.repo, safe='')}/"
+            f"{quote(p, safe='/')}"
+        )
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        """Richiesta con retry; 'body' è una factory: ogni tentativo riparte dal primo byte."""
+        session = self._ensure_session()
+        attempt = 0
+        while True:
+            try:
+                async with self._sem:
+                    async with session.request(
+                        method, url, headers=headers, data=body() if body else None
+                    ) as r:
+                        payload = await r.read()
+                        status, r_headers = r.status, dict(r.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retry.retries:
+                    raise
+                wait = self.retry.delay(attempt)
+                self._log("http-retry", method=method, url=url, attempt=attempt + 1, error=str(e))
+            else:
+                if status not in self.retry.statuses or attempt >= self.retry.retries:
+                    return status, r_headers, payload
+                wait = self.retry.delay(attempt, _HeadersOnly(r_headers))
+                self._log("http-retry", method=method, url=url, attempt=attempt + 1, status=status)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    # --- API: esistenza -----------------------------------------------------
+
+    async def stat(self, remote_path: str) -> Tuple[int, Optional[dict[str, Any]]]:
+        url = self._compose_storage_url(remote_path)
+        try:
+            status, headers, payload = await self._request("GET", url)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._log("http-storage-error", url=url, error=str(e))
+            return 599, None  # pseudo-codice per errore di rete
+        self._log("http-storage", url=url, status=status)
+        if headers.get("Content-Type", "").startswith("application/json"):
+            try:
+                return status, json.loads(payload)
+            except ValueError:
+                return status, None
+        return status, None
+
+    async def exists(self, remote_path: str) -> Optional[bool]:
+        status, _ = await self.stat(remote_path)
+        if status == 200:
+            return True
+        if status == 404:
+            return False
+        return None
+
+    # --- API: upload --------------------------------------------------------
+
+    async def deploy_by_checksum(
+        self,
+        remote_path: str,
+        sha1: str,
+        sha256: Optional[str] = None,
+        matrix_props: Optional[str] = None,
+    ) -> Tuple[int, str]:
+        url = self._compose_url(remote_path, matrix_props or "")
+        headers = {"X-Checksum-Deploy": "true", "X-Checksum-Sha1": sha1}
+        if sha256:
+            headers["X-Checksum-Sha256"] = sha256
+        try:
+            status, _, _ = await self._request("PUT", url, headers=headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._log("http-checksum-deploy-error", url=url, error=str(e))
+            return 599, url
+        self._log("http-checksum-deploy", url=url, status=status)
+        return status, url
+
+    async def put_file(
+        self,
+        local_path: Union[Path, BinaryIO],
+        remote_path: str,
+        sha1: Optional[str] = None,
+        sha256: Optional[str] = None,
+        matrix_props: Optional[str] = None,
+        overwrite: bool = True,
+    ) -> Tuple[int, str]:
+        url = self._compose_url(remote_path, matrix_props or "")
+        size = await asyncio.to_thread(_size_of, local_path)
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "Content-Length": str(size),
+        }
+        if sha1:
+            headers["X-Checksum-Sha1"] = sha1
+        if sha256:
+            headers["X-Checksum-Sha256"] = sha256
+        status, _, payload = await self._request(
+            "PUT", url, headers=headers, body=lambda: _iter_body(local_path)
+        )
+        self._log("http-put", url=url, status=status, text=payload[:300].decode(errors="replace"))
+        return status, url
+
+
+class _HeadersOnly:
+    """Adatta gli header di aiohttp a RetryPolicy.delay (che legge solo .headers)."""
+
+    def __init__(self, headers: Dict[str, str]) -> None:
+        self.headers = headers
+
+
+def _size_of(body: Union[Path, BinaryIO]) -> int:
+    if hasattr(body, "read"):
+        body.seek(0, 2)
+        size = body.tell()
+        body.seek(0)
+        return size
+    return Path(body).stat().st_size
+
+
+async def upload_test_artifacts(
+    artifact_path: str,
+    results_json_path: str,
+    dest: str,
+    jfrog: JFrogConfig,
+    repo: str,
+    overwrite: bool = False,
+    set_properties: Optional[Dict[str, str]] = None,
+    dry_run: bool = False,
+    client: Optional[AsyncJFrogClient] = None,
+    timestamp: Optional[str] = None,
+    stream: bool = False,
+    checksum_deploy: bool = False,
+    use_checksum_cache: bool = True,
+    concurrency: int = 16,
+    compression: Optional[CompressionPolicy] = None,
+) -> UploadSummary:
+    """
+    Stesso flusso di uploader.upload_test_artifacts, come coroutine:
+    zip e hash girano in thread, i check di esistenza partono in parallelo
+    e le richieste condividono il client (semaforo 'concurrency').
+    Passare un 'client' per condividere sessione e limite tra molti upload concorrenti.
+    """
+    artifact_in = Path(artifact_path)
+    results_in = Path(results_json_path)
+    if not artifact_in.exists():
+        raise FileNotFoundError(f"Artifact path not found: {artifact_in}")
+    if not results_in.exists() or results_in.suffix.lower() != ".json":
+        raise FileNotFoundError(f"Results JSON file not found or invalid: {results_in}")
+    base_url = (jfrog.get("base_url") or "").rstrip("/")
+    if not base_url:
+        raise ValueError("jfrog.base_url is required")
+
+    cache = default_checksum_cache() if use_checksum_cache else None
+    policy = compression or DEFAULT_COMPRESSION
+    temp_zip: Optional[Path] = None
+    artifact_body: Union[Path, BinaryIO, None] = None
+    archive: Optional[ArchiveStats] = None
+    own_client = client is None
+    try:
+        # dentro il try: uno zip temporaneo viene rimosso anche se l'hash fallisce
+        if stream and artifact_in.is_dir():
+            artifact_body, a_sums, archive = await asyncio.to_thread(
+                zip_to_stream, artifact_in, policy=policy
+            )
+            artifact_name = f"{artifact_in.name}{policy.suffix}"
+        elif artifact_in.is_dir():
+            temp_zip, archive = await asyncio.to_thread(build_archive, artifact_in, policy)
+            artifact_body, artifact_name = temp_zip, temp_zip.name
+            a_sums = await asyncio.to_thread(checksums_of_file, temp_zip)
+        else:
+            artifact_body, artifact_name = artifact_in, artifact_in.name
+            a_sums = await asyncio.to_thread(checksums_of_file, artifact_in, cache=cache)
+
+        if client is None:
+            retries = jfrog.get("retries")
+            client = AsyncJFrogClient(
+                base_url=base_url,
+                repo=repo,
+                access_token=jfrog.get("access_token"),
+                api_key=jfrog.get("api_key"),
+                concurrency=concurrency,
+                retry=RetryPolicy(retries=retries) if retries is not None else None,
+            )
+        r_sums = await asyncio.to_thread(checksums_of_file, results_in, cache=cache)
+
+        ts = timestamp or current_datetime()  # YYYYMMDDHHMMSS
+        remote_folder = normalize_dest(build_remote_folder_name(dest, ts, as_folder=False))
+        if not remote_folder.endswith("/"):
+            remote_folder += "/"
+        artifact_remote_path = f"{remote_folder}{artifact_name}"
+        results_remote_path = f"{remote_folder}{results_in.name}"
+        matrix_props = as_matrix_properties(set_properties)
+
+        summary: UploadSummary = {
+            "artifact_url": f"{base_url}/artifactory/{repo}/{artifact_remote_path}{matrix_props}",
+            "results_url": f"{base_url}/artifactory/{repo}/{results_remote_path}{matrix_props}",
+            "checksums": {
+                "artifact": {"sha256": a_sums["sha256"], "sha1": a_sums["sha1"]},
+                "results": {"sha256": r_sums["sha256"], "sha1": r_sums["sha1"]},
+            },
+        }
+        if archive is not None:
+            summary["archive"] = archive
+        if dry_run:
+            return summary
+
+        if not overwrite:
+            exists_art, exists_res = await asyncio.gather(
+                client.exists(artifact_remote_path), client.exists(results_remote_path)
+            )
+            if exists_art is True:
+                raise UploadError(
+                    f"Remote artifact exists: {artifact_remote_path}. Use --overwrite to replace.",
+                    status=409,
+                )
+            if exists_res is True:
+                raise UploadError(
+                    f"Remote results JSON exists: {results_remote_path}. Use --overwrite to replace.",
+                    status=409,
+                )
+
+        summary["stats"] = {}
+        for key, body, remote_path, sums, label in (
+            ("artifact", artifact_body, artifact_remote_path, a_sums, "Artifact"),
+            ("results", results_in, results_remote_path, r_sums, "Results JSON"),
+        ):
+            size = await asyncio.to_thread(_size_of, body)
+            code = 0
+            if checksum_deploy:
+                code, url = await client.deploy_by_checksum(
+                    remote_path, sums["sha1"], sums["sha256"], matrix_props=matrix_props
+                )
+            if code in (200, 201):
+                summary["stats"][key] = {
+                    "size": size,
+                    "bytes_sent": 0,
+                    "bytes_saved": size,
+                    "checksum_deploy": True,
+                }
+            else:
+                code, url = await client.put_file(
+                    body, remote_path, sums["sha1"], sums["sha256"], matrix_props=matrix_props
+                )
+                summary["stats"][key] = {
+                    "size": size,
+                    "bytes_sent": size,
+                    "bytes_saved": 0,
+                    "checksum_deploy": False,
+                }
+            # Policy: se overwrite=False e il server risponde 200 (sovrascrittura), consideralo errore.
+            if code >= 300 or (code == 200 and not overwrite):
+                raise UploadError(f"{label} upload failed ({code}) → {url}", status=code)
+        return summary
+    finally:
+        if own_client and client is not None:
+            await client.close()
+        # rmtree e close di uno spool su disco sono bloccanti: fuori dall'event loop
+        if temp_zip is not None:
+            await asyncio.to_thread(remove_temp_zip, artifact_in, temp_zip)
+        elif hasattr(artifact_body, "close"):
+            await asyncio.to_thread(artifact_body.close)
@@ -0,0 +1,225 @@
+"""
+Benchmark di throughput dell'uploader contro lo stand-in locale (fakeserver.py).
+
+Per ogni combinazione profilo × modalità × concorrenza esegue un batch di upload e misura
+MB/s e richieste/s end-to-end, più il tempo speso nelle fasi zip, hash, stat e PUT
+(summary["timings"] sommate sui job e sui thread: con concorrenza > 1 possono superare
+il tempo reale).
+
+    python -m jfrog_uploader.bench --profiles small,large --concurrency 1,4 --total-mb 32
+    python -m jfrog_uploader.bench --latency-ms 20 --bandwidth-mbps 200 --json bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .fakeserver import FakeArtifactory
+from .models import BatchJob
+from .uploader import upload_test_artifacts_batch
+
+# profilo → lista di (dimensione file in byte, peso relativo)
+PROFILES: Dict[str, List[Tuple[int, float]]] = {
+    "small": [(4 * 1024, 1.0)],
+    "mixed": [(4 * 1024, 0.5), (64 * 1024, 0.3), (1024 * 1024, 0.15), (8 * 1024 * 1024, 0.05)],
+    "large": [(32 * 1024 * 1024, 1.0)],
+}
+MODES = ("zip", "stream", "explode")
+BENCH_REPO = "bench-local"
+# pool fissi: i numeri non devono dipendere dai core della macchina né dai default
+BENCH_EXPLODE_WORKERS = 8
+BENCH_ARCHIVE_WORKERS = 4
+
+
+def _file_sizes(profile: str, total_bytes: int, rng: random.Random) -> List[int]:
+    dist = PROFILES[profile]
+    sizes, weights = [s for s, _ in dist], [w for _, w in dist]
+    out: List[int] = []
+    while sum(out) < total_bytes:
+        out.append(min(rng.choices(sizes, weights)[0], total_bytes - sum(out)))
+    return out
+
+
+def make_dataset(root: Path, profile: str, total_mb: float, seed: int = 0) -> Tuple[Path, int, int]:
+    """
+    Directory sintetica tipo report di test: metà contenuto casuale (incomprimibile),
+    metà testo ripetuto (comprimibile). Ritorna (directory, numero file, byte totali).
+    """
+    rng = random.Random(seed)
+    folder = root / f"{profile}-{total_mb:g}mb"
+    if folder.exists():
+        shutil.rmtree(folder)
+    sizes = _file_sizes(profile, int(total_mb * 1024 * 1024), rng)
+    text = b"PASS test_case_%d elapsed=0.%03ds\n"
+    for i, size in enumerate(sizes):
+        path = folder / f"d{i % 16:02d}" / f"file{i:05d}.{'log' if i % 2 else 'bin'}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        half = size // 2
+        line = text % (i, i % 1000)
+        body = rng.randbytes(half) + (line * (size // len(line) + 1))[: size - half]
+        path.write_bytes(body)
+    return folder, len(sizes), sum(sizes)
+
+
+def run_scenario(
+    server: FakeArtifactory,
+    artifact: Path,
+    results_json: Path,
+    input_bytes: int,
+    mode: str,
+    concurrency: int,
+    jobs: int,
+) -> dict:
+    server.reset()
+    batch: List[BatchJob] = [
+        {"artifact_path": str(artifact), "results_json_path": str(results_json), "dest": f"bench/{mode}/job{i:03d}"}
+        for i in range(jobs)
+    ]
+    t0 = time.perf_counter()
+    result = upload_test_artifacts_batch(
+        batch,
+        jfrog={"base_url": server.base_url, "access_token": "bench"},
+        repo=BENCH_REPO,
+        max_workers=concurrency,
+        stream=mode == "stream",
+        explode="local" if mode == "explode" else None,
+        use_checksum_cache=False,  # ogni job deve pagare l'hash
+        use_archive_cache=False,  # ... e la compressione: niente archivi riusati
+        explode_workers=BENCH_EXPLODE_WORKERS,
+        archive_workers=BENCH_ARCHIVE_WORKERS,
+    )
+    elapsed = time.perf_counter() - t0
+    transport = result["transport"]
+    timings = result.get("timings") or {}
+    total_mb = input_bytes * jobs / (1024 * 1024)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "jobs": jobs,
+        "ok": result["ok"],
+        "failed": result["failed"],
+        "seconds": round(elapsed, 3),
+        "input_mb": round(total_mb, 2),
+        "mb_per_s": round(total_mb / elapsed, 2) if elapsed else 0.0,
+        "requests": transport["requests"],
+        "requests_per_s": round(transport["requests"] / elapsed, 1) if elapsed else 0.0,
+        "retries": transport["retries"],
+        "wire_mb": round(server.stats()["bytes_received"] / (1024 * 1024), 2),
+        "phases": {k: round(t["seconds"], 3) for k, t in sorted(timings.items()) if k != "total"},
+        "phase_calls": {k: t["count"] for k, t in sorted(timings.items()) if k != "total"},
+    }
+
+
+def _int_list(s: str) -> List[int]:
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def _str_list(s: str, allowed: Sequence[str], what: str) -> List[str]:
+    out = [x.strip() for x in s.split(",") if x.strip()]
+    bad = [x for x in out if x not in allowed]
+    if bad:
+        raise ValueError(f"Unknown {what}: {', '.join(bad)} (allowed: {', '.join(allowed)})")
+    return out
+
+
+def _print_table(rows: List[dict]) -> None:
+    head = ("profile", "mode", "conc", "jobs", "MB", "sec", "MB/s", "req/s", "zip", "hash", "stat", "put", "retry")
+    print(("{:<8}{:<9}{:>5}{:>5}{:>9}{:>8}{:>9}{:>8}{:>8}{:>8}{:>8}{:>8}{:>6}").format(*head))
+    for r in rows:
+        p = r["phases"]
+        print(
+            ("{:<8}{:<9}{:>5}{:>5}{:>9.1f}{:>8.2f}{:>9.1f}{:>8.0f}{:>8.2f}{:>8.2f}{:>8.2f}{:>8.2f}{:>6}").format(
+                r["profile"],
+                r["mode"],
+                r["concurrency"],
+                r["jobs"],
+                r["input_mb"],
+                r["seconds"],
+                r["mb_per_s"],
+                r["requests_per_s"],
+                p.get("zip", 0.0),
+                p.get("hash", 0.0),
+                p.get("stat", 0.0),
+                p.get("put", 0.0),
+                r["retries"],
+            )
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="jfrog_uploader throughput benchmark against a local Artifactory stand-in")
+    p.add_argument("--profiles", default="small,mixed,large", help=f"File size distributions ({','.join(PROFILES)})")
+    p.add_argument("--modes", default="zip,stream", help=f"Upload modes ({','.join(MODES)})")
+    p.add_argument("--concurrency", default="1,4", help="Comma-separated batch worker counts")
+    p.add_argument("--jobs", type=int, default=0, help="Artifacts per scenario (default: 2 x concurrency)")
+    p.add_argument("--total-mb", type=float, default=16.0, help="Size of each synthetic artifact folder")
+    p.add_argument("--latency-ms", type=float, default=0.0)
+    p.add_argument("--bandwidth-mbps", type=float, default=0.0, help="Server-side cap in Mbit/s (0 = unlimited)")
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workdir", default=None, help="Where to generate datasets (default: temp dir, removed)")
+    p.add_argument("--json", dest="json_out", default=None, help="Also write the results as JSON to this file")
+    args = p.parse_args(argv)
+
+    try:
+        profiles = _str_list(args.profiles, list(PROFILES), "profile")
+        modes = _str_list(args.modes, MODES, "mode")
+        levels = _int_list(args.concurrency)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 2
+
+    # lo stato locale (cache checksum, chunk) del benchmark non tocca quello dell'utente
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="jfrog_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.environ["JFROG_UPLOADER_HOME"] = str(workdir / "home")
+
+    rows: List[dict] = []
+    server = FakeArtifactory(
+        latency=args.latency_ms / 1000.0,
+        bandwidth=args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    try:
+        with server:
+            results_json = workdir / "results.json"
+            results_json.write_text(json.dumps({"tests": [], "summary": {"passed": 0}}), encoding="utf-8")
+            for profile in profiles:
+                folder, n_files, n_bytes = make_dataset(workdir, profile, args.total_mb, args.seed)
+                for mode in modes:
+                    for level in levels:
+                        row = run_scenario(
+                            server,
+                            folder,
+                            results_json,
+                            n_bytes,
+                            mode,
+                            level,
+                            args.jobs or 2 * level,
+                        )
+                        row.update(profile=profile, files=n_files)
+                        rows.append(row)
+                        if not row["ok"]:
+                            print(f"WARNING: {row['failed']} job(s) failed in {profile}/{mode}/{level}", file=sys.stderr)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_table(rows)
+    if args.json_out:
+        report = {"config": vars(args), "results": rows}
+        Path(args.json_out).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0 if all(r["ok"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
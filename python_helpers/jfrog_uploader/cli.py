@@ -1,15 +1,51 @@
 from __future__ import annotations
 
+import functools
 import os
 import json
 import sys
 from typing import Optional, Dict
 
 import argparse
-from dotenv import load_dotenv, find_dotenv
 
-from jfrog_uploader.uploader import UploadError, upload_test_artifacts
-from jfrog_uploader.models import JFrogConfig
+# Solo moduli leggeri qui: uploader, requests e dotenv vengono importati quando servono
+# (--help e gli errori di argomenti non li caricano; vedi startup.py per il budget).
+from jfrog_uploader.models import JFrogConfig, BatchJob
+
+
+@functools.lru_cache(maxsize=None)
+def _find_dotenv(start: str) -> Optional[str]:
+    """Primo .env risalendo da 'start' (come find_dotenv(usecwd=True)); memorizzato per processo."""
+    d = os.path.abspath(start)
+    while True:
+        candidate = os.path.join(d, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(d)
+        if parent == d:
+            return None
+        d = parent
+
+
+def _load_env() -> None:
+    """Carica il .env più vicino alla CWD senza sovrascrivere l'ambiente."""
+    path = _find_dotenv(os.getcwd())
+    if path is None:
+        return  # nessun .env: python-dotenv non viene nemmeno importato
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv(path, override=False)
+    except Exception:
+        pass
+
+
+def _env_number(name: str, default: float, cast=int):
+    """Default numerico da variabile d'ambiente; valore assente o non valido → 'default'."""
+    try:
+        return cast(os.getenv(name) or default)
+    except ValueError:
+        return cast(default)
 
 
 def _parse_props(s: Optional[str]) -> Dict[str, str]:
@@ -28,29 +64,45 @@ def _parse_props(s: Optional[str]) -> Dict[str, str]:
     return out
 
 
-def main(argv: Optional[list[str]] = None) -> int:
-    # Carica .env (cercandolo a partire dalla CWD verso l'alto)
-    try:
-        load_dotenv(find_dotenv(usecwd=True), override=False)
-    except Exception:
-        pass
+def _load_manifest(path: str) -> list[BatchJob]:
+    """
+    Legge il manifest del batch ("-" = stdin): lista di job oppure {"jobs": [...]}.
+    Accetta sia le chiavi API (artifact_path, results_json_path) sia quelle CLI
+    (artifact_result, json_result); 'props' può essere dict o stringa "k=v,k2=v2".
+    """
+    if path == "-":
+        data = json.load(sys.stdin)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs")
+    if not isinstance(data, list):
+        raise ValueError("Invalid batch manifest: expected a list of jobs or {\"jobs\": [...]}")
 
-    p = argparse.ArgumentParser(
-        prog="jfroguploader",
-        description="Upload artifact (dir/zip) + JSON results to JFrog Artifactory (API + CLI).",
-    )
-    p.add_argument(
-        "--artifact_result",
-        required=True,
-        help="Artifact path: directory (auto-zipped) or .zip",
-    )
-    p.add_argument(
-        "--json_result", required=True, help="Results JSON path: a .json file"
-    )
-    p.add_argument(
-        "--dest", required=True, help="Destination segment (e.g. ./ws/WS_1.21.0)"
-    )
+    jobs: list[BatchJob] = []
+    for i, raw in enumerate(data):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Invalid batch job #{i}: expected an object")
+        job: BatchJob = {
+            "artifact_path": raw.get("artifact_path") or raw.get("artifact_result") or "",
+            "results_json_path": raw.get("results_json_path") or raw.get("json_result") or "",
+            "dest": raw.get("dest") or "",
+        }
+        props = raw.get("props")
+        if isinstance(props, str):
+            job["props"] = _parse_props(props)
+        elif isinstance(props, dict):
+            job["props"] = {str(k): str(v) for k, v in props.items()}
+        if not job["artifact_path"] or not job["results_json_path"] or not job["dest"]:
+            raise ValueError(
+                f"Invalid batch job #{i}: artifact_path, results_json_path and dest are required"
+            )
+        jobs.append(job)
+    return jobs
 
+
+def _add_connection_args(p: argparse.ArgumentParser) -> None:
     # JFrog connection
     p.add_argument(
         "--base-url",
@@ -71,6 +123,167 @@ def main(argv: Optional[list[str]] = None) -> int:
         "--api-key", default=os.getenv("JFROG_API_KEY"), help="API key (fallback)"
     )
 
+    p.add_argument(
+        "--retries",
+        type=int,
+        default=_env_number("JFROG_RETRIES", 4),
+        help="Retries with backoff on network errors, 429 and 502/503/504 (default 4)",
+    )
+
+
+def _serve_main(argv: list[str]) -> int:
+    """'serve': worker persistente che riceve job JSON lines (stdin o socket locale)."""
+    p = argparse.ArgumentParser(
+        prog="jfroguploader serve",
+        description="Persistent upload worker: JSON-lines jobs over stdin/stdout or a local socket.",
+    )
+    _add_connection_args(p)
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=_env_number("JFROG_WORKERS", 4),
+        help="Concurrent upload jobs (default 4)",
+    )
+    p.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket instead of stdin/stdout")
+    p.add_argument(
+        "--port",
+        type=int,
+        help=(
+            "Listen on 127.0.0.1:PORT instead of stdin/stdout (Windows). Connections must first "
+            "send {\"op\": \"auth\", \"token\": ...}: JFROG_SERVE_TOKEN, or the generated token "
+            "whose file is reported in the 'ready' event"
+        ),
+    )
+    p.add_argument(
+        "--rate-limit-mbps",
+        type=float,
+        default=_env_number("JFROG_RATE_LIMIT_MBPS", 0, float),
+        help="Upload bandwidth cap in Mbit/s shared by all jobs (0 = unlimited)",
+    )
+    args = p.parse_args(argv)
+    if not args.base_url:
+        print("ERROR: Missing --base-url or JFROG_URL", file=sys.stderr)
+        return 2
+
+    from jfrog_uploader.progress import set_rate_limit
+    from jfrog_uploader.server import UploadWorker, serve_socket, serve_stdio
+
+    set_rate_limit(args.rate_limit_mbps * 1e6 / 8 if args.rate_limit_mbps > 0 else None)
+    worker = UploadWorker(_jfrog_config(args), args.repo, workers=args.workers)
+    if args.socket or args.port is not None:
+        token = os.getenv("JFROG_SERVE_TOKEN") or None
+        return serve_socket(worker, path=args.socket, port=args.port, token=token)
+    return serve_stdio(worker, sys.stdin, sys.stdout)
+
+
+def _drain_main(argv: list[str]) -> int:
+    """'drain': riprende i job della coda persistente (vedi jobqueue.py)."""
+    p = argparse.ArgumentParser(
+        prog="jfroguploader drain",
+        description="Upload the jobs left in the durable local queue (retries with backoff until confirmed).",
+    )
+    _add_connection_args(p)
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=_env_number("JFROG_WORKERS", 4),
+        help="Concurrent uploads (default 4)",
+    )
+    p.add_argument(
+        "--once",
+        action="store_true",
+        help="Attempt only the jobs that are due now, then exit (default: wait for retries until the queue is empty)",
+    )
+    p.add_argument("--max-attempts", type=int, default=50, help="Attempts before a job is marked failed (default 50)")
+    p.add_argument("--status", action="store_true", help="Print job counts per status and exit")
+    p.add_argument("--retry-failed", action="store_true", help="Put permanently failed jobs back in the queue first")
+    p.add_argument(
+        "--purge-done",
+        type=float,
+        metavar="HOURS",
+        help="Delete completed jobs older than HOURS (and their spooled copies) and exit",
+    )
+    args = p.parse_args(argv)
+
+    from jfrog_uploader.jobqueue import UploadQueue, drain
+
+    queue = UploadQueue()
+    if args.status:
+        print(json.dumps(queue.counts(), indent=2))
+        return 0
+    if args.purge_done is not None:
+        print(json.dumps({"purged": queue.purge(("done",), older_than=args.purge_done * 3600)}))
+        return 0
+    if not args.base_url:
+        print("ERROR: Missing --base-url or JFROG_URL", file=sys.stderr)
+        return 2
+    if args.retry_failed:
+        queue.retry_failed()
+    summary = drain(
+        queue,
+        _jfrog_config(args),
+        workers=args.workers,
+        wait=not args.once,
+        max_attempts=args.max_attempts,
+    )
+    print(json.dumps(summary, indent=2))
+    if summary["queue"]["failed"]:
+        return 1
+    return 75 if summary["queue"]["pending"] or summary["queue"]["running"] else 0
+
+
+def _jfrog_config(args: argparse.Namespace) -> JFrogConfig:
+    return {
+        "base_url": args.base_url,
+        "access_token": args.access_token,
+        "api_key": args.api_key,
+        "retries": args.retries,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    # Carica .env (cercandolo a partire dalla CWD verso l'alto)
+    _load_env()
+
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        return _serve_main(argv[1:])
+    if argv[:1] == ["drain"]:
+        return _drain_main(argv[1:])
+
+    p = argparse.ArgumentParser(
+        prog="jfroguploader",
+        description="Upload artifact (dir/zip) + JSON results to JFrog Artifactory (API + CLI).",
+    )
+    p.add_argument(
+        "--artifact_result",
+        help="Artifact path: directory (auto-zipped) or .zip",
+    )
+    p.add_argument("--json_result", help="Results JSON path: a .json file")
+    p.add_argument("--dest", help="Destination segment (e.g. ./ws/WS_1.21.0)")
+
+    # Batch mode
+    p.add_argument(
+        "--batch",
+        metavar="MANIFEST",
+        help="JSON manifest of jobs (or '-' for stdin); uploads all of them in one process",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=_env_number("JFROG_WORKERS", 4),
+        help="Concurrent uploads in --batch mode (default 4)",
+    )
+    p.add_argument(
+        "--archive-workers",
+        type=int,
+        default=None,
+        help="Processes compressing directories in --batch mode (default: one per CPU core)",
+    )
+
+    _add_connection_args(p)
+
     # Behaviour
     p.add_argument(
         "--props", default=os.getenv("PROPS"), help="Matrix properties, e.g. k=v,k2=v2"
@@ -81,6 +294,117 @@ def main(argv: Optional[list[str]] = None) -> int:
     p.add_argument(
         "--dry-run", action="store_true", help="Print planned actions without uploading"
     )
+    p.add_argument(
+        "--stream",
+        action="store_true",
+        help="Zip directories in memory while hashing (spools to disk only for large archives)",
+    )
+    p.add_argument(
+        "--checksum-deploy",
+        action="store_true",
+        help="Try a checksum-only deploy first; send the body only if the server lacks the content",
+    )
+
+    p.add_argument(
+        "--no-checksum-cache",
+        action="store_true",
+        help="Always rehash files instead of reusing digests from the local checksum cache",
+    )
+    p.add_argument(
+        "--no-archive-cache",
+        action="store_true",
+        help="Always re-archive directories instead of reusing an unchanged archive from the local cache",
+    )
+
+    p.add_argument(
+        "--explode",
+        nargs="?",
+        const="local",
+        choices=["local", "server"],
+        help="Upload a directory as single files (local, default) or let Artifactory explode the zip (server)",
+    )
+    p.add_argument(
+        "--queue",
+        action="store_true",
+        help="Record the upload in the durable local queue first; on network/server errors it stays queued for 'drain' (exit 75)",
+    )
+    p.add_argument(
+        "--spool",
+        action="store_true",
+        help="With --queue: copy the inputs into the queue so a retry works even after the workspace is cleaned",
+    )
+    p.add_argument(
+        "--delta",
+        action="store_true",
+        help="Exploded upload of only new/changed files since the last upload of the same folder to the same dest",
+    )
+    p.add_argument(
+        "--explode-workers",
+        type=int,
+        default=8,
+        help="Concurrent file uploads in --explode local mode (default 8)",
+    )
+
+    # Archivio: contenitore e compressione
+    p.add_argument(
+        "--archive-format",
+        choices=["zip", "tar"],
+        default="zip",
+        help="Container for directories: zip (default) or tar (uncompressed, fastest)",
+    )
+    p.add_argument(
+        "--compress-level",
+        type=int,
+        default=6,
+        choices=range(0, 10),
+        metavar="0-9",
+        help="Deflate level for compressible files (already-compressed types are always stored)",
+    )
+
+    # Large files (upload a parti, ripristinabile)
+    p.add_argument(
+        "--chunk-threshold-mb",
+        type=float,
+        default=None,
+        help=(
+            "Upload artifacts larger than this as resumable parts (disabled by default). "
+            "The server keeps the parts and a <name>.parts.json manifest: consumers must "
+            "concatenate the parts to get the artifact back"
+        ),
+    )
+    p.add_argument(
+        "--part-size-mb", type=float, default=64, help="Part size for chunked uploads (default 64)"
+    )
+    p.add_argument(
+        "--part-workers", type=int, default=3, help="Concurrent part uploads (default 3)"
+    )
+
+    # Avanzamento e banda
+    p.add_argument(
+        "--progress",
+        action="store_true",
+        help="Report bytes sent per PUT as JSON lines on stderr",
+    )
+    p.add_argument(
+        "--rate-limit-mbps",
+        type=float,
+        default=_env_number("JFROG_RATE_LIMIT_MBPS", 0, float),
+        help="Upload bandwidth cap in Mbit/s shared by all concurrent PUTs (0 = unlimited)",
+    )
+
+    # Metriche per fase
+    p.add_argument(
+        "--metrics-jsonl",
+        metavar="PATH",
+        default=os.getenv("JFROG_METRICS_JSONL"),
+        help="Append every timing span (validation/zip/hash/stat/put) as a JSON line to PATH",
+    )
+    p.add_argument(
+        "--metrics-openmetrics",
+        metavar="PATH",
+        default=os.getenv("JFROG_METRICS_OPENMETRICS"),
+        help="Write the phase timings of the run as an OpenMetrics text file (e.g. node_exporter textfile)",
+    )
 
     args = p.parse_args(argv)
 
@@ -89,12 +413,115 @@ def main(argv: Optional[list[str]] = None) -> int:
         print("ERROR: Missing --base-url or JFROG_URL", file=sys.stderr)
         return 2
 
-    jfrog: JFrogConfig = {
-        "base_url": args.base_url,
-        "access_token": args.access_token,
-        "api_key": args.api_key,
+    from jfrog_uploader.metrics import JsonLinesSink, register_metrics_sink, write_openmetrics
+    from jfrog_uploader.progress import set_rate_limit, stderr_progress
+    from jfrog_uploader.uploader import (
+        UploadError,
+        upload_test_artifacts,
+        upload_test_artifacts_batch,
+    )
+    from jfrog_uploader.utils import CompressionPolicy
+
+    jfrog = _jfrog_config(args)
+
+    upload_opts = {
+        "chunk_threshold": (
+            int(args.chunk_threshold_mb * 1024 * 1024)
+            if args.chunk_threshold_mb is not None
+            else None
+        ),
+        "part_size": int(args.part_size_mb * 1024 * 1024),
+        "part_workers": args.part_workers,
+        "use_checksum_cache": not args.no_checksum_cache,
+        "use_archive_cache": not args.no_archive_cache,
+        "explode": args.explode,
+        "explode_workers": args.explode_workers,
+        "delta": args.delta,
+        "progress": stderr_progress if args.progress else None,
+        "compression": CompressionPolicy(
+            level=args.compress_level, format=args.archive_format
+        ),
     }
 
+    set_rate_limit(args.rate_limit_mbps * 1e6 / 8 if args.rate_limit_mbps > 0 else None)
+
+    if args.metrics_jsonl:
+        register_metrics_sink(JsonLinesSink(args.metrics_jsonl))
+
+    if args.batch:
+        try:
+            batch = upload_test_artifacts_batch(
+                _load_manifest(args.batch),
+                jfrog=jfrog,
+                repo=args.repo,
+                overwrite=args.overwrite,
+                set_properties=_parse_props(args.props),
+                dry_run=args.dry_run,
+                max_workers=args.workers,
+                archive_workers=args.archive_workers,
+                stream=args.stream,
+                checksum_deploy=args.checksum_deploy,
+                **upload_opts,
+            )
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 2
+        print(json.dumps(batch, indent=2))
+        if args.metrics_openmetrics:
+            write_openmetrics(args.metrics_openmetrics, batch.get("timings") or {})
+        # exit code del primo job fallito (stessa mappatura della modalità singola)
+        for job in batch["jobs"]:
+            if not job["ok"]:
+                return job["exit_code"]
+        return 0
+
+    if not (args.artifact_result and args.json_result and args.dest):
+        print(
+            "ERROR: --artifact_result, --json_result and --dest are required (or use --batch)",
+            file=sys.stderr,
+        )
+        return 2
+
+    if args.queue and not args.dry_run:
+        from jfrog_uploader.jobqueue import QUEUE_OPTIONS, UploadQueue, drain
+
+        queue = UploadQueue()
+        try:
+            job_id = queue.enqueue(
+                args.artifact_result,
+                args.json_result,
+                args.dest,
+                repo=args.repo,
+                set_properties=_parse_props(args.props),
+                spool=args.spool,
+                compression={"level": args.compress_level, "format": args.archive_format},
+                base_url=jfrog.get("base_url"),
+                overwrite=args.overwrite,
+                stream=args.stream,
+                checksum_deploy=args.checksum_deploy,
+                **{k: v for k, v in upload_opts.items() if k in QUEUE_OPTIONS},
+            )
+        except (FileNotFoundError, ValueError) as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 2
+        drain(queue, jfrog, workers=1, wait=False, ids=[job_id], progress=upload_opts["progress"])
+        job = queue.get(job_id)
+        if job["status"] == "done":
+            print(json.dumps(job["summary"], indent=2))
+            if args.metrics_openmetrics:
+                write_openmetrics(
+                    args.metrics_openmetrics, job["summary"].get("timings") or {}, dest=args.dest
+                )
+            return 0
+        print(f"ERROR: {job['error']}", file=sys.stderr)
+        if job["status"] == "pending":
+            print(
+                f"Upload queued as job {job_id}: run 'jfroguploader drain' to retry it",
+                file=sys.stderr,
+            )
+            return 75
+        return job["exit_code"] or 1
+
     try:
         summary = upload_test_artifacts(
             artifact_path=args.artifact_result,
@@ -105,8 +532,13 @@ def main(argv: Optional[list[str]] = None) -> int:
             overwrite=args.overwrite,
             set_properties=_parse_props(args.props),
             dry_run=args.dry_run,
+            stream=args.stream,
+            checksum_deploy=args.checksum_deploy,
+            **upload_opts,
         )
         print(json.dumps(summary, indent=2))
+        if args.metrics_openmetrics:
+            write_openmetrics(args.metrics_openmetrics, summary.get("timings") or {}, dest=args.dest)
         return 0
     except UploadError as e:
         # Mappa gli exit code su base HTTP status (se disponibile)
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import json
 import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, BinaryIO, Dict, FrozenSet, Sequence, Union
 from urllib.parse import quote
 
-import requests
 from requests import RequestException, Response
 
+from .metrics import bind, span
+from .progress import ProgressBody, ProgressCallback, rate_limiter
+from .transport import RetryPolicy, Transport
+from .utils import load_json_state, save_json_state
+
+LISTING_CACHE_SIZE = 1024
+LISTING_LOCK_STRIPES = 64
+
 
 class JFrogClient:
     """
@@ -15,6 +29,9 @@ class JFrogClient:
     - Bearer token (preferito) o API key
     - URL safe (percent-encoding dei segmenti)
     - Storage API per check di esistenza (robusta ai proxy)
+    - pool di connessioni condivisibile tra thread (batch upload)
+    - retry con backoff/jitter su errori di rete e 429/5xx transitori (vedi transport.py)
+    - avanzamento byte per byte dei PUT e limite di banda di processo (vedi progress.py)
     """
 
     def __init__(
@@ -26,13 +43,31 @@ class JFrogClient:
         connect_timeout: int = 10,
         read_timeout: int = 300,
         verbose: Optional[bool] = None,
+        pool_size: int = 10,
+        retry: Optional[RetryPolicy] = None,
+        progress: Optional[ProgressCallback] = None,
+        listing_ttl: float = 5.0,
     ) -> None:
         self.base_url = base_url.rstrip("/")
+        self.progress = progress  # eventi di avanzamento dei PUT (vedi progress.py)
+        # listing delle cartelle remote: cartella → (scadenza, nomi figli | None se assente);
+        # al più LISTING_CACHE_SIZE cartelle, così un worker di serve non cresce senza limite
+        self.listing_ttl = listing_ttl
+        self._listings: Dict[str, Tuple[float, Optional[FrozenSet[str]]]] = {}
+        self._listings_lock = threading.Lock()
+        # lock a strisce per cartella: numero fisso, qualunque numero di cartelle viste
+        self._listing_locks = [threading.Lock() for _ in range(LISTING_LOCK_STRIPES)]
         self.repo = repo
         self.connect_timeout = connect_timeout
         self.read_timeout = read_timeout
         self.verbose = bool(verbose or os.environ.get("JFROG_DEBUG"))
-        self.session = requests.Session()
+        # pool dimensionato sulla concorrenza: i worker del batch riusano le connessioni
+        self.transport = Transport(
+            pool_size=pool_size,
+            retry=retry,
+            on_retry=lambda **data: self._log("http-retry", **data),
+        )
+        self.session = self.transport.session
         if access_token:
             self.session.headers.update({"Authorization": f"Bearer {access_token}"})
         elif api_key:
@@ -42,8 +77,6 @@ class JFrogClient:
 
     def _log(self, event: str, **data) -> None:
         if self.verbose:
-            import json
-
             print(json.dumps({"event": event, **data}), flush=True)
 
     def _compose_url(self, remote_path: str, matrix_props: str = "") -> str:
@@ -72,20 +105,23 @@ class JFrogClient:
         Ritorna (status_code, json|None).
         """
         url = self._compose_storage_url(remote_path)
-        try:
-            r: Response = self.session.get(
-                url, timeout=(self.connect_timeout, self.read_timeout)
-            )
-            self._log("http-storage", url=url, status=r.status_code)
+        with span("stat") as sp:
+            try:
+                r: Response = self.transport.request(
+                    "GET", url, timeout=(self.connect_timeout, self.read_timeout)
+                )
+            except RequestException as e:
+                self._log("http-storage-error", url=url, error=str(e))
+                sp["status"] = 599
+                return 599, None  # pseudo-codice per errore di rete
+            sp["status"] = r.status_code
+            self._log("http-storage", url=url, status=r.status_code, elapsed_ms=_elapsed_ms(r))
             if r.headers.get("Content-Type", "").startswith("application/json"):
                 try:
                     return r.status_code, r.json()
                 except Exception:
                     return r.status_code, None
             return r.status_code, None
-        except RequestException as e:
-            self._log("http-storage-error", url=url, error=str(e))
-            return 599, None  # pseudo-codice per errore di rete
 
     def exists(self, remote_path: str) -> Optional[bool]:
         """
@@ -100,35 +136,287 @@ class JFrogClient:
             return False
         return None
 
+    def existing(self, remote_paths: Sequence[str]) -> Dict[str, Optional[bool]]:
+        """
+        Stato di più path remoti con il minimo di round trip: un solo listing (Storage API)
+        per cartella padre, riusato per 'listing_ttl' secondi dai job che condividono il client.
+        Cartella assente → tutti False. Listing indeterminato → stat concorrenti dei singoli path.
+        Ritorna {path: True | False | None (indeterminato)}.
+        """
+        by_folder: Dict[str, list[str]] = {}
+        for path in remote_paths:
+            parent = posixpath.dirname(path.strip("/"))
+            by_folder.setdefault(parent, []).append(path)
+
+        state: Dict[str, Optional[bool]] = {}
+        fallback: list[str] = []
+        for folder, paths in by_folder.items():
+            found, children = self._children(folder)
+            if not found:
+                fallback.extend(paths)
+                continue
+            for path in paths:
+                state[path] = children is not None and posixpath.basename(path.strip("/")) in children
+        if fallback:
+            with ThreadPoolExecutor(max_workers=min(8, len(fallback))) as pool:
+                state.update(zip(fallback, pool.map(bind(self.exists), fallback)))
+        return state
+
+    def _children(self, folder: str) -> Tuple[bool, Optional[FrozenSet[str]]]:
+        """(determinato?, nomi dei figli | None se la cartella non esiste), con cache a TTL."""
+        folder_lock = self._listing_locks[hash(folder) % len(self._listing_locks)]
+        with folder_lock:  # job concorrenti sulla stessa cartella: un solo listing in volo
+            with self._listings_lock:
+                cached = self._listings.get(folder)
+            if cached is not None and cached[0] > time.monotonic():
+                return True, cached[1]
+            status, data = self.stat(folder + "/")
+            if status == 404:
+                children = None
+            elif status == 200 and isinstance(data, dict) and "children" in data:
+                children = frozenset(
+                    str(c.get("uri", "")).strip("/") for c in data["children"] if isinstance(c, dict)
+                )
+            else:
+                return False, None
+            with self._listings_lock:
+                self._listings.pop(folder, None)  # in fondo: l'ordine è quello di scadenza
+                self._listings[folder] = (time.monotonic() + self.listing_ttl, children)
+                self._trim_listings()
+            return True, children
+
+    def _trim_listings(self) -> None:
+        """Scarta i listing scaduti, poi i più vecchi, oltre LISTING_CACHE_SIZE (con _listings_lock)."""
+        if len(self._listings) <= LISTING_CACHE_SIZE:
+            return
+        now = time.monotonic()
+        for folder in [f for f, (expires, _) in self._listings.items() if expires <= now]:
+            del self._listings[folder]
+        while len(self._listings) > LISTING_CACHE_SIZE:
+            del self._listings[next(iter(self._listings))]
+
+    def _remember_uploaded(self, remote_path: str) -> None:
+        """Aggiorna il listing in cache dopo un PUT riuscito (niente stato stale nel batch)."""
+        parts = remote_path.strip("/").split("/")
+        with self._listings_lock:
+            for i in range(len(parts)):  # anche le cartelle antenate ora hanno un figlio
+                folder = "/".join(parts[:i])
+                cached = self._listings.get(folder)
+                if cached is not None:
+                    self._listings[folder] = (cached[0], (cached[1] or frozenset()) | {parts[i]})
+
+    def get_json(self, remote_path: str) -> Tuple[int, Optional[Any]]:
+        """Scarica un file JSON del repo (es. manifest). Ritorna (status_code, json|None)."""
+        url = self._compose_url(remote_path)
+        try:
+            r = self.transport.request(
+                "GET", url, timeout=(self.connect_timeout, self.read_timeout)
+            )
+        except RequestException as e:
+            self._log("http-get-error", url=url, error=str(e))
+            return 599, None
+        self._log("http-get", url=url, status=r.status_code)
+        if r.status_code != 200:
+            return r.status_code, None
+        try:
+            return r.status_code, r.json()
+        except ValueError:
+            return r.status_code, None
+
     # --- API: upload --------------------------------------------------------
 
+    def deploy_by_checksum(
+        self,
+        remote_path: str,
+        sha1: str,
+        sha256: Optional[str] = None,
+        matrix_props: Optional[str] = None,
+    ) -> Tuple[int, str]:
+        """
+        Checksum deploy: PUT senza body con X-Checksum-Deploy.
+        201/200 → il server aveva già il contenuto (nessun byte inviato);
+        404 → contenuto sconosciuto, serve il PUT completo.
+        """
+        url = self._compose_url(remote_path, matrix_props or "")
+        headers = {
+            "X-Checksum-Deploy": "true",
+            "X-Checksum-Sha1": sha1,
+        }
+        if sha256:
+            headers["X-Checksum-Sha256"] = sha256
+        with span("put", checksum_deploy=True) as sp:
+            try:
+                r = self.transport.request(
+                    "PUT", url, headers=headers, timeout=(self.connect_timeout, self.read_timeout)
+                )
+            except RequestException as e:
+                self._log("http-checksum-deploy-error", url=url, error=str(e))
+                sp["status"] = 599
+                return 599, url
+            sp["status"] = r.status_code
+        if r.status_code < 300:
+            self._remember_uploaded(remote_path)
+        self._log("http-checksum-deploy", url=url, status=r.status_code, elapsed_ms=_elapsed_ms(r))
+        return r.status_code, url
+
     def put_file(
         self,
-        local_path: Path,
+        local_path: Union[Path, BinaryIO],
         remote_path: str,
         sha1: Optional[str] = None,
         sha256: Optional[str] = None,
         matrix_props: Optional[str] = None,
         overwrite: bool = True,
+        extra_headers: Optional[dict[str, str]] = None,
     ) -> Tuple[int, str]:
         url = self._compose_url(remote_path, matrix_props or "")
-        headers = {"Content-Type": "application/octet-stream"}
+        headers = {"Content-Type": "application/octet-stream", **(extra_headers or {})}
         if sha1:
             headers["X-Checksum-Sha1"] = sha1
         if sha256:
             headers["X-Checksum-Sha256"] = sha256
         # overwrite è gestito lato server; qui non forziamo nulla
-        with Path(local_path).open("rb") as f:
-            r = self.session.put(
-                url,
-                data=f,
-                headers=headers,
-                timeout=(self.connect_timeout, self.read_timeout),
-            )
+        # il transport riavvolge il body a ogni retry
+        with span("put") as sp:
+            if hasattr(local_path, "read"):
+                # file-like già aperto (es. zip in streaming): si riparte dall'inizio
+                sp["bytes"] = local_path.seek(0, io.SEEK_END)
+                local_path.seek(0)
+                r = self.transport.request(
+                    "PUT",
+                    url,
+                    data=self._body(local_path, remote_path),
+                    headers=headers,
+                    timeout=(self.connect_timeout, self.read_timeout),
+                )
+            else:
+                with Path(local_path).open("rb") as f:
+                    sp["bytes"] = os.fstat(f.fileno()).st_size
+                    r = self.transport.request(
+                        "PUT",
+                        url,
+                        data=self._body(f, remote_path),
+                        headers=headers,
+                        timeout=(self.connect_timeout, self.read_timeout),
+                    )
+            sp["status"] = r.status_code
+        if r.status_code < 300:
+            self._remember_uploaded(remote_path)
         self._log(
             "http-put",
             url=url,
             status=r.status_code,
+            elapsed_ms=_elapsed_ms(r),
             text=(r.text[:300] if hasattr(r, "text") else ""),
         )
         return r.status_code, url
+
+    def _body(self, raw: BinaryIO, remote_path: str) -> Union[BinaryIO, ProgressBody]:
+        """Avvolge il body solo se servono avanzamento o limite di banda."""
+        limiter = rate_limiter()
+        if self.progress is None and limiter is None:
+            return raw
+        return ProgressBody(raw, remote_path, self.progress, limiter)
+
+    def transport_stats(self) -> dict[str, int]:
+        """Contatori del pool: richieste, connessioni nuove/riusate, retry."""
+        return self.transport.stats()
+
+    # --- API: upload a parti (file molto grandi, ripristinabile) -----------
+
+    def put_file_chunked(
+        self,
+        local_path: Union[Path, BinaryIO],
+        remote_path: str,
+        size: int,
+        sha1: str,
+        sha256: str,
+        part_size: int = 64 * 1024 * 1024,
+        max_workers: int = 3,
+        state_path: Optional[Path] = None,
+        matrix_props: Optional[str] = None,
+    ) -> Tuple[int, str, int]:
+        """
+        Carica il file come parti numerate (<remote>.part-00001, ...) con concorrenza
+        limitata, poi il manifest <remote>.parts.json (dimensioni + checksum delle parti
+        e del file intero; ricomposizione = concatenazione in ordine).
+        Le parti confermate dal server sono registrate in 'state_path': rilanciando
+        con lo stesso stato si riparte dall'ultima parte confermata. A manifest caricato lo
+        stato riporta "manifest_url": l'artifact è completo.
+        Ritorna (status del manifest, url del manifest, byte del file inviati in questa
+        esecuzione: solo le parti, il manifest escluso).
+        """
+        part_size = max(1, int(part_size))
+        n_parts = max(1, -(-size // part_size))
+        state = (load_json_state(state_path) if state_path else None) or {}
+        if state.get("sha256") != sha256 or state.get("part_size") != part_size:
+            # altre chiavi (es. timestamp del chiamante) restano nello stato
+            state.update(sha256=sha256, part_size=part_size, parts={})
+        done: dict = state["parts"]
+        lock = threading.Lock()
+        body_lock = threading.Lock()
+
+        def _read_part(i: int) -> bytes:
+            offset = i * part_size
+            if hasattr(local_path, "read"):
+                with body_lock:  # file-like condiviso tra i worker
+                    local_path.seek(offset)
+                    return local_path.read(part_size)
+            with Path(local_path).open("rb") as f:
+                f.seek(offset)
+                return f.read(part_size)
+
+        def _put_part(i: int) -> Tuple[int, int]:
+            data = _read_part(i)
+            part_sha1 = hashlib.sha1(data).hexdigest()
+            code, url = self.put_file(
+                local_path=io.BytesIO(data),
+                remote_path=f"{remote_path}.part-{i + 1:05d}",
+                sha1=part_sha1,
+                sha256=hashlib.sha256(data).hexdigest(),
+                matrix_props=matrix_props,
+            )
+            if code < 300:
+                with lock:
+                    done[str(i)] = {"size": len(data), "sha1": part_sha1}
+                    if state_path:
+                        save_json_state(state_path, state)
+            return code, len(data)
+
+        todo = [i for i in range(n_parts) if str(i) not in done]
+        self._log("chunked-start", remote=remote_path, parts=n_parts, resume_from=n_parts - len(todo))
+        sent = 0
+        with ThreadPoolExecutor(max_workers=max(1, int(max_workers))) as pool:
+            for code, n in pool.map(bind(_put_part), todo):
+                sent += n
+                if code >= 300:
+                    return code, self._compose_url(remote_path, matrix_props or ""), sent
+
+        manifest = {
+            "name": Path(remote_path).name,
+            "size": size,
+            "sha1": sha1,
+            "sha256": sha256,
+            "part_size": part_size,
+            "parts": [
+                {"name": f"{Path(remote_path).name}.part-{i + 1:05d}", **done[str(i)]}
+                for i in range(n_parts)
+            ],
+        }
+        payload = json.dumps(manifest, indent=2).encode("utf-8")
+        code, url = self.put_file(
+            local_path=io.BytesIO(payload),
+            remote_path=f"{remote_path}.parts.json",
+            sha1=hashlib.sha1(payload).hexdigest(),
+            sha256=hashlib.sha256(payload).hexdigest(),
+            matrix_props=matrix_props,
+        )
+        if code < 300 and state_path:
+            state["manifest_url"] = url
+            save_json_state(state_path, state)
+        return code, url, sent
+
+
+def _elapsed_ms(r: Response) -> int:
+    """Tempo fino agli header di risposta (requests), per i log di debug."""
+    return int(r.elapsed.total_seconds() * 1000) if getattr(r, "elapsed", None) else 0
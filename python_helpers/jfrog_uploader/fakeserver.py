@@ -0,0 +1,350 @@
+"""
+Stand-in locale di Artifactory per benchmark e prove senza un'istanza JFrog.
+
+Implementa solo il sottoinsieme usato da JFrogClient:
+- GET  /artifactory/api/storage/<repo>/<path>  → info file (size/checksums) o listing cartella
+- GET  /artifactory/<repo>/<path>              → contenuto
+- PUT  /artifactory/<repo>/<path>[;k=v...]     → deploy con verifica X-Checksum-Sha1/Sha256,
+                                                 X-Checksum-Deploy, matrix params salvati come props
+
+Iniezione di condizioni di rete: latenza per richiesta, banda massima (sul body ricevuto e
+inviato) e percentuale di errori transitori (503 + Retry-After).
+
+    python -m jfrog_uploader.fakeserver --port 8081 --latency-ms 20 --bandwidth-mbps 100
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import unquote
+
+IO_CHUNK = 256 * 1024
+
+
+class _Stored:
+    __slots__ = ("data", "sha1", "sha256", "md5", "props", "created")
+
+    def __init__(self, data: bytes, props: Dict[str, str]) -> None:
+        self.data = data
+        self.sha1 = hashlib.sha1(data).hexdigest()
+        self.sha256 = hashlib.sha256(data).hexdigest()
+        self.md5 = hashlib.md5(data).hexdigest()
+        self.props = props
+        self.created = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+
+
+class FakeArtifactory:
+    """
+    Server HTTP in-process (thread daemon). Uso tipico:
+
+        with FakeArtifactory(latency=0.01, bandwidth=50e6) as srv:
+            upload_test_artifacts(..., jfrog={"base_url": srv.base_url, "access_token": "x"}, ...)
+
+    'bandwidth' in byte/s (None = illimitata), 'latency' in secondi,
+    'error_rate' in [0, 1]: frazione di richieste che ricevono 'error_status'.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = max(0.0, latency)
+        self.bandwidth = bandwidth if bandwidth and bandwidth > 0 else None
+        self.error_rate = min(1.0, max(0.0, error_rate))
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.store: Dict[Tuple[str, str], _Stored] = {}
+        self._by_sha1: Dict[str, _Stored] = {}
+        self.counters: Dict[str, int] = {}
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeArtifactory":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeArtifactory":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- stato -----------------------------------------------------------------
+
+    def count(self, key: str, received: int = 0, sent: int = 0) -> None:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            self.bytes_received += received
+            self.bytes_sent += sent
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": dict(self.counters),
+                "files": len(self.store),
+                "stored_bytes": sum(len(s.data) for s in self.store.values()),
+                "bytes_received": self.bytes_received,
+                "bytes_sent": self.bytes_sent,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.store.clear()
+            self._by_sha1.clear()
+            self.counters.clear()
+            self.bytes_received = self.bytes_sent = 0
+
+    def find_by_checksum(self, sha1: str, sha256: Optional[str]) -> Optional[bytes]:
+        with self._lock:
+            item = self._by_sha1.get(sha1)
+        if item is None or (sha256 and item.sha256 != sha256):
+            return None
+        return item.data
+
+    def put(self, repo: str, path: str, item: _Stored) -> bool:
+        """Salva l'item; True se sovrascrive un path esistente."""
+        with self._lock:
+            existed = (repo, path) in self.store
+            self.store[(repo, path)] = item
+            self._by_sha1[item.sha1] = item
+        return existed
+
+    def list_keys(self) -> list[Tuple[str, str]]:
+        with self._lock:
+            return list(self.store.keys())
+
+
+def _split_repo_path(raw: str) -> Tuple[str, str, Dict[str, str]]:
+    """'repo/a/b;k=v;k2=v2' → ('repo', 'a/b', {k: v, k2: v2})."""
+    path, *params = raw.split(";")
+    props: Dict[str, str] = {}
+    for p in params:
+        if "=" in p:
+            k, v = p.split("=", 1)
+            props[unquote(k)] = unquote(v)
+    repo, _, rest = unquote(path).lstrip("/").partition("/")
+    return repo, rest.strip("/"), props
+
+
+def _make_handler(srv: FakeArtifactory):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        # --- I/O con banda limitata ------------------------------------------
+
+        def _throttle(self, n: int) -> None:
+            if srv.bandwidth:
+                time.sleep(n / srv.bandwidth)
+
+        def _read_body(self) -> bytes:
+            chunks = []
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        break
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+                    self._throttle(size)
+            else:
+                remaining = int(self.headers.get("Content-Length") or 0)
+                while remaining > 0:
+                    chunk = self.rfile.read(min(IO_CHUNK, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    chunks.append(chunk)
+                    self._throttle(len(chunk))
+            return b"".join(chunks)
+
+        def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            for i in range(0, len(body), IO_CHUNK):
+                chunk = body[i : i + IO_CHUNK]
+                self.wfile.write(chunk)
+                self._throttle(len(chunk))
+
+        def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            self._send(status, json.dumps(payload).encode("utf-8"), headers)
+
+        def _error(self, status: int, message: str) -> None:
+            self._send_json(status, {"errors": [{"status": status, "message": message}]})
+
+        def _inject(self) -> bool:
+            """Latenza + errore transitorio simulato. True = risposta già inviata."""
+            if srv.latency:
+                time.sleep(srv.latency)
+            if srv.should_fail():
+                srv.count(f"{self.command}-error")
+                self._send_json(
+                    srv.error_status,
+                    {"errors": [{"status": srv.error_status, "message": "injected"}]},
+                    {"Retry-After": "0"},
+                )
+                return True
+            return False
+
+        # --- API -------------------------------------------------------------
+
+        def do_GET(self) -> None:
+            if self._inject():
+                return
+            raw = self.path.split("?", 1)[0]
+            if not raw.startswith("/artifactory/"):
+                return self._error(404, "Not Found")
+            raw = raw[len("/artifactory/") :]
+            if raw.startswith("api/storage/"):
+                return self._storage(raw[len("api/storage/") :])
+            repo, path, _ = _split_repo_path(raw)
+            item = srv.store.get((repo, path))
+            srv.count("GET", sent=len(item.data) if item else 0)
+            if item is None:
+                return self._error(404, "File not found.")
+            self._send(200, item.data, {"X-Checksum-Sha1": item.sha1, "X-Checksum-Sha256": item.sha256})
+
+        def _storage(self, raw: str) -> None:
+            srv.count("STAT")
+            repo, path, _ = _split_repo_path(raw)
+            uri = f"{srv.base_url}/artifactory/api/storage/{repo}/{path}"
+            item = srv.store.get((repo, path))
+            if item is not None:
+                return self._send_json(
+                    200,
+                    {
+                        "repo": repo,
+                        "path": f"/{path}",
+                        "created": item.created,
+                        "size": str(len(item.data)),
+                        "checksums": {"sha1": item.sha1, "sha256": item.sha256, "md5": item.md5},
+                        "uri": uri,
+                    },
+                )
+            prefix = f"{path}/" if path else ""
+            children = {}
+            for r, p in srv.list_keys():
+                if r == repo and p.startswith(prefix):
+                    head, sep, _ = p[len(prefix) :].partition("/")
+                    children[head] = bool(sep)
+            if not children and path:
+                return self._error(404, "Unable to find item")
+            self._send_json(
+                200,
+                {
+                    "repo": repo,
+                    "path": f"/{path}",
+                    "children": [{"uri": f"/{name}", "folder": folder} for name, folder in sorted(children.items())],
+                    "uri": uri,
+                },
+            )
+
+        def do_PUT(self) -> None:
+            checksum_deploy = self.headers.get("X-Checksum-Deploy", "").lower() == "true"
+            data = b"" if checksum_deploy else self._read_body()
+            if self._inject():
+                return
+            repo, path, props = _split_repo_path(self.path[len("/artifactory/") :])
+            sha1 = self.headers.get("X-Checksum-Sha1")
+            sha256 = self.headers.get("X-Checksum-Sha256")
+            if checksum_deploy:
+                srv.count("PUT-checksum")
+                found = srv.find_by_checksum(sha1 or "", sha256)
+                if found is None:
+                    return self._error(404, "Checksum deploy failed: no artifact with the given checksum")
+                data = found
+            else:
+                srv.count("PUT", received=len(data))
+            item = _Stored(data, props)
+            if sha1 and sha1 != item.sha1:
+                return self._error(409, f"Checksum mismatch: sha1 {sha1} != {item.sha1}")
+            if sha256 and sha256 != item.sha256:
+                return self._error(409, f"Checksum mismatch: sha256 {sha256} != {item.sha256}")
+            existed = srv.put(repo, path, item)
+            self._send_json(
+                200 if existed else 201,
+                {
+                    "repo": repo,
+                    "path": f"/{path}",
+                    "created": item.created,
+                    "downloadUri": f"{srv.base_url}/artifactory/{repo}/{path}",
+                    "size": str(len(data)),
+                    "checksums": {"sha1": item.sha1, "sha256": item.sha256, "md5": item.md5},
+                },
+            )
+
+    return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Local Artifactory stand-in (subset used by jfrog_uploader)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8081)
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    p.add_argument("--bandwidth-mbps", type=float, default=0.0, help="Body throughput cap in Mbit/s (0 = unlimited)")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    p.add_argument("--error-status", type=int, default=503)
+    p.add_argument("--seed", type=int, default=None)
+    args = p.parse_args(argv)
+
+    srv = FakeArtifactory(
+        host=args.host,
+        port=args.port,
+        latency=args.latency_ms / 1000.0,
+        bandwidth=args.bandwidth_mbps * 1e6 / 8 if args.bandwidth_mbps else None,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    print(f"Fake Artifactory listening on {srv.base_url}", flush=True)
+    try:
+        srv._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv._server.server_close()
+        print(json.dumps(srv.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
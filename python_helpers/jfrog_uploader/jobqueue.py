@@ -0,0 +1,493 @@
+"""
+Coda di upload persistente (SQLite): gli upload sopravvivono a Artifactory irraggiungibile
+e a processi interrotti a metà.
+
+    q = UploadQueue()
+    q.enqueue("out/report", "out/results.json", "ws/WS_1.21.0", repo="generic-local")
+    drain(q, jfrog)                       # oppure: python -m jfrog_uploader drain
+
+- enqueue fissa il timestamp della cartella remota: ogni tentativo scrive negli stessi path
+  (e l'upload a parti riprende dall'ultima parte confermata); con spool=True gli input
+  vengono copiati nella coda, così il job resta valido anche se il workspace viene pulito
+- drain esegue i job dovuti su un thread pool (un client per repo), li "affitta" con un
+  lease rinnovato finché l'upload è in corso: un processo morto li rilascia alla scadenza
+- un job è "done" solo quando l'upload è confermato dal server; errori transitori (rete,
+  5xx, 429) tornano "pending" con backoff esponenziale, gli altri diventano "failed"
+- le credenziali non vengono mai salvate: arrivano dalla configurazione di chi fa drain;
+  il job ricorda però il base_url, e un drain verso un altro Artifactory non lo prende
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+from .models import DrainSummary, JFrogConfig, QueuedJob
+from .utils import current_datetime, state_dir
+
+if TYPE_CHECKING:
+    from .client import JFrogClient
+    from .progress import ProgressCallback
+    from .uploader import UploadResult
+
+JOB_STATUSES = ("pending", "running", "done", "failed")
+
+# opzioni di upload_test_artifacts_safe salvabili nel job (tutte serializzabili in JSON)
+QUEUE_OPTIONS = (
+    "overwrite",
+    "upload_results",
+    "stream",
+    "checksum_deploy",
+    "chunk_threshold",
+    "part_size",
+    "part_workers",
+    "use_checksum_cache",
+    "use_archive_cache",
+    "explode",
+    "explode_workers",
+    "delta",
+)
+
+# exit code / stati HTTP transitori: il job resta in coda e viene ritentato
+_RETRY_EXIT_CODES = (40, 50)
+_RETRY_HTTP_STATUSES = (408, 429)
+
+
+def is_transient(exit_code: int, http_status: Optional[int]) -> bool:
+    """Errore di rete/5xx/429 (ritentabile) oppure definitivo (input, auth, 4xx)."""
+    return exit_code in _RETRY_EXIT_CODES or http_status in _RETRY_HTTP_STATUSES
+
+
+class UploadQueue:
+    """
+    Job di upload in SQLite (WAL, una connessione per thread): più processi possono
+    accodare e fare drain sulla stessa coda, il claim è atomico (BEGIN IMMEDIATE).
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, spool_dir: Optional[Path] = None) -> None:
+        self.db_path = Path(db_path) if db_path else state_dir("queue") / "jobs.sqlite"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.spool_dir = Path(spool_dir) if spool_dir else self.db_path.parent / "spool"
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, job TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt REAL NOT NULL DEFAULT 0, owner TEXT, lease_until REAL,"
+                " exit_code INTEGER, http_status INTEGER, error TEXT, summary TEXT,"
+                " spool TEXT, created REAL, updated REAL, base_url TEXT)"
+            )
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            if "base_url" not in columns:  # code create prima del base_url: job validi per ogni drain
+                try:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN base_url TEXT")
+                except sqlite3.OperationalError:
+                    pass  # aggiunta nel frattempo da un altro processo
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, next_attempt)")
+            self._local.conn = conn
+        return conn
+
+    # --- accodamento ------------------------------------------------------------
+
+    def enqueue(
+        self,
+        artifact_path: str,
+        results_json_path: str,
+        dest: str,
+        repo: str = "generic-local",
+        set_properties: Optional[Dict[str, str]] = None,
+        timestamp: Optional[str] = None,
+        spool: bool = False,
+        compression: Optional[Dict[str, Any]] = None,
+        base_url: Optional[str] = None,
+        **options: Any,
+    ) -> int:
+        """
+        Accoda un upload e ritorna l'id del job. 'options' sono le opzioni di
+        upload_test_artifacts_safe in QUEUE_OPTIONS; 'compression' è {"level", "format"}.
+        Con spool=True artifact e results JSON vengono copiati nella coda (rimossi a job
+        concluso con successo). Con 'base_url' solo un drain verso lo stesso Artifactory
+        esegue il job (None: qualunque drain).
+        """
+        unknown = set(options) - set(QUEUE_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unsupported queue options: {', '.join(sorted(unknown))}")
+        artifact = Path(artifact_path)
+        results = Path(results_json_path)
+        if not artifact.exists():
+            raise FileNotFoundError(f"Artifact path not found: {artifact}")
+        if not results.is_file():
+            raise FileNotFoundError(f"Results JSON file not found or invalid: {results}")
+        spooled: Optional[Path] = None
+        if spool:
+            spooled = self.spool_dir / uuid.uuid4().hex
+            try:
+                (spooled / "artifact").mkdir(parents=True)
+                (spooled / "results").mkdir()
+                target = spooled / "artifact" / artifact.name
+                if artifact.is_dir():
+                    shutil.copytree(artifact, target)
+                else:
+                    shutil.copy2(artifact, target)
+                artifact = target
+                results = Path(shutil.copy2(results, spooled / "results" / results.name))
+            except BaseException:
+                shutil.rmtree(spooled, ignore_errors=True)
+                raise
+        job = {
+            "artifact_path": str(artifact.resolve()),
+            "results_json_path": str(results.resolve()),
+            "dest": dest,
+            "repo": repo,
+            "props": dict(set_properties or {}),
+            "timestamp": timestamp or current_datetime(),
+            "options": options,
+        }
+        if compression:
+            job["compression"] = dict(compression)
+        base_url = _normalize_base_url(base_url)
+        if base_url:
+            job["base_url"] = base_url
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO jobs (job, next_attempt, spool, created, updated, base_url)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (json.dumps(job), now, str(spooled) if spooled else None, now, now, base_url),
+        )
+        return int(cur.lastrowid)
+
+    # --- lease --------------------------------------------------------------------
+
+    def claim(
+        self,
+        owner: str,
+        limit: int,
+        lease_seconds: float,
+        ids: Optional[Sequence[int]] = None,
+        base_url: Optional[str] = None,
+    ) -> List[QueuedJob]:
+        """
+        Prende in carico fino a 'limit' job dovuti: pending con next_attempt passato oppure
+        running con lease scaduto (processo morto). Incrementa attempts.
+        Con 'base_url' i job accodati per un altro Artifactory restano dove sono.
+        """
+        if limit <= 0:
+            return []
+        conn = self._conn()
+        now = time.time()
+        where = (
+            "((status='pending' AND next_attempt<=?) OR (status='running' AND lease_until<?))"
+        )
+        params: List[Any] = [now, now]
+        if ids is not None:
+            where += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params.extend(ids)
+        base_url = _normalize_base_url(base_url)
+        if base_url:
+            where += " AND (base_url IS NULL OR base_url=?)"
+            params.append(base_url)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE {where} ORDER BY next_attempt, id LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            claimed = [r["id"] for r in rows]
+            conn.executemany(
+                "UPDATE jobs SET status='running', owner=?, lease_until=?,"
+                " attempts=attempts+1, updated=? WHERE id=?",
+                [(owner, now + lease_seconds, now, i) for i in claimed],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [self.get(i) for i in claimed]
+
+    def heartbeat(self, owner: str, lease_seconds: float) -> None:
+        """Rinnova il lease di tutti i job in corso di 'owner'."""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET lease_until=? WHERE status='running' AND owner=?",
+            (now + lease_seconds, owner),
+        )
+
+    def complete(self, job_id: int, owner: str, summary: Dict[str, Any]) -> bool:
+        """Upload confermato: job "done", spool rimosso. False se il lease era stato perso."""
+        conn = self._conn()
+        row = conn.execute("SELECT spool FROM jobs WHERE id=?", (job_id,)).fetchone()
+        cur = conn.execute(
+            "UPDATE jobs SET status='done', summary=?, exit_code=0, http_status=0, error=NULL,"
+            " owner=NULL, lease_until=NULL, updated=? WHERE id=? AND owner=?",
+            (json.dumps(summary, default=str), time.time(), job_id, owner),
+        )
+        if cur.rowcount == 0:
+            return False
+        if row is not None and row["spool"]:
+            shutil.rmtree(row["spool"], ignore_errors=True)
+        return True
+
+    def release(
+        self,
+        job_id: int,
+        owner: str,
+        exit_code: int,
+        http_status: Optional[int],
+        error: Optional[str],
+        retry_at: Optional[float],
+    ) -> None:
+        """Tentativo fallito: di nuovo pending da 'retry_at', oppure failed se None."""
+        self._conn().execute(
+            "UPDATE jobs SET status=?, next_attempt=COALESCE(?, next_attempt), exit_code=?,"
+            " http_status=?, error=?, owner=NULL, lease_until=NULL, updated=?"
+            " WHERE id=? AND owner=?",
+            (
+                "pending" if retry_at is not None else "failed",
+                retry_at,
+                exit_code,
+                http_status,
+                error,
+                time.time(),
+                job_id,
+                owner,
+            ),
+        )
+
+    # --- ispezione / manutenzione ---------------------------------------------------
+
+    def get(self, job_id: int) -> QueuedJob:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id=?", (job_id,)).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return _row_to_job(row)
+
+    def jobs(self, status: Optional[str] = None) -> Iterator[QueuedJob]:
+        sql, params = "SELECT * FROM jobs", ()
+        if status is not None:
+            sql, params = sql + " WHERE status=?", (status,)
+        for row in self._conn().execute(sql + " ORDER BY id", params).fetchall():
+            yield _row_to_job(row)
+
+    def counts(self) -> Dict[str, int]:
+        out = {s: 0 for s in JOB_STATUSES}
+        for row in self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            out[row["status"]] = row["n"]
+        return out
+
+    def next_due(
+        self, ids: Optional[Sequence[int]] = None, base_url: Optional[str] = None
+    ) -> Optional[float]:
+        """Istante del prossimo job da tentare (pending o lease in scadenza); None se nessuno."""
+        sql = (
+            "SELECT MIN(CASE WHEN status='pending' THEN next_attempt ELSE lease_until END) AS t"
+            " FROM jobs WHERE status IN ('pending', 'running')"
+        )
+        params: tuple = ()
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids))})" if ids else " AND 0"
+            params = tuple(ids)
+        base_url = _normalize_base_url(base_url)
+        if base_url:
+            sql += " AND (base_url IS NULL OR base_url=?)"
+            params += (base_url,)
+        row = self._conn().execute(sql, params).fetchone()
+        return row["t"] if row and row["t"] is not None else None
+
+    def retry_failed(self) -> int:
+        """Rimette in coda i job falliti definitivamente (es. dopo aver corretto le credenziali)."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET status='pending', attempts=0, next_attempt=?, updated=?"
+            " WHERE status='failed'",
+            (time.time(), time.time()),
+        )
+        return cur.rowcount
+
+    def purge(self, statuses: Sequence[str] = ("done",), older_than: float = 0.0) -> int:
+        """Elimina i job negli stati indicati (e il loro spool) aggiornati da più di 'older_than' s."""
+        conn = self._conn()
+        cutoff = time.time() - older_than
+        marks = ",".join("?" * len(statuses))
+        where = f"status IN ({marks}) AND updated<=?"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(f"SELECT spool FROM jobs WHERE {where}", (*statuses, cutoff)).fetchall()
+            conn.execute(f"DELETE FROM jobs WHERE {where}", (*statuses, cutoff))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for row in rows:
+            if row["spool"]:
+                shutil.rmtree(row["spool"], ignore_errors=True)
+        return len(rows)
+
+
+def _normalize_base_url(base_url: Optional[str]) -> Optional[str]:
+    return (base_url or "").rstrip("/") or None
+
+
+def _row_to_job(row: sqlite3.Row) -> QueuedJob:
+    return {
+        "id": row["id"],
+        "status": row["status"],
+        "attempts": row["attempts"],
+        "next_attempt": row["next_attempt"],
+        "job": json.loads(row["job"]),
+        "exit_code": row["exit_code"],
+        "http_status": row["http_status"],
+        "error": row["error"],
+        "summary": json.loads(row["summary"]) if row["summary"] else None,
+    }
+
+
+# --- drain ---------------------------------------------------------------------------
+
+
+def backoff_delay(attempts: int, base: float = 30.0, cap: float = 900.0) -> float:
+    """Attesa prima del tentativo successivo: esponenziale con jitter (metà-intero)."""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def drain(
+    queue: UploadQueue,
+    jfrog: JFrogConfig,
+    workers: int = 4,
+    wait: bool = True,
+    ids: Optional[Sequence[int]] = None,
+    max_attempts: int = 50,
+    backoff_base: float = 30.0,
+    backoff_max: float = 900.0,
+    lease_seconds: float = 120.0,
+    poll_seconds: float = 1.0,
+    stop: Optional[threading.Event] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> DrainSummary:
+    """
+    Esegue i job della coda con al più 'workers' upload concorrenti.
+    wait=True → continua finché restano job pending (dormendo fino al prossimo retry);
+    wait=False → tenta solo i job già dovuti e ritorna. 'ids' limita il drain a quei job.
+    I job accodati con un base_url diverso da jfrog["base_url"] non vengono toccati.
+    'stop' (threading.Event) interrompe il drain: i job in corso vengono completati.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+    from concurrent.futures import wait as wait_futures
+
+    from .uploader import _client_from_config
+
+    workers = max(1, int(workers))
+    stop = stop or threading.Event()
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    clients: Dict[str, JFrogClient] = {}
+    seen: Dict[int, None] = {}
+    base_url = jfrog.get("base_url")
+    summary: DrainSummary = {"attempted": 0, "succeeded": 0, "retrying": 0, "failed": 0, "lost": 0}
+
+    def _client(repo: str) -> JFrogClient:
+        if repo not in clients:
+            clients[repo] = _client_from_config(jfrog, repo, pool_size=workers, progress=progress)
+        return clients[repo]
+
+    heartbeat_stop = threading.Event()
+
+    def _heartbeat() -> None:
+        while not heartbeat_stop.wait(lease_seconds / 3):
+            try:
+                queue.heartbeat(owner, lease_seconds)
+            except sqlite3.Error:
+                pass  # riprova al giro successivo; il lease è 3 volte l'intervallo
+
+    beat = threading.Thread(target=_heartbeat, name="jfrog-queue-heartbeat", daemon=True)
+    beat.start()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jfrog-drain") as pool:
+            running: Dict[Any, QueuedJob] = {}
+            while True:
+                if not stop.is_set():
+                    for job in queue.claim(owner, workers - len(running), lease_seconds, ids, base_url):
+                        client = _client(job["job"].get("repo") or "generic-local")
+                        running[pool.submit(_attempt, job, jfrog, client)] = job
+                        seen[job["id"]] = None
+                        summary["attempted"] += 1
+                if not running:
+                    due = None if stop.is_set() else queue.next_due(ids, base_url)
+                    if due is None or not wait:
+                        break
+                    stop.wait(min(max(0.0, due - time.time()), poll_seconds * 30) or poll_seconds)
+                    continue
+                done, _ = wait_futures(list(running), timeout=poll_seconds, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    job = running.pop(fut)
+                    outcome = _settle(queue, owner, job, fut.result(), max_attempts, backoff_base, backoff_max)
+                    summary[outcome] += 1
+    finally:
+        heartbeat_stop.set()
+        for client in clients.values():
+            client.session.close()
+
+    summary["jobs"] = [queue.get(i) for i in seen]
+    summary["queue"] = queue.counts()
+    return summary
+
+
+def _attempt(job: QueuedJob, jfrog: JFrogConfig, client: JFrogClient) -> UploadResult:
+    """Un tentativo di upload del job; i tentativi successivi al primo sovrascrivono."""
+    from .uploader import upload_test_artifacts_safe
+    from .utils import CompressionPolicy
+
+    spec = job["job"]
+    kwargs = dict(spec.get("options") or {})
+    # stesso timestamp a ogni tentativo: un retry dopo un upload parziale trova i propri file
+    if job["attempts"] > 1:
+        kwargs["overwrite"] = True
+    compression = spec.get("compression")
+    if compression:
+        kwargs["compression"] = CompressionPolicy(
+            level=int(compression.get("level", 6)), format=compression.get("format", "zip")
+        )
+    return upload_test_artifacts_safe(
+        artifact_path=spec["artifact_path"],
+        results_json_path=spec["results_json_path"],
+        dest=spec["dest"],
+        jfrog=jfrog,
+        repo=spec.get("repo") or "generic-local",
+        set_properties=spec.get("props") or {},
+        client=client,
+        timestamp=spec["timestamp"],
+        **kwargs,
+    )
+
+
+def _settle(
+    queue: UploadQueue,
+    owner: str,
+    job: QueuedJob,
+    result: UploadResult,
+    max_attempts: int,
+    backoff_base: float,
+    backoff_max: float,
+) -> str:
+    """Registra l'esito del tentativo; ritorna la voce di DrainSummary da incrementare."""
+    if result.ok:
+        # lease scaduto durante l'upload: il job è di un altro drain, che lo registrerà
+        return "succeeded" if queue.complete(job["id"], owner, result.summary or {}) else "lost"
+    retry_at = None
+    if is_transient(result.exit_code, result.http_status) and job["attempts"] < max_attempts:
+        retry_at = time.time() + backoff_delay(job["attempts"], backoff_base, backoff_max)
+    queue.release(job["id"], owner, result.exit_code, result.http_status, result.error, retry_at)
+    return "retrying" if retry_at is not None else "failed"
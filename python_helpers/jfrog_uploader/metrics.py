@@ -0,0 +1,201 @@
+"""
+Timing per fase dell'upload (validation, zip, hash, stat, put) e sink di metriche.
+
+Ogni chiamata di upload attiva un collettore (Metrics) nel contesto corrente; client e utils
+aprono span con metrics.span(...) senza conoscere il chiamante. Fuori da un upload gli span
+sono no-op. I sink registrati con register_metrics_sink ricevono ogni evento come dict:
+
+    {"event": "span", "phase": "put", "seconds": 0.12, "bytes": 1048576, "dest": "..."}
+    {"event": "upload", "dest": "...", "ok": true, "timings": {...}}
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .models import PhaseTiming
+
+MetricsSink = Callable[[Dict[str, Any]], None]
+
+_current: ContextVar[Optional["Metrics"]] = ContextVar("jfrog_uploader_metrics", default=None)
+_sinks: List[MetricsSink] = []
+_sinks_lock = threading.Lock()
+
+
+def register_metrics_sink(sink: MetricsSink) -> MetricsSink:
+    """Registra un sink globale (usabile anche come decoratore)."""
+    with _sinks_lock:
+        _sinks.append(sink)
+    return sink
+
+
+def unregister_metrics_sink(sink: MetricsSink) -> None:
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+
+def emit(event: Dict[str, Any]) -> None:
+    """Inoltra l'evento ai sink; un sink che fallisce non deve mai rompere l'upload."""
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink(event)
+        except Exception:
+            pass
+
+
+class Metrics:
+    """Collettore thread-safe degli span di una singola chiamata di upload."""
+
+    def __init__(self, **labels: Any) -> None:
+        self.labels = labels
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases: Dict[str, List[float]] = {}  # fase → [count, seconds, bytes]
+
+    def record(self, phase: str, seconds: float, nbytes: int = 0, **labels: Any) -> None:
+        with self._lock:
+            agg = self._phases.setdefault(phase, [0, 0.0, 0])
+            agg[0] += 1
+            agg[1] += seconds
+            agg[2] += nbytes
+        if _sinks:
+            emit(
+                {
+                    "event": "span",
+                    "phase": phase,
+                    "seconds": round(seconds, 6),
+                    "bytes": nbytes,
+                    **self.labels,
+                    **labels,
+                }
+            )
+
+    @contextmanager
+    def activate(self) -> Iterator["Metrics"]:
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def timings(self) -> Dict[str, PhaseTiming]:
+        with self._lock:
+            phases = {k: list(v) for k, v in self._phases.items()}
+        out = {k: _timing(int(c), s, int(b)) for k, (c, s, b) in phases.items()}
+        sent = phases.get("put", [0, 0.0, 0])[2]
+        out["total"] = _timing(1, time.perf_counter() - self.started, int(sent))
+        return out
+
+
+def _timing(count: int, seconds: float, nbytes: int) -> PhaseTiming:
+    return {
+        "count": count,
+        "seconds": round(seconds, 6),
+        "bytes": nbytes,
+        "mb_per_s": round(nbytes / seconds / (1024 * 1024), 3) if seconds > 0 and nbytes else 0.0,
+    }
+
+
+def current() -> Optional[Metrics]:
+    return _current.get()
+
+
+@contextmanager
+def span(phase: str, nbytes: int = 0, **labels: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Misura il blocco come una chiamata della fase 'phase' del collettore attivo.
+    Il dict restituito permette di aggiornare i byte a posteriori: sp["bytes"] = n.
+    """
+    metrics = _current.get()
+    data: Dict[str, Any] = {"bytes": nbytes, **labels}
+    if metrics is None:
+        yield data
+        return
+    t0 = time.perf_counter()
+    try:
+        yield data
+    finally:
+        n = data.pop("bytes")
+        metrics.record(phase, time.perf_counter() - t0, int(n or 0), **data)
+
+
+def bind(fn: Callable) -> Callable:
+    """
+    Propaga il contesto del chiamante (collettore attivo e altri ContextVar, es. il job
+    del worker 'serve') ai thread di un pool: i ContextVar non passano da soli.
+    """
+    ctx = copy_context()
+
+    def bound(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)  # una copia per chiamata: thread concorrenti
+
+    return bound
+
+
+def merge_timings(items: Iterable[Dict[str, PhaseTiming]]) -> Dict[str, PhaseTiming]:
+    """Somma le timings di più upload (batch)."""
+    acc: Dict[str, List[float]] = {}
+    for timings in items:
+        for phase, t in (timings or {}).items():
+            agg = acc.setdefault(phase, [0, 0.0, 0])
+            agg[0] += t.get("count", 0)
+            agg[1] += t.get("seconds", 0.0)
+            agg[2] += t.get("bytes", 0)
+    return {k: _timing(int(c), s, int(b)) for k, (c, s, b) in acc.items()}
+
+
+# --- Sink / export ---------------------------------------------------------------
+
+
+class JsonLinesSink:
+    """Appende ogni evento come riga JSON al file (thread-safe)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), **event}, sort_keys=True)
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def openmetrics_text(timings: Dict[str, PhaseTiming], **labels: Any) -> str:
+    """Timings in formato testo OpenMetrics (counter per fase: secondi, chiamate, byte)."""
+    families = (
+        ("jfrog_uploader_phase_seconds", "seconds", "Time spent per upload phase", "seconds"),
+        ("jfrog_uploader_phase_calls", "count", "Number of spans per upload phase", None),
+        ("jfrog_uploader_phase_bytes", "bytes", "Bytes processed per upload phase", "bytes"),
+    )
+    lines: List[str] = []
+    for name, key, help_text, unit in families:
+        lines.append(f"# TYPE {name} counter")
+        if unit:
+            lines.append(f"# UNIT {name} {unit}")
+        lines.append(f"# HELP {name} {help_text}.")
+        for phase, t in sorted(timings.items()):
+            lbl = ",".join(
+                f'{k}="{_escape_label(v)}"' for k, v in {**labels, "phase": phase}.items()
+            )
+            lines.append(f"{name}_total{{{lbl}}} {t.get(key, 0)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_openmetrics(path: str | Path, timings: Dict[str, PhaseTiming], **labels: Any) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(openmetrics_text(timings, **labels), encoding="utf-8")
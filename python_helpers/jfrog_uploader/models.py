@@ -1,4 +1,4 @@
-from typing import TypedDict, Optional, Dict
+from typing import TypedDict, Optional, Dict, List
 
 
 class JFrogConfig(TypedDict, total=False):
@@ -10,6 +10,7 @@ class JFrogConfig(TypedDict, total=False):
     project: Optional[
         str
     ]  # not required for basic uploads. might be useful in the future for project-scoped uploads
+    retries: Optional[int]  # retries on network errors / 429 / 5xx (default 4, 0 disables)
 
 
 class UploadSummary(TypedDict, total=False):
@@ -19,6 +20,110 @@ class UploadSummary(TypedDict, total=False):
 
     artifact_url: str
     results_url: str
+    artifact_folder_url: str  # explode mode only: remote folder holding the single files
+    chunked: bool  # artifact stored as <name>.part-NNNNN + <name>.parts.json; artifact_url is the manifest
     checksums: Dict[
         str, Dict[str, str]
     ]  # {"artifact": {"sha256": "...", "sha1": "..."}, "results": {...}}
+    stats: Dict[
+        str, "TransferStats"
+    ]  # {"artifact": {...}, "results": {...}, "files": {...} (explode)}, only after a real upload
+    transport: Dict[str, int]  # requests, new/reused connections, retries (client owned by the call)
+    archive: "ArchiveStats"  # only when a directory was archived by this call
+    timings: Dict[
+        str, "PhaseTiming"
+    ]  # {"validation", "zip", "hash", "stat", "put", "total"}: only the phases that ran
+
+
+class ArchiveStats(TypedDict, total=False):
+    """How a directory was archived: container, compression ratio (output/input) and wall time"""
+
+    format: str  # "zip" | "tar"
+    files: int
+    stored_files: int  # written as-is (already compressed or policy level 0)
+    deflated_files: int
+    input_bytes: int
+    output_bytes: int
+    ratio: float
+    seconds: float
+    cached: bool  # reused from the local archive cache (seconds refer to the original build)
+
+
+class PhaseTiming(TypedDict, total=False):
+    """Aggregated timing spans of one upload phase; seconds are summed over threads"""
+
+    count: int
+    seconds: float
+    bytes: int
+    mb_per_s: float  # bytes / seconds, 0 when the phase moves no data
+
+
+class TransferStats(TypedDict, total=False):
+    """Per-file transfer statistics; bytes_saved > 0 when the server already had the content (checksum deploy)"""
+
+    size: int
+    bytes_sent: int
+    bytes_saved: int
+    checksum_deploy: bool
+    reused_files: int  # delta mode: unchanged files referenced from the previous run
+
+
+class BatchJob(TypedDict, total=False):
+    """Single job of a batch upload (one entry of the --batch manifest).
+    'props' can be a dict or a "k=v,k2=v2" string; it is merged over the batch-level properties
+    """
+
+    artifact_path: str
+    results_json_path: str
+    dest: str
+    props: Dict[str, str]
+
+
+class BatchJobResult(TypedDict, total=False):
+    """Outcome of a single batch job: summary on success, error + exit_code on failure"""
+
+    index: int
+    artifact_path: str
+    ok: bool
+    exit_code: int
+    http_status: Optional[int]
+    summary: Optional[UploadSummary]
+    error: Optional[str]
+
+
+class BatchSummary(TypedDict, total=False):
+    """Single JSON document returned by the batch API and printed by the CLI in --batch mode"""
+
+    ok: bool
+    total: int
+    succeeded: int
+    failed: int
+    jobs: List[BatchJobResult]
+    transport: Dict[str, int]  # counters of the shared connection pool
+    timings: Dict[str, PhaseTiming]  # phase timings summed over the jobs that completed
+
+
+class QueuedJob(TypedDict, total=False):
+    """One row of the durable upload queue (jobqueue.UploadQueue)"""
+
+    id: int
+    status: str  # "pending" | "running" | "done" | "failed"
+    attempts: int
+    next_attempt: float  # epoch seconds; pending jobs are not retried before this
+    job: Dict[str, object]  # artifact_path, results_json_path, dest, repo, props, timestamp, options, base_url
+    exit_code: Optional[int]
+    http_status: Optional[int]
+    error: Optional[str]
+    summary: Optional[UploadSummary]  # set once the server confirmed the upload
+
+
+class DrainSummary(TypedDict, total=False):
+    """Outcome of one drain of the upload queue, printed by the 'drain' CLI command"""
+
+    attempted: int
+    succeeded: int
+    retrying: int  # failed with a transient error, back to pending with backoff
+    failed: int  # permanent error or attempts exhausted
+    lost: int  # uploaded, but the lease had expired and another drain owns the job now
+    jobs: List[QueuedJob]  # final state of every job attempted by this drain
+    queue: Dict[str, int]  # job count per status after the drain
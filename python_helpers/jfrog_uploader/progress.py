@@ -0,0 +1,173 @@
+"""
+Avanzamento a livello di byte e limite di banda per i body dei PUT.
+
+- ProgressBody: file-like di sola lettura attorno al body; conta i byte letti da requests,
+  li notifica a una callback (al più ogni 'interval' secondi + evento finale) e passa
+  per il token bucket di processo prima di consegnarli al socket.
+- TokenBucket condiviso da tutti gli upload concorrenti del processo: set_rate_limit()
+  oppure env JFROG_RATE_LIMIT_MBPS (Mbit/s).
+- stderr_progress: callback pronta che scrive gli eventi come JSON lines su stderr.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, Optional
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+PROGRESS_CHUNK = 64 * 1024
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe in byte/s. Chi consuma oltre i token disponibili va "in debito"
+    e dorme il tempo necessario a ripagarlo: richieste concorrenti si dividono la banda.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be > 0 bytes/s")
+        self.rate = float(rate)
+        # di default ~250 ms di banda, mai meno di un blocco di lettura
+        self.capacity = float(burst) if burst else max(self.rate / 4, PROGRESS_CHUNK)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def consume(self, n: int) -> float:
+        """Preleva n byte; ritorna i secondi di attesa applicati."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def _limiter_from_env() -> Optional[TokenBucket]:
+    try:
+        mbps = float(os.environ.get("JFROG_RATE_LIMIT_MBPS") or 0)
+    except ValueError:
+        return None
+    return TokenBucket(mbps * 1e6 / 8) if mbps > 0 else None
+
+
+_limiter: Optional[TokenBucket] = _limiter_from_env()
+
+
+def set_rate_limit(bytes_per_second: Optional[float], burst: Optional[float] = None) -> None:
+    """Imposta (o rimuove con None/0) il limite di banda condiviso da tutti i PUT del processo."""
+    global _limiter
+    _limiter = TokenBucket(bytes_per_second, burst) if bytes_per_second else None
+
+
+def rate_limiter() -> Optional[TokenBucket]:
+    return _limiter
+
+
+class ProgressBody:
+    """
+    Body in streaming per requests: stesso contratto di un file aperto (read/seek/tell,
+    lunghezza nota → Content-Length), più avanzamento e limite di banda.
+    Il transport riavvolge con seek() a ogni retry: il conteggio riparte da lì.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        name: str = "",
+        callback: Optional[ProgressCallback] = None,
+        limiter: Optional[TokenBucket] = None,
+        interval: float = 0.5,
+    ) -> None:
+        self._raw = raw
+        self._start = raw.tell()
+        self._end = raw.seek(0, io.SEEK_END)
+        raw.seek(self._start)
+        self.name = name
+        self.total = self._end - self._start
+        self.sent = 0
+        self._callback = callback
+        self._limiter = limiter
+        self._interval = interval
+        self._last_report = 0.0
+        self._done = False
+
+    # requests (super_len) calcola Content-Length come len(body) - body.tell()
+    def __len__(self) -> int:
+        return self._end
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self.read(PROGRESS_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        if data:
+            if self._limiter is not None:
+                self._limiter.consume(len(data))
+            self.sent += len(data)
+            self._report(self.sent >= self.total)
+        else:
+            self._report(True)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        pos = self._raw.seek(offset, whence)
+        self.sent = max(0, pos - self._start)
+        self._done = False
+        return pos
+
+    def tell(self) -> int:
+        return self._raw.tell()
+
+    def _report(self, done: bool) -> None:
+        if self._callback is None or self._done:
+            return
+        now = time.monotonic()
+        if not done and now - self._last_report < self._interval:
+            return
+        self._last_report = now
+        self._done = done
+        try:
+            self._callback(
+                {
+                    "event": "progress",
+                    "path": self.name,
+                    "bytes_sent": self.sent,
+                    "total": self.total,
+                    "done": done,
+                }
+            )
+        except Exception:
+            pass  # l'avanzamento non deve mai interrompere l'upload
+
+
+_stderr_lock = threading.Lock()
+
+
+def stderr_progress(event: Dict[str, Any]) -> None:
+    """Callback di avanzamento: una riga JSON per evento su stderr (es. per il server Node)."""
+    line = json.dumps(event, separators=(",", ":"))
+    with _stderr_lock:
+        sys.stderr.write(line + "\n")
+        sys.stderr.flush()
@@ -0,0 +1,373 @@
+"""
+Worker persistente: `python -m jfrog_uploader serve`.
+
+Un solo processo riceve job di upload come JSON lines (stdin oppure socket locale) e li
+esegue su un thread pool che condivide JFrogClient (sessione/connessioni calde), cache dei
+checksum e cache dei listing. Le risposte tornano come JSON lines sullo stesso canale:
+
+    → {"id": "1", "artifact_result": "...", "json_result": "...", "dest": "ws/WS_1.21.0"}
+    ← {"id": "1", "event": "accepted"}
+    ← {"id": "1", "event": "progress", "path": "...", "bytes_sent": 65536, "total": ..., "done": false}
+    ← {"id": "1", "event": "result", "ok": true, "exit_code": 0, "http_status": 0, "summary": {...}, "error": null}
+
+Operazioni: "upload" (default), "ping", "stats", "shutdown".
+
+Sicurezza dei socket (il worker carica qualunque file leggibile con il token JFrog):
+- socket Unix creato con permessi 0600 (solo l'utente del worker)
+- TCP (--port) e socket con token configurato: la prima riga di ogni connessione deve essere
+    → {"op": "auth", "token": "..."}      ← {"event": "authenticated"}
+  altrimenti la connessione viene chiusa. Il token è JFROG_SERVE_TOKEN oppure ne viene
+  generato uno, scritto in un file 0600 il cui path compare nell'evento "ready".
+Opzioni per job (facoltative): props, overwrite, dry_run, timestamp, upload_results, stream,
+checksum_deploy, chunk_threshold, part_size, part_workers, use_checksum_cache,
+use_archive_cache, explode, explode_workers, delta, compression {"level", "format"}, progress (bool).
+"""
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from . import __version__
+from .client import JFrogClient
+from .models import JFrogConfig
+from .uploader import SharedResults, _client_from_config, upload_test_artifacts_safe
+from .utils import CompressionPolicy, current_datetime, normalize_dest, state_dir
+
+# opzioni del job inoltrate così come sono a upload_test_artifacts_safe
+_JOB_OPTIONS = (
+    "overwrite",
+    "dry_run",
+    "timestamp",
+    "upload_results",
+    "stream",
+    "checksum_deploy",
+    "chunk_threshold",
+    "part_size",
+    "part_workers",
+    "use_checksum_cache",
+    "use_archive_cache",
+    "explode",
+    "explode_workers",
+    "delta",
+)
+
+Emit = Callable[[Dict[str, Any]], None]
+
+# job in esecuzione nel thread corrente (propagato ai pool interni da metrics.bind)
+_current_job: ContextVar[Optional["_Job"]] = ContextVar("jfrog_uploader_job", default=None)
+
+
+class _LineWriter:
+    """Scrive un evento per riga, serializzando i thread che condividono lo stream."""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        line = json.dumps(event, separators=(",", ":"), default=str)
+        with self._lock:
+            try:
+                self._stream.write(line + "\n")
+                self._stream.flush()
+            except (OSError, ValueError):
+                pass  # client disconnesso: il job prosegue comunque
+
+
+class _Job:
+    __slots__ = ("id", "emit", "progress")
+
+    def __init__(self, job_id: Any, emit: Emit, progress: bool) -> None:
+        self.id = job_id
+        self.emit = emit
+        self.progress = progress
+
+
+def _route_progress(event: Dict[str, Any]) -> None:
+    """Callback di avanzamento del client condiviso: inoltra al job che sta facendo il PUT."""
+    job = _current_job.get()
+    if job is not None and job.progress:
+        job.emit({"id": job.id, **event})
+
+
+class UploadWorker:
+    """
+    Esegue i job con una sessione HTTP condivisa. Thread-safe: più canali (connessioni al
+    socket) possono inviare job allo stesso worker.
+    """
+
+    def __init__(
+        self,
+        jfrog: JFrogConfig,
+        repo: str,
+        workers: int = 4,
+        client: Optional[JFrogClient] = None,
+    ) -> None:
+        self.jfrog = jfrog
+        self.repo = repo
+        self.workers = max(1, int(workers))
+        self.client = client or _client_from_config(
+            jfrog, repo, pool_size=self.workers, progress=_route_progress
+        )
+        # un client per repo (come drain), chiusi da close(); quello passato resta del chiamante
+        self._clients: Dict[str, JFrogClient] = {repo: self.client}
+        self._owned: List[JFrogClient] = [] if client is not None else [self.client]
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jfrog-job")
+        self._lock = threading.Lock()
+        self._counters = {"accepted": 0, "succeeded": 0, "failed": 0, "running": 0}
+        # dest → (timestamp, results JSON condivisi dai job in quella cartella)
+        self._folders: Dict[str, Tuple[str, Dict[str, SharedResults]]] = {}
+        self.stopping = threading.Event()
+
+    # --- protocollo ---------------------------------------------------------
+
+    def handle_line(self, line: str, emit: Emit) -> Optional[Future]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            emit({"event": "error", "error": f"Invalid request: {e}"})
+            return None
+
+        op = request.get("op", "upload")
+        job_id = request.get("id")
+        if op == "ping":
+            emit({"id": job_id, "event": "pong", "version": __version__, "pid": os.getpid()})
+        elif op == "stats":
+            emit({"id": job_id, "event": "stats", "jobs": self.stats(), "transport": self.client.transport_stats()})
+        elif op == "shutdown":
+            self.stopping.set()
+            emit({"id": job_id, "event": "shutdown"})
+        elif op == "upload":
+            return self.submit(request, emit)
+        else:
+            emit({"id": job_id, "event": "error", "error": f"Unknown op: {op}"})
+        return None
+
+    def submit(self, request: Dict[str, Any], emit: Emit) -> Future:
+        job = _Job(request.get("id"), emit, bool(request.get("progress")))
+        with self._lock:
+            self._counters["accepted"] += 1
+        emit({"id": job.id, "event": "accepted"})
+        return self._pool.submit(self._run, job, request)
+
+    def _folder_for(self, dest: str, results_json_path: str) -> Tuple[str, SharedResults]:
+        """
+        Timestamp della cartella remota per il job + results JSON condiviso.
+        Job sullo stesso dest nello stesso secondo finiscono nella stessa cartella (come nel
+        batch) e il results JSON viene caricato una volta sola, dal primo job riuscito.
+        """
+        key = normalize_dest(dest)
+        res = str(Path(results_json_path).resolve())
+        now = current_datetime()
+        with self._lock:
+            ts, shared = self._folders.get(key, ("", {}))
+            if ts != now:
+                ts, shared = now, {}
+                self._folders[key] = (ts, shared)
+            results = shared.setdefault(res, SharedResults())
+        return ts, results
+
+    def _run(self, job: _Job, request: Dict[str, Any]) -> None:
+        token = _current_job.set(job)
+        with self._lock:
+            self._counters["running"] += 1
+        try:
+            kwargs = {k: request[k] for k in _JOB_OPTIONS if k in request}
+            compression = request.get("compression")
+            if isinstance(compression, dict):
+                kwargs["compression"] = CompressionPolicy(
+                    level=int(compression.get("level", 6)),
+                    format=compression.get("format", "zip"),
+                )
+            props = request.get("props") or request.get("set_properties") or {}
+            if isinstance(props, str):
+                from .cli import _parse_props
+
+                props = _parse_props(props)
+            dest = request.get("dest") or ""
+            results_json_path = request.get("results_json_path") or request.get("json_result") or ""
+            if "timestamp" not in kwargs and dest and results_json_path:
+                kwargs["timestamp"], results = self._folder_for(dest, results_json_path)
+                if kwargs.get("upload_results", True):
+                    kwargs["upload_results"] = results
+            r = upload_test_artifacts_safe(
+                artifact_path=request.get("artifact_path") or request.get("artifact_result") or "",
+                results_json_path=results_json_path,
+                dest=dest,
+                jfrog=self.jfrog,
+                repo=request.get("repo") or self.repo,
+                set_properties=props,
+                client=self._client(request.get("repo") or self.repo),
+                **kwargs,
+            )
+            result = {
+                "ok": r.ok,
+                "exit_code": r.exit_code,
+                "http_status": r.http_status,
+                "summary": r.summary,
+                "error": r.error,
+            }
+        except Exception as e:  # richiesta malformata (tipi errati, ecc.)
+            result = {"ok": False, "exit_code": 2, "http_status": None, "summary": None, "error": str(e)}
+        finally:
+            _current_job.reset(token)
+        with self._lock:
+            self._counters["running"] -= 1
+            self._counters["succeeded" if result["ok"] else "failed"] += 1
+        job.emit({"id": job.id, "event": "result", **result})
+
+    def _client(self, repo: str) -> JFrogClient:
+        with self._lock:
+            client = self._clients.get(repo)
+            if client is None:
+                client = self._clients[repo] = _client_from_config(
+                    self.jfrog, repo, pool_size=self.workers, progress=_route_progress
+                )
+                self._owned.append(client)
+            return client
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def close(self, wait: bool = True) -> None:
+        """Ferma il pool; con wait=True chiude anche i client creati dal worker (job conclusi)."""
+        self._pool.shutdown(wait=wait)
+        if not wait:
+            return  # job ancora in corso: le sessioni servono fino alla fine
+        with self._lock:
+            owned, self._owned = self._owned, []
+        for client in owned:
+            client.session.close()
+
+
+# --- Canali -------------------------------------------------------------------------
+
+
+def serve_stdio(worker: UploadWorker, stdin: IO[str], stdout: IO[str]) -> int:
+    """Legge job da 'stdin' fino a EOF o "shutdown"; attende i job in corso prima di uscire."""
+    emit = _LineWriter(stdout)
+    emit({"event": "ready", "version": __version__, "pid": os.getpid(), "workers": worker.workers})
+    for line in stdin:
+        worker.handle_line(line, emit)
+        if worker.stopping.is_set():
+            break
+    worker.close(wait=True)
+    return 0
+
+
+def _authenticated(rfile, emit: Emit, token: str) -> bool:
+    """Handshake: la prima riga deve essere {"op": "auth", "token": <token>}."""
+    try:
+        request = json.loads(rfile.readline().decode("utf-8", errors="replace"))
+        given = request.get("token") if isinstance(request, dict) and request.get("op") == "auth" else None
+    except ValueError:
+        given = None
+    if not isinstance(given, str) or not hmac.compare_digest(given.encode(), token.encode()):
+        emit({"event": "error", "error": "Authentication required"})
+        return False
+    emit({"event": "authenticated"})
+    return True
+
+
+def _write_token_file(token: str, name: str) -> str:
+    """Scrive il token in un file leggibile solo dall'utente del worker; ritorna il path."""
+    path = state_dir("serve") / f"{name}.token"
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.chmod(path, 0o600)
+    return str(path)
+
+
+def serve_socket(
+    worker: UploadWorker,
+    path: Optional[str] = None,
+    port: Optional[int] = None,
+    token: Optional[str] = None,
+) -> int:
+    """
+    Serve lo stesso protocollo su un socket Unix ('path', permessi 0600) oppure TCP su
+    127.0.0.1 ('port', per Windows). Ogni connessione è un canale indipendente; "shutdown"
+    ferma il server. Su TCP il token è obbligatorio (generato se 'token' è None); sul socket
+    Unix viene richiesto solo se passato.
+    """
+    generated = path is None and not token
+    if generated:
+        token = secrets.token_urlsafe(32)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            emit = _LineWriter(_TextSocketWriter(self.wfile))
+            if token and not _authenticated(self.rfile, emit, token):
+                return
+            pending = []
+            for raw in self.rfile:
+                fut = worker.handle_line(raw.decode("utf-8", errors="replace"), emit)
+                if fut is not None:
+                    pending.append(fut)
+                if worker.stopping.is_set():
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    break
+            for fut in pending:  # i risultati vanno scritti prima di chiudere la connessione
+                fut.result()
+
+    if path is not None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("Unix sockets are not available on this platform; use --port")
+        if os.path.exists(path):
+            os.unlink(path)
+        old_umask = os.umask(0o177)  # il socket nasce già 0600: nessuna finestra aperta
+        try:
+            server: socketserver.BaseServer = socketserver.ThreadingUnixStreamServer(path, Handler)
+        finally:
+            os.umask(old_umask)
+        os.chmod(path, 0o600)
+        address = path
+    else:
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", port or 0), Handler)
+        address = "127.0.0.1:%d" % server.server_address[1]
+    server.daemon_threads = True
+    ready = {"event": "ready", "version": __version__, "pid": os.getpid(), "address": address}
+    if generated:  # file del token: il path è noto solo dopo il bind (porta 0 → effimera)
+        ready["token_file"] = _write_token_file(token, "port-%d" % server.server_address[1])
+    print(json.dumps(ready), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if path is not None and os.path.exists(path):
+            os.unlink(path)
+        if "token_file" in ready:
+            Path(ready["token_file"]).unlink(missing_ok=True)
+        worker.close(wait=True)
+    return 0
+
+
+class _TextSocketWriter:
+    """Adatta il wfile binario del socket all'interfaccia testo usata da _LineWriter."""
+
+    def __init__(self, wfile) -> None:
+        self._wfile = wfile
+
+    def write(self, s: str) -> None:
+        self._wfile.write(s.encode("utf-8"))
+
+    def flush(self) -> None:
+        self._wfile.flush()
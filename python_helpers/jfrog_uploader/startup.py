@@ -0,0 +1,156 @@
+"""
+Benchmark di avvio della CLI con budget di tempo (per la CI: exit code 1 se sforato).
+
+Per ogni scenario (--help, --dry-run su un file piccolo) misura il tempo di un processo
+nuovo al netto dell'interprete vuoto ("python -c pass"), poi rilancia con -X importtime
+e riporta i moduli più costosi e gli import che lo scenario non dovrebbe fare
+(es. requests per --help o per il dry-run).
+
+    python -m jfrog_uploader.startup
+    python -m jfrog_uploader.startup --runs 10 --help-budget-ms 40 --dry-run-budget-ms 120 --json startup.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# moduli che non devono comparire: il loro costo va pagato solo quando serve l'HTTP
+FORBIDDEN = {
+    "help": ("requests", "urllib3", "dotenv", "zoneinfo", "jfrog_uploader.uploader"),
+    "dry-run": ("requests", "urllib3"),
+}
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """Righe di -X importtime → [(modulo, self µs, cumulativo µs, profondità)]."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, raw_name = line[len("import time:") :].split("|")
+            depth = (len(raw_name) - len(raw_name.lstrip(" ")) - 1) // 2
+            out.append((raw_name.strip(), int(self_us), int(cum_us), depth))
+        except ValueError:
+            continue
+    return out
+
+
+def _run(cmd: Sequence[str], env: Dict[str, str], cwd: str) -> Tuple[float, subprocess.CompletedProcess]:
+    t0 = time.perf_counter()
+    proc = subprocess.run(list(cmd), env=env, cwd=cwd, capture_output=True, text=True)
+    return (time.perf_counter() - t0) * 1000.0, proc
+
+
+def _median_ms(cmd: Sequence[str], env: Dict[str, str], cwd: str, runs: int) -> Tuple[float, int]:
+    samples, code = [], 0
+    for _ in range(runs):
+        ms, proc = _run(cmd, env, cwd)
+        samples.append(ms)
+        code = code or proc.returncode
+    return statistics.median(samples), code
+
+
+def measure(
+    name: str,
+    args: Sequence[str],
+    env: Dict[str, str],
+    cwd: str,
+    runs: int,
+    baseline_ms: float,
+    budget_ms: Optional[float],
+    top: int,
+) -> dict:
+    cmd = [sys.executable, "-m", "jfrog_uploader", *args]
+    median, code = _median_ms(cmd, env, cwd, runs)
+    _, traced = _run([sys.executable, "-X", "importtime", *cmd[1:]], env, cwd)
+    imports = parse_importtime(traced.stderr)
+    loaded = {m for m, _, _, _ in imports}
+    forbidden = [m for m in FORBIDDEN.get(name, ()) if m in loaded]
+    heaviest = sorted((i for i in imports if i[3] == 0), key=lambda i: -i[2])[:top]
+    overhead = median - baseline_ms
+    return {
+        "scenario": name,
+        "exit_code": code,
+        "median_ms": round(median, 1),
+        "overhead_ms": round(overhead, 1),
+        "budget_ms": budget_ms,
+        "within_budget": budget_ms is None or overhead <= budget_ms,
+        "modules": len(loaded),
+        "import_ms": round(sum(i[2] for i in imports if i[3] == 0) / 1000.0, 1),
+        "forbidden_imports": forbidden,
+        "heaviest": [{"module": m, "cumulative_ms": round(c / 1000.0, 1)} for m, _, c, _ in heaviest],
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="jfrog_uploader CLI cold-start benchmark with a time budget")
+    p.add_argument("--runs", type=int, default=5, help="Process launches per scenario (median is reported)")
+    p.add_argument("--help-budget-ms", type=float, default=60.0, help="Max overhead of '--help' over a bare interpreter")
+    p.add_argument("--dry-run-budget-ms", type=float, default=150.0, help="Max overhead of a small '--dry-run'")
+    p.add_argument("--top", type=int, default=8, help="Heaviest top-level imports to report")
+    p.add_argument("--json", dest="json_out", default=None, help="Also write the report as JSON to this file")
+    args = p.parse_args(argv)
+
+    # il pacchetto deve essere importabile dai processi figli come da questo
+    package_root = str(Path(__file__).resolve().parent.parent)
+    with tempfile.TemporaryDirectory(prefix="jfrog_startup_") as tmp:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [package_root, env.get("PYTHONPATH")]))
+        env["JFROG_UPLOADER_HOME"] = os.path.join(tmp, "home")
+        artifact = Path(tmp, "report.txt")
+        artifact.write_text("PASS\n" * 100, encoding="utf-8")
+        results = Path(tmp, "results.json")
+        results.write_text("{}", encoding="utf-8")
+
+        baseline, _ = _median_ms([sys.executable, "-c", "pass"], env, tmp, args.runs)
+        rows = [
+            measure("help", ["--help"], env, tmp, args.runs, baseline, args.help_budget_ms, args.top),
+            measure(
+                "dry-run",
+                [
+                    "--dry-run",
+                    "--base-url=http://127.0.0.1:9",
+                    f"--artifact_result={artifact}",
+                    f"--json_result={results}",
+                    "--dest=startup/check",
+                ],
+                env,
+                tmp,
+                args.runs,
+                baseline,
+                args.dry_run_budget_ms,
+                args.top,
+            ),
+        ]
+
+    print(f"interpreter baseline: {baseline:.1f} ms (median of {args.runs})")
+    for r in rows:
+        status = "OK" if r["within_budget"] and not r["forbidden_imports"] and r["exit_code"] == 0 else "FAIL"
+        print(
+            f"{r['scenario']:<8} {status:<5} median {r['median_ms']:>7.1f} ms  "
+            f"overhead {r['overhead_ms']:>6.1f} ms (budget {r['budget_ms']:g})  "
+            f"{r['modules']} modules, {r['import_ms']:.1f} ms importing"
+        )
+        if r["forbidden_imports"]:
+            print(f"         unexpected imports: {', '.join(r['forbidden_imports'])}")
+        for h in r["heaviest"]:
+            print(f"         {h['cumulative_ms']:>7.1f} ms  {h['module']}")
+    if args.json_out:
+        Path(args.json_out).write_text(
+            json.dumps({"baseline_ms": round(baseline, 1), "results": rows}, indent=2), encoding="utf-8"
+        )
+    ok = all(r["within_budget"] and not r["forbidden_imports"] and r["exit_code"] == 0 for r in rows)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import requests
+from requests import RequestException, Response
+from requests.adapters import HTTPAdapter
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Politica di retry per le richieste idempotenti verso Artifactory (GET/PUT sullo stesso path):
+    - backoff esponenziale con jitter "full": sleep = random(0, min(max, base * 2^n))
+    - Retry-After del server rispettato (secondi o data HTTP), limitato a backoff_max
+    """
+
+    retries: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    statuses: tuple[int, ...] = (429, 502, 503, 504)
+
+    def delay(self, attempt: int, response: Optional[Response] = None) -> float:
+        retry_after = _retry_after_seconds(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2**attempt)))
+
+
+NO_RETRY = RetryPolicy(retries=0)
+
+
+def _retry_after_seconds(response: Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter che conta richieste e connessioni aperte dal pool:
+    reused = richieste - nuove connessioni.
+    """
+
+    def __init__(self, pool_size: int = 10) -> None:
+        super().__init__(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests_sent += 1
+        return super().send(request, **kwargs)
+
+    def new_connections(self) -> int:
+        pools = self.poolmanager.pools
+        return sum(pools[k].num_connections for k in list(pools.keys()))
+
+
+class Transport:
+    """
+    Sessione HTTP condivisa (pool dimensionato sulla concorrenza) + retry con backoff.
+    I body file-like vengono riavvolti alla posizione iniziale prima di ogni tentativo.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        retry: Optional[RetryPolicy] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        on_retry: Optional[Callable[..., None]] = None,
+    ) -> None:
+        self.retry = retry or RetryPolicy()
+        self.session = requests.Session()
+        self.adapter = PooledAdapter(pool_size)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self._sleep = sleep
+        self._on_retry = on_retry
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def request(self, method: str, url: str, data=None, **kwargs) -> Response:
+        start_pos = data.tell() if hasattr(data, "seek") else None
+        attempt = 0
+        while True:
+            if start_pos is not None:
+                data.seek(start_pos)
+            try:
+                r = self.session.request(method, url, data=data, **kwargs)
+            except RequestException as e:
+                if attempt >= self.retry.retries:
+                    raise
+                wait = self.retry.delay(attempt)
+                self._note_retry(method, url, attempt, wait, error=str(e))
+            else:
+                if r.status_code not in self.retry.statuses or attempt >= self.retry.retries:
+                    return r
+                wait = self.retry.delay(attempt, r)
+                r.close()
+                self._note_retry(method, url, attempt, wait, status=r.status_code)
+            self._sleep(wait)
+            attempt += 1
+
+    def _note_retry(self, method: str, url: str, attempt: int, wait: float, **data) -> None:
+        with self._lock:
+            self.retries += 1
+        if self._on_retry is not None:
+            self._on_retry(method=method, url=url, attempt=attempt + 1, wait=round(wait, 3), **data)
+
+    def stats(self) -> dict[str, int]:
+        sent = self.adapter.requests_sent
+        new = self.adapter.new_connections()
+        return {
+            "requests": sent,
+            "new_connections": new,
+            "reused_connections": max(0, sent - new),
+            "retries": self.retries,
+        }
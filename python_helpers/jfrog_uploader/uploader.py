@@ -1,22 +1,387 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import io
+import json
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
 from pathlib import Path
-from typing import Optional, Dict
+from typing import TYPE_CHECKING, Optional, Dict, List, Sequence, Tuple, Iterator, Union, BinaryIO
 from dataclasses import dataclass
 from typing import Optional
 from .models import UploadSummary
 
-from .models import UploadSummary, JFrogConfig
+from .models import (
+    UploadSummary,
+    JFrogConfig,
+    BatchJob,
+    BatchJobResult,
+    BatchSummary,
+    TransferStats,
+    ArchiveStats,
+)
 from .utils import (
-    ensure_zip,
-    sha1_of_file,
-    sha256_of_file,
+    build_archive,
+    remove_temp_zip,
+    zip_to_stream,
+    checksums_of_file,
+    checksums_of_files,
+    list_files,
     build_remote_folder_name,
     current_datetime,
     normalize_dest,
     as_matrix_properties,
+    state_dir,
+    ArchiveCache,
+    CachedArchive,
+    ChecksumCache,
+    archive_many,
+    default_archive_cache,
+    default_checksum_cache,
+    release_archive,
+    CompressionPolicy,
+    DEFAULT_COMPRESSION,
+    load_json_state,
+    save_json_state,
 )
-from .client import JFrogClient
+from .metrics import Metrics, bind, current, emit, merge_timings, span
+from .progress import ProgressCallback
+
+if TYPE_CHECKING:  # client/transport importano requests: caricati solo quando serve l'HTTP
+    from .client import JFrogClient
+
+
+EXPLODE_MODES = ("local", "server")
+
+
+class SharedResults:
+    """
+    Results JSON condiviso da più job nella stessa cartella remota (batch, worker 'serve'):
+    lo carica il primo job il cui artifact è andato a buon fine; se quel PUT fallisce ci
+    riprova il job successivo. Un job con l'artifact fallito non lo carica mai, quindi
+    basta un job riuscito perché il results JSON arrivi sul server.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.uploaded = False
+
+    @contextmanager
+    def claim(self) -> Iterator[bool]:
+        """True se tocca al chiamante caricarlo (deve poi impostare 'uploaded')."""
+        with self._lock:  # un PUT alla volta: gli altri job attendono l'esito
+            yield not self.uploaded
+
+
+@dataclass(frozen=True)
+class _ExplodedFile:
+    local: Path
+    rel: str
+    sums: Dict[str, str]
+
+
+def _manifest_payload(
+    name: str, files: List[_ExplodedFile], locations: Optional[Dict[str, str]] = None
+) -> bytes:
+    """
+    Manifest JSON deterministico dei file esplosi.
+    Con 'locations' (delta) ogni file riporta il path nel repo dove si trova il suo contenuto.
+    """
+    entries = []
+    for f in files:
+        entry = {"path": f.rel, "size": f.local.stat().st_size, **f.sums}
+        if locations is not None:
+            entry["location"] = locations[f.rel]
+        entries.append(entry)
+    manifest = {"name": name, "files": entries}
+    return json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+
+
+def _payload_sums(payload: bytes) -> Dict[str, str]:
+    return {
+        "sha1": hashlib.sha1(payload).hexdigest(),
+        "sha256": hashlib.sha256(payload).hexdigest(),
+    }
+
+
+def _exploded_manifest(
+    artifact_in: Path, use_cache: bool
+) -> Tuple[bytes, List[_ExplodedFile]]:
+    """Hash dei file della directory (process pool) + manifest JSON deterministico."""
+    listing = list_files(artifact_in)
+    sums = checksums_of_files([p for p, _ in listing], use_cache=use_cache)
+    files = [_ExplodedFile(p, rel, s) for (p, rel), s in zip(listing, sums)]
+    return _manifest_payload(artifact_in.name, files), files
+
+
+# --- Delta: manifest dell'ultimo upload per (dest, nome directory) ----------------
+
+
+def _delta_state_path(jfrog: JFrogConfig, repo: str, dest: str, name: str) -> Path:
+    key = hashlib.sha256(
+        "|".join([jfrog.get("base_url") or "", repo, normalize_dest(dest), name]).encode("utf-8")
+    ).hexdigest()
+    return state_dir("delta") / f"{key}.json"
+
+
+def _delta_remote_path(dest: str, name: str) -> str:
+    """Copia remota dell'ultimo manifest: <dest>_latest/<nome>.manifest.json."""
+    base = normalize_dest(build_remote_folder_name(dest, "")).rstrip("/")
+    return f"{base}_latest/{name}.manifest.json"
+
+
+def _previous_delta_files(
+    client: Optional[JFrogClient], state_path: Path, dest: str, name: str
+) -> Dict[str, dict]:
+    """
+    path relativo → voce del manifest precedente (stato locale, altrimenti copia remota;
+    senza 'client', come nel dry-run, solo lo stato locale).
+    """
+    manifest = load_json_state(state_path)
+    if manifest is None and client is not None:
+        status, remote = client.get_json(_delta_remote_path(dest, name))
+        manifest = remote if status == 200 and isinstance(remote, dict) else {}
+    return {
+        e["path"]: e
+        for e in (manifest or {}).get("files", [])
+        if isinstance(e, dict) and e.get("path") and e.get("location")
+    }
+
+
+@dataclass(frozen=True)
+class _PreparedArtifact:
+    body: Union[Path, BinaryIO]
+    name: str  # nome remoto
+    sums: Dict[str, str]
+    files: Optional[List[_ExplodedFile]] = None  # solo explode="local"
+    archive: Optional[ArchiveStats] = None  # solo se la directory è stata archiviata qui
+
+
+@contextmanager
+def _prepared_artifact(
+    artifact_in: Path,
+    stream: bool,
+    cache: Optional[ChecksumCache] = None,
+    explode: Optional[str] = None,
+    policy: Optional[CompressionPolicy] = None,
+    archive_cache: Optional[ArchiveCache] = None,
+    prebuilt: Optional[CachedArchive] = None,
+) -> Iterator[_PreparedArtifact]:
+    """
+    Prepara il corpo dell'artifact (body, nome remoto, checksum, ...).
+    dir + explode="local" → manifest JSON in memoria + elenco file da caricare uno a uno;
+    dir + stream → archivio in streaming; dir → archivio dalla cache (se attiva) oppure
+    temporaneo; file → file. 'prebuilt' (archivio già pronto, es. da utils.archive_many)
+    sostituisce la compressione e resta del chiamante.
+    Alla chiusura rimuove sempre i dati temporanei (gli archivi in cache restano).
+    """
+    policy = policy or DEFAULT_COMPRESSION
+    if explode == "local" and artifact_in.is_dir():
+        payload, files = _exploded_manifest(artifact_in, use_cache=cache is not None)
+        body = io.BytesIO(payload)
+        sums = {
+            "sha1": hashlib.sha1(payload).hexdigest(),
+            "sha256": hashlib.sha256(payload).hexdigest(),
+        }
+        try:
+            yield _PreparedArtifact(body, f"{artifact_in.name}.manifest.json", sums, files)
+        finally:
+            body.close()
+        return
+    if stream and artifact_in.is_dir():
+        body, sums, archive = zip_to_stream(artifact_in, policy=policy)
+        try:
+            yield _PreparedArtifact(
+                body, f"{artifact_in.name}{policy.suffix}", sums, archive=archive
+            )
+        finally:
+            body.close()
+        return
+    if artifact_in.is_file():
+        # la cache serve solo per file stabili: un archivio temporaneo è sempre nuovo
+        yield _PreparedArtifact(
+            artifact_in, artifact_in.name, checksums_of_file(artifact_in, cache=cache)
+        )
+        return
+    if prebuilt is not None and artifact_in.is_dir():
+        metrics = current()
+        if metrics is not None:  # compresso altrove (process pool): tempi dalle statistiche
+            stats = prebuilt.stats
+            metrics.record(
+                "zip",
+                0.0 if stats.get("cached") else stats.get("seconds", 0.0),
+                0 if stats.get("cached") else stats.get("input_bytes", 0),
+                cached=bool(stats.get("cached")),
+                pooled=True,
+            )
+        yield _PreparedArtifact(
+            prebuilt.path, prebuilt.path.name, prebuilt.checksums, archive=prebuilt.stats
+        )
+        return
+    if archive_cache is not None:
+        with archive_cache.use(artifact_in, policy) as cached:
+            yield _PreparedArtifact(
+                cached.path, cached.path.name, cached.checksums, archive=cached.stats
+            )
+        return
+    archive_path, archive = build_archive(artifact_in, policy)  # dir→archivio temporaneo
+    try:
+        yield _PreparedArtifact(
+            archive_path, archive_path.name, checksums_of_file(archive_path), archive=archive
+        )
+    finally:
+        remove_temp_zip(artifact_in, archive_path)
+
+
+def _body_size(body: Union[Path, BinaryIO]) -> int:
+    if hasattr(body, "read"):
+        body.seek(0, 2)
+        size = body.tell()
+        body.seek(0)
+        return size
+    return Path(body).stat().st_size
+
+
+@dataclass(frozen=True)
+class _ChunkPlan:
+    part_size: int
+    max_workers: int
+    state_path: Path
+
+
+def _chunk_plan(
+    jfrog: JFrogConfig,
+    repo: str,
+    dest: str,
+    artifact_name: str,
+    sha256: str,
+    part_size: int,
+    max_workers: int,
+) -> _ChunkPlan:
+    """Stato locale per-upload: stesso artifact + stessa destinazione → stesso file di stato."""
+    key = hashlib.sha256(
+        "|".join(
+            [jfrog.get("base_url") or "", repo, normalize_dest(dest), artifact_name, sha256]
+        ).encode("utf-8")
+    ).hexdigest()
+    return _ChunkPlan(part_size, max_workers, state_dir("chunks") / f"{key}.json")
+
+
+def _put_with_stats(
+    client: JFrogClient,
+    body: Union[Path, BinaryIO],
+    remote_path: str,
+    sums: Dict[str, str],
+    matrix_props: str,
+    checksum_deploy: bool,
+    chunked: Optional[_ChunkPlan] = None,
+    extra_headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, TransferStats]:
+    """
+    PUT di un file con statistiche di trasferimento.
+    Con checksum_deploy prova prima il deploy "solo checksum" e invia i byte
+    solo se il server non conosce il contenuto (404).
+    Con 'chunked' carica a parti (ripristinabile) e ritorna l'url del manifest.
+    """
+    size = _body_size(body)
+    if chunked is not None:
+        code, url, sent = client.put_file_chunked(
+            local_path=body,
+            remote_path=remote_path,
+            size=size,
+            sha1=sums["sha1"],
+            sha256=sums["sha256"],
+            part_size=chunked.part_size,
+            max_workers=chunked.max_workers,
+            state_path=chunked.state_path,
+            matrix_props=matrix_props,
+        )
+        return code, url, {
+            "size": size,
+            "bytes_sent": sent,
+            "bytes_saved": max(0, size - sent),
+            "checksum_deploy": False,
+        }
+    if checksum_deploy:
+        code, url = client.deploy_by_checksum(
+            remote_path, sums["sha1"], sums["sha256"], matrix_props=matrix_props
+        )
+        if code in (200, 201):
+            return code, url, {
+                "size": size,
+                "bytes_sent": 0,
+                "bytes_saved": size,
+                "checksum_deploy": True,
+            }
+    code, url = client.put_file(
+        local_path=body,
+        remote_path=remote_path,
+        sha1=sums["sha1"],
+        sha256=sums["sha256"],
+        matrix_props=matrix_props,
+        overwrite=True,  # il server gestisce l'overwrite; la policy è nel chiamante
+        extra_headers=extra_headers,
+    )
+    return code, url, {
+        "size": size,
+        "bytes_sent": size,
+        "bytes_saved": 0,
+        "checksum_deploy": False,
+    }
+
+
+def _deploy_exploded(
+    client: JFrogClient,
+    files: List[_ExplodedFile],
+    remote_dir: str,
+    matrix_props: str,
+    checksum_deploy: bool,
+    overwrite: bool,
+    workers: int,
+) -> TransferStats:
+    """PUT paralleli dei singoli file sotto 'remote_dir' (stesse matrix props); stats aggregate."""
+    if not files:
+        return {"size": 0, "bytes_sent": 0, "bytes_saved": 0, "checksum_deploy": False}
+
+    def _one(f: _ExplodedFile) -> TransferStats:
+        code, url, stats = _put_with_stats(
+            client, f.local, f"{remote_dir}{f.rel}", f.sums, matrix_props, checksum_deploy
+        )
+        if code >= 300 or (code == 200 and not overwrite):
+            raise UploadError(f"File upload failed ({code}) → {url}", status=code)
+        return stats
+
+    total: TransferStats = {"size": 0, "bytes_sent": 0, "bytes_saved": 0, "checksum_deploy": False}
+    from concurrent.futures import ThreadPoolExecutor  # differito: costa ~10 ms all'avvio
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for stats in pool.map(bind(_one), files):
+            for k in ("size", "bytes_sent", "bytes_saved"):
+                total[k] += stats[k]
+            total["checksum_deploy"] = total["checksum_deploy"] or stats["checksum_deploy"]
+    return total
+
+
+def _client_from_config(
+    jfrog: JFrogConfig,
+    repo: str,
+    pool_size: int = 10,
+    progress: Optional[ProgressCallback] = None,
+) -> JFrogClient:
+    from .client import JFrogClient
+    from .transport import RetryPolicy
+
+    retries = jfrog.get("retries")
+    return JFrogClient(
+        base_url=(jfrog.get("base_url") or "").rstrip("/"),
+        repo=repo,
+        access_token=jfrog.get("access_token"),
+        api_key=jfrog.get("api_key"),
+        pool_size=pool_size,
+        retry=RetryPolicy(retries=retries) if retries is not None else None,
+        progress=progress,
+    )
 
 
 class UploadError(RuntimeError):
@@ -25,6 +390,30 @@ class UploadError(RuntimeError):
         self.status = status
 
 
+def _instrumented(fn):
+    """
+    Attiva un collettore di span per la durata dell'upload, allega summary["timings"]
+    e notifica ai sink un evento "upload" finale (anche in caso di errore).
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs) -> UploadSummary:
+        dest = kwargs["dest"] if "dest" in kwargs else (args[2] if len(args) > 2 else "")
+        metrics = Metrics(dest=dest)
+        with metrics.activate():
+            try:
+                summary = fn(*args, **kwargs)
+            except BaseException as e:
+                emit({"event": "upload", "dest": dest, "ok": False, "error": str(e), "timings": metrics.timings()})
+                raise
+        summary["timings"] = metrics.timings()
+        emit({"event": "upload", "dest": dest, "ok": True, "timings": summary["timings"]})
+        return summary
+
+    return wrapper
+
+
+@_instrumented
 def upload_test_artifacts(
     artifact_path: str,
     results_json_path: str,
@@ -34,6 +423,22 @@ def upload_test_artifacts(
     overwrite: bool = False,
     set_properties: Optional[Dict[str, str]] = None,
     dry_run: bool = False,
+    client: Optional[JFrogClient] = None,
+    timestamp: Optional[str] = None,
+    upload_results: Union[bool, SharedResults] = True,
+    stream: bool = False,
+    checksum_deploy: bool = False,
+    chunk_threshold: Optional[int] = None,
+    part_size: int = 64 * 1024 * 1024,
+    part_workers: int = 3,
+    use_checksum_cache: bool = True,
+    use_archive_cache: bool = True,
+    explode: Optional[str] = None,
+    explode_workers: int = 8,
+    compression: Optional[CompressionPolicy] = None,
+    delta: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    archive: Optional[CachedArchive] = None,
 ) -> UploadSummary:
     """
     Flusso:
@@ -44,124 +449,284 @@ def upload_test_artifacts(
       5) (reale) verifica esistenza via Storage API (no HEAD fragile)
       6) PUT artifact e JSON
       7) ritorna il riepilogo
+
+    'client', 'timestamp' e 'upload_results' servono al batch: sessione condivisa,
+    stessa cartella remota per job con lo stesso dest, results JSON caricato una volta sola
+    (upload_results=SharedResults condiviso: lo carica il primo job con l'artifact riuscito).
+    'stream' zippa una directory in memoria (spool su disco solo se grande) calcolando
+    i checksum durante la compressione: nessuno zip temporaneo da rileggere.
+    'checksum_deploy' prova il deploy per checksum prima di inviare i byte
+    (summary["stats"] riporta bytes_sent / bytes_saved per file).
+    'chunk_threshold' (byte): artifact più grandi vengono caricati a parti da 'part_size'
+    con 'part_workers' PUT concorrenti; l'avanzamento è salvato in locale e un nuovo
+    tentativo sullo stesso artifact/dest riprende dall'ultima parte confermata
+    (stessa cartella remota). Disattivato di default perché cambia il contratto verso chi
+    scarica: sul server restano le parti <nome>.part-NNNNN (Artifactory non le ricompone)
+    e artifact_url punta al manifest <nome>.parts.json, da cui ricomporre il file
+    concatenando le parti in ordine (summary["chunked"] = True). Un nuovo tentativo dopo
+    che il manifest è già stato caricato (es. fallito il results JSON) non ricarica l'artifact.
+    'use_checksum_cache' riusa i digest già calcolati per file non modificati
+    (cache SQLite locale, vedi utils.ChecksumCache).
+    'use_archive_cache' riusa l'archivio di una directory non modificata (stessi path, size
+    e mtime) già creato da un tentativo o upload precedente, anche verso un altro repo:
+    niente ricompressione né hash (utils.ArchiveCache, limite JFROG_ARCHIVE_CACHE_MB).
+    'explode' (solo directory): "local" → hash dei file su process pool, PUT paralleli
+    ('explode_workers') sotto <cartella>/<nome dir>/ e manifest <nome>.manifest.json caricato
+    per ultimo (artifact_url); "server" → zip caricato con X-Explode-Archive ed esploso
+    da Artifactory in <cartella>/<nome dir>/.
+    'compression' (utils.CompressionPolicy) sceglie contenitore e livello per file;
+    summary["archive"] riporta rapporto di compressione e tempi.
+    'delta' (implica explode="local"): carica solo i file nuovi o modificati rispetto
+    all'ultimo upload della stessa directory verso lo stesso dest; il manifest indica per
+    ogni file la 'location' nel repo (quelli invariati puntano al run precedente). Il dry-run
+    confronta solo con lo stato locale, senza leggere la copia remota <dest>_latest.
+    'progress' riceve eventi {"event": "progress", "path", "bytes_sent", "total", "done"}
+    durante ogni PUT (con un 'client' esterno vale la sua callback); il limite di banda
+    condiviso si imposta con progress.set_rate_limit() o JFROG_RATE_LIMIT_MBPS.
+    'archive' (utils.CachedArchive, es. da utils.archive_many) è l'archivio già pronto
+    della directory 'artifact_path': niente compressione né hash qui; resta del chiamante.
+    summary["timings"] riporta per fase (validation, zip, hash, stat, put, total) numero di
+    span, secondi, byte e MB/s; gli span vanno anche ai sink di metrics.register_metrics_sink.
     """
     # --- input ---
-    artifact_in = Path(artifact_path)
-    results_in = Path(results_json_path)
-    if not artifact_in.exists():
-        raise FileNotFoundError(f"Artifact path not found: {artifact_in}")
-    if not results_in.exists() or results_in.suffix.lower() != ".json":
-        raise FileNotFoundError(f"Results JSON file not found or invalid: {results_in}")
+    with span("validation"):
+        artifact_in = Path(artifact_path)
+        results_in = Path(results_json_path)
+        if not artifact_in.exists():
+            raise FileNotFoundError(f"Artifact path not found: {artifact_in}")
+        if not results_in.exists() or results_in.suffix.lower() != ".json":
+            raise FileNotFoundError(f"Results JSON file not found or invalid: {results_in}")
 
-    zip_or_file = ensure_zip(artifact_in)  # dir→zip, file→file
+    # --- zip + checksum (una sola lettura per file; temporanei rimossi all'uscita) ---
+    cache = default_checksum_cache() if use_checksum_cache else None
+    if explode is not None and explode not in EXPLODE_MODES:
+        raise ValueError(f"Invalid explode mode: {explode} (expected one of {EXPLODE_MODES})")
+    if delta:
+        explode = "local"
+    if not artifact_in.is_dir():
+        explode = None  # un file singolo non ha nulla da esplodere
+    archive_cache = default_archive_cache() if use_archive_cache else None
+    with ExitStack() as stack:
+        prepared = stack.enter_context(
+            _prepared_artifact(artifact_in, stream, cache, explode, compression, archive_cache, archive)
+        )
+        artifact_body, artifact_name, a_sums = prepared.body, prepared.name, prepared.sums
+        exploded_files = prepared.files
+        r_sums = checksums_of_file(results_in, cache=cache)
+        a_sha1, a_sha256 = a_sums["sha1"], a_sums["sha256"]
+        r_sha1, r_sha256 = r_sums["sha1"], r_sums["sha256"]
 
-    # --- checksum ---
-    a_sha1 = sha1_of_file(zip_or_file)
-    a_sha256 = sha256_of_file(zip_or_file)
-    r_sha1 = sha1_of_file(results_in)
-    r_sha256 = sha256_of_file(results_in)
+        # --- upload a parti: riprende cartella remota e parti di un tentativo precedente ---
+        chunked: Optional[_ChunkPlan] = None
+        chunk_state: dict = {}
+        if (
+            explode is None
+            and chunk_threshold is not None
+            and _body_size(artifact_body) > chunk_threshold
+        ):
+            chunked = _chunk_plan(
+                jfrog, repo, dest, artifact_name, a_sums["sha256"], part_size, part_workers
+            )
+            chunk_state = load_json_state(chunked.state_path) or {}
 
-    # --- percorso remoto ---
-    ts = current_datetime()  # YYYYMMDDHHMMSS
+        # --- percorso remoto ---
+        ts = timestamp or chunk_state.get("timestamp") or current_datetime()  # YYYYMMDDHHMMSS
 
-    remote_folder = build_remote_folder_name(
-        dest, ts, as_folder=False
-    )  # es. .../WS_1.21.0_<ts>/
+        remote_folder = build_remote_folder_name(
+            dest, ts, as_folder=False
+        )  # es. .../WS_1.21.0_<ts>/
 
-    remote_folder = normalize_dest(remote_folder)
+        remote_folder = normalize_dest(remote_folder)
 
-    if not remote_folder.endswith("/"):
-        remote_folder += "/"
+        if not remote_folder.endswith("/"):
+            remote_folder += "/"
 
-    artifact_remote_path = f"{remote_folder}{zip_or_file.name}"
-    results_remote_path = f"{remote_folder}{results_in.name}"
+        artifact_remote_path = f"{remote_folder}{artifact_name}"
+        results_remote_path = f"{remote_folder}{results_in.name}"
+        # cartella remota dei file esplosi (locale: file uno a uno; server: zip esploso lì)
+        exploded_dir = f"{remote_folder}{artifact_in.name}/"
+        if explode == "server":
+            artifact_remote_path = f"{exploded_dir}{artifact_name}"
 
-    # --- client ---
-    base_url = (jfrog.get("base_url") or "").rstrip("/")
-    if not base_url:
-        raise ValueError("jfrog.base_url is required")
+        # --- client ---
+        base_url = (jfrog.get("base_url") or "").rstrip("/")
+        if not base_url:
+            raise ValueError("jfrog.base_url is required")
 
-    client = JFrogClient(
-        base_url=base_url,
-        repo=repo,
-        access_token=jfrog.get("access_token"),
-        api_key=jfrog.get("api_key"),
-    )
-
-    # --- props ---
-    matrix_props = as_matrix_properties(set_properties)
+        own_client = client is None
+        if client is None and not dry_run:  # il dry-run non apre connessioni
+            client = _client_from_config(jfrog, repo, progress=progress)
+            stack.callback(client.session.close)  # pool keep-alive nostro: chiuso all'uscita
 
-    # --- dry-run ---
-    artifact_url = (
-        f"{base_url}/artifactory/{repo}/{remote_folder}{zip_or_file.name}{matrix_props}"
-    )
-    results_url = (
-        f"{base_url}/artifactory/{repo}/{remote_folder}{results_in.name}{matrix_props}"
-    )
-    summary: UploadSummary = {
-        "artifact_url": artifact_url,
-        "results_url": results_url,
-        "checksums": {
-            "artifact": {"sha256": a_sha256, "sha1": a_sha1},
-            "results": {"sha256": r_sha256, "sha1": r_sha1},
-        },
-    }
-    if dry_run:
-        return summary
+        # --- props ---
+        matrix_props = as_matrix_properties(set_properties)
 
-    # --- check di esistenza ROBUSTO (senza HEAD) ---
-    if not overwrite:
-        # Se il file esiste → blocca. Se non esiste → ok. Se indeterminato → fall-back.
-        exists_art = client.exists(artifact_remote_path)
-        if exists_art is True:
-            raise UploadError(
-                f"Remote artifact exists: {artifact_remote_path}. Use --overwrite to replace.",
-                status=409,
-            )
-        exists_res = client.exists(results_remote_path)
-        if exists_res is True:
-            raise UploadError(
-                f"Remote results JSON exists: {results_remote_path}. Use --overwrite to replace.",
-                status=409,
+        # --- delta: i file invariati restano dove li ha messi l'upload precedente ---
+        upload_files = exploded_files
+        reused: List[_ExplodedFile] = []
+        delta_state: Optional[Path] = None
+        if delta and exploded_files is not None:
+            delta_state = _delta_state_path(jfrog, repo, dest, artifact_in.name)
+            previous = _previous_delta_files(
+                None if dry_run else client, delta_state, dest, artifact_in.name
             )
-        # Se uno dei due è indeterminato (None), tentiamo un fall-back: list del folder
-        if exists_art is None or exists_res is None:
-            stat_folder = client.stat(remote_folder)[0]
-            # Se la cartella esiste ma non riusciamo a determinare i file, lasciamo decidere al PUT
-            # (Artifactory restituirà 201 se nuovo, 200 se overwrite; noi NON intendiamo overwritare)
-            # quindi un 200 alla PUT lo tratteremo come errore di policy quando overwrite=False.
-            pass
-
-    # --- upload artifact ---
-    code_art, url_art = client.put_file(
-        local_path=zip_or_file,
-        remote_path=artifact_remote_path,
-        sha1=a_sha1,
-        sha256=a_sha256,
-        matrix_props=matrix_props,
-        overwrite=True,  # il server gestisce l'overwrite; la policy è sopra
-    )
-    # Policy: se overwrite=False e il server risponde 200 (sovrascrittura), consideralo errore.
-    if code_art >= 300 or (code_art == 200 and not overwrite):
-        raise UploadError(
-            f"Artifact upload failed ({code_art}) → {url_art}", status=code_art
+            locations: Dict[str, str] = {}
+            upload_files = []
+            for f in exploded_files:
+                prev = previous.get(f.rel)
+                if prev is not None and prev.get("sha256") == f.sums["sha256"]:
+                    locations[f.rel] = prev["location"]
+                    reused.append(f)
+                else:
+                    locations[f.rel] = f"{exploded_dir}{f.rel}"
+                    upload_files.append(f)
+            payload = _manifest_payload(artifact_in.name, exploded_files, locations)
+            artifact_body, a_sums = io.BytesIO(payload), _payload_sums(payload)
+            a_sha1, a_sha256 = a_sums["sha1"], a_sums["sha256"]
+
+        # --- dry-run ---
+        artifact_remote_name = f"{artifact_name}.parts.json" if chunked else artifact_name
+        if explode == "server":
+            artifact_remote_name = exploded_dir[len(remote_folder):]
+        artifact_url = (
+            f"{base_url}/artifactory/{repo}/{remote_folder}{artifact_remote_name}{matrix_props}"
+        )
+        results_url = (
+            f"{base_url}/artifactory/{repo}/{remote_folder}{results_in.name}{matrix_props}"
         )
+        summary: UploadSummary = {
+            "artifact_url": artifact_url,
+            "results_url": results_url,
+            "checksums": {
+                "artifact": {"sha256": a_sha256, "sha1": a_sha1},
+                "results": {"sha256": r_sha256, "sha1": r_sha1},
+            },
+        }
+        if prepared.archive is not None:
+            summary["archive"] = prepared.archive
+        if chunked is not None:
+            summary["chunked"] = True
+        if explode is not None:
+            summary["artifact_folder_url"] = (
+                f"{base_url}/artifactory/{repo}/{exploded_dir}{matrix_props}"
+            )
+        if dry_run:
+            return summary
+        summary["stats"] = {}
 
-    # --- upload results json ---
-    code_res, url_res = client.put_file(
-        local_path=results_in,
-        remote_path=results_remote_path,
-        sha1=r_sha1,
-        sha256=r_sha256,
-        matrix_props=matrix_props,
-        overwrite=True,
-    )
-    if code_res >= 300 or (code_res == 200 and not overwrite):
-        raise UploadError(
-            f"Results JSON upload failed ({code_res}) → {url_res}", status=code_res
+        # artifact a parti già completato da un tentativo precedente (stessa cartella remota)
+        chunked_done = (
+            chunked is not None
+            and chunk_state.get("sha256") == a_sha256
+            and bool(chunk_state.get("manifest_url"))
         )
 
-    return summary
+        # --- check di esistenza ROBUSTO (senza HEAD): un solo listing della cartella ---
+        if not overwrite:
+            # True → blocca; False → ok; None (indeterminato) → decide il PUT:
+            # Artifactory risponde 201 se nuovo, 200 se sovrascrive (trattato come errore sotto).
+            artifact_check_path = f"{remote_folder}{artifact_remote_name}"
+            # results condiviso: verificato al momento del PUT (un altro job può averlo già caricato)
+            planned = [artifact_check_path] + ([results_remote_path] if upload_results is True else [])
+            state = client.existing(planned)
+            if state[artifact_check_path] is True and not chunked_done:
+                raise UploadError(
+                    f"Remote artifact exists: {artifact_remote_path}. Use --overwrite to replace.",
+                    status=409,
+                )
+            if upload_results is True and state[results_remote_path] is True:
+                raise UploadError(
+                    f"Remote results JSON exists: {results_remote_path}. Use --overwrite to replace.",
+                    status=409,
+                )
+
+        # --- upload file esplosi (in parallelo), il manifest come "artifact" per ultimo ---
+        if exploded_files is not None:
+            summary["stats"]["files"] = _deploy_exploded(
+                client,
+                upload_files,
+                exploded_dir,
+                matrix_props,
+                checksum_deploy,
+                overwrite,
+                explode_workers,
+            )
+            if delta_state is not None:
+                reused_bytes = sum(f.local.stat().st_size for f in reused)
+                summary["stats"]["files"]["size"] += reused_bytes
+                summary["stats"]["files"]["bytes_saved"] += reused_bytes
+                summary["stats"]["files"]["reused_files"] = len(reused)
+
+        # --- upload artifact ---
+        if chunked is not None:
+            save_json_state(chunked.state_path, {**chunk_state, "timestamp": ts})
+        if chunked_done:
+            size = _body_size(artifact_body)
+            summary["stats"]["artifact"] = {
+                "size": size,
+                "bytes_sent": 0,
+                "bytes_saved": size,
+                "checksum_deploy": False,
+            }
+        else:
+            code_art, url_art, summary["stats"]["artifact"] = _put_with_stats(
+                client,
+                artifact_body,
+                artifact_remote_path,
+                a_sums,
+                matrix_props,
+                checksum_deploy,
+                chunked=chunked,
+                extra_headers={"X-Explode-Archive": "true"} if explode == "server" else None,
+            )
+            # Policy: se overwrite=False e il server risponde 200 (sovrascrittura), consideralo errore.
+            if code_art >= 300 or (code_art == 200 and not overwrite):
+                raise UploadError(
+                    f"Artifact upload failed ({code_art}) → {url_art}", status=code_art
+                )
+
+        # --- upload results json ---
+        shared = upload_results if isinstance(upload_results, SharedResults) else None
+        if upload_results:
+            with shared.claim() if shared is not None else nullcontext(True) as mine:
+                if mine:
+                    if (
+                        shared is not None
+                        and not overwrite
+                        and client.existing([results_remote_path])[results_remote_path] is True
+                    ):
+                        raise UploadError(
+                            f"Remote results JSON exists: {results_remote_path}. Use --overwrite to replace.",
+                            status=409,
+                        )
+                    code_res, url_res, summary["stats"]["results"] = _put_with_stats(
+                        client, results_in, results_remote_path, r_sums, matrix_props, checksum_deploy
+                    )
+                    if code_res >= 300 or (code_res == 200 and not overwrite):
+                        raise UploadError(
+                            f"Results JSON upload failed ({code_res}) → {url_res}", status=code_res
+                        )
+                    if shared is not None:
+                        shared.uploaded = True
+
+        if chunked is not None:
+            chunked.state_path.unlink(missing_ok=True)
+        if delta_state is not None:
+            # base del prossimo delta: stato locale + copia remota per altri agent
+            artifact_body.seek(0)
+            save_json_state(delta_state, json.load(artifact_body))
+            code, url = client.put_file(
+                local_path=artifact_body,
+                remote_path=_delta_remote_path(dest, artifact_in.name),
+                sha1=a_sha1,
+                sha256=a_sha256,
+            )
+            # sovrascritto a ogni run (200 atteso); senza, gli altri agent ricaricano tutto
+            if code >= 300:
+                raise UploadError(f"Delta manifest upload failed ({code}) → {url}", status=code)
+        if own_client:
+            summary["transport"] = client.transport_stats()
+        return summary
 
 
 # --- Wrapper "safe" per integrazioni che non vogliono eccezioni ----------------
@@ -186,6 +751,22 @@ def upload_test_artifacts_safe(
     overwrite: bool = False,
     set_properties: Optional[Dict[str, str]] = None,
     dry_run: bool = False,
+    client: Optional[JFrogClient] = None,
+    timestamp: Optional[str] = None,
+    upload_results: Union[bool, SharedResults] = True,
+    stream: bool = False,
+    checksum_deploy: bool = False,
+    chunk_threshold: Optional[int] = None,
+    part_size: int = 64 * 1024 * 1024,
+    part_workers: int = 3,
+    use_checksum_cache: bool = True,
+    use_archive_cache: bool = True,
+    explode: Optional[str] = None,
+    explode_workers: int = 8,
+    compression: Optional[CompressionPolicy] = None,
+    delta: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    archive: Optional[CachedArchive] = None,
 ) -> UploadResult:
     """
     Safe wrapper: non lancia eccezioni; ritorna un UploadResult con exit_code.
@@ -201,6 +782,22 @@ def upload_test_artifacts_safe(
             overwrite=overwrite,
             set_properties=set_properties,
             dry_run=dry_run,
+            client=client,
+            timestamp=timestamp,
+            upload_results=upload_results,
+            stream=stream,
+            checksum_deploy=checksum_deploy,
+            chunk_threshold=chunk_threshold,
+            part_size=part_size,
+            part_workers=part_workers,
+            use_checksum_cache=use_checksum_cache,
+            use_archive_cache=use_archive_cache,
+            explode=explode,
+            explode_workers=explode_workers,
+            compression=compression,
+            delta=delta,
+            progress=progress,
+            archive=archive,
         )
         return UploadResult(
             ok=True, exit_code=0, http_status=0, summary=summary, error=None
@@ -226,3 +823,154 @@ def upload_test_artifacts_safe(
         return UploadResult(
             ok=False, exit_code=50, http_status=None, summary=None, error=str(e)
         )
+
+
+# --- Batch: molti job in un solo processo, una sola sessione HTTP ---------------
+
+
+def upload_test_artifacts_batch(
+    jobs: Sequence[BatchJob],
+    *,
+    jfrog: JFrogConfig,
+    repo: str = "generic-local",
+    overwrite: bool = False,
+    set_properties: Optional[Dict[str, str]] = None,
+    dry_run: bool = False,
+    max_workers: int = 4,
+    stream: bool = False,
+    checksum_deploy: bool = False,
+    chunk_threshold: Optional[int] = None,
+    part_size: int = 64 * 1024 * 1024,
+    part_workers: int = 3,
+    use_checksum_cache: bool = True,
+    use_archive_cache: bool = True,
+    explode: Optional[str] = None,
+    explode_workers: int = 8,
+    compression: Optional[CompressionPolicy] = None,
+    delta: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    archive_workers: Optional[int] = None,
+) -> BatchSummary:
+    """
+    Esegue più upload su un thread pool limitato che condivide un solo JFrogClient
+    (pool di connessioni + handshake TLS riusati tra i job).
+    Non lancia eccezioni per i singoli job: ogni job ha summary oppure error/exit_code.
+    I job con lo stesso dest finiscono nella stessa cartella remota (stesso timestamp)
+    e un results JSON condiviso viene caricato una volta sola, dal primo job il cui
+    artifact va a buon fine (SharedResults).
+    Le directory da archiviare vengono compresse (e hashate) in parallelo su un process
+    pool da 'archive_workers' processi (default: uno per core); ogni job parte appena il
+    suo archivio è pronto, così compressione e trasferimento si sovrappongono.
+    """
+    base_url = (jfrog.get("base_url") or "").rstrip("/")
+    if not base_url:
+        raise ValueError("jfrog.base_url is required")
+    max_workers = max(1, int(max_workers))
+
+    client = _client_from_config(jfrog, repo, pool_size=max_workers, progress=progress)
+
+    # timestamp per dest e results JSON condivisi, decisi prima di partire
+    ts_by_dest: Dict[str, str] = {}
+    res_keys: List[Tuple[str, str]] = []
+    for job in jobs:
+        dest_key = normalize_dest(job.get("dest", ""))
+        ts_by_dest.setdefault(dest_key, current_datetime())
+        res_keys.append((dest_key, str(Path(job.get("results_json_path", "")).resolve())))
+    shared: Dict[Tuple[str, str], SharedResults] = {
+        k: SharedResults() for k in set(res_keys) if res_keys.count(k) > 1
+    }
+    plan: List[Tuple[str, Union[bool, SharedResults]]] = [
+        (ts_by_dest[k[0]], shared.get(k, True)) for k in res_keys
+    ]
+
+    def _run(i: int, archive: Optional[CachedArchive] = None) -> BatchJobResult:
+        job = jobs[i]
+        props = dict(set_properties or {})
+        props.update(job.get("props") or {})
+        ts, upload_results = plan[i]
+        try:
+            r = upload_test_artifacts_safe(
+                artifact_path=job.get("artifact_path", ""),
+                results_json_path=job.get("results_json_path", ""),
+                dest=job.get("dest", ""),
+                jfrog=jfrog,
+                repo=repo,
+                overwrite=overwrite,
+                set_properties=props,
+                dry_run=dry_run,
+                client=client,
+                timestamp=ts,
+                upload_results=upload_results,
+                stream=stream,
+                checksum_deploy=checksum_deploy,
+                chunk_threshold=chunk_threshold,
+                part_size=part_size,
+                part_workers=part_workers,
+                use_checksum_cache=use_checksum_cache,
+                use_archive_cache=use_archive_cache,
+                explode=explode,
+                explode_workers=explode_workers,
+                compression=compression,
+                delta=delta,
+                progress=progress,
+                archive=archive,
+            )
+        finally:
+            if archive is not None:
+                release_archive(archive, archive_cache)
+        return {
+            "index": i,
+            "artifact_path": job.get("artifact_path", ""),
+            "ok": r.ok,
+            "exit_code": r.exit_code,
+            "http_status": r.http_status,
+            "summary": r.summary,
+            "error": r.error,
+        }
+
+    # directory da archiviare (non stream/explode local/delta): vanno sul process pool
+    archived = [
+        i
+        for i, job in enumerate(jobs)
+        if not stream
+        and not delta
+        and explode != "local"
+        and Path(job.get("artifact_path", "")).is_dir()
+    ]
+    archive_cache = default_archive_cache() if use_archive_cache else None
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = set(archived)
+            futures = {i: pool.submit(_run, i) for i in range(len(jobs)) if i not in pending}
+            if len(archived) > 1:
+                for n, entry in archive_many(
+                    [Path(jobs[i].get("artifact_path", "")) for i in archived],
+                    compression,
+                    workers=archive_workers,
+                    cache=archive_cache,
+                ):
+                    i = archived[n]
+                    pending.discard(i)
+                    # in errore: il job riprova da solo e riporta l'errore come gli altri
+                    prebuilt = entry if isinstance(entry, CachedArchive) else None
+                    futures[i] = pool.submit(_run, i, prebuilt)
+            for i in pending:
+                futures[i] = pool.submit(_run, i)
+            results = [futures[i].result() for i in range(len(jobs))]
+        transport = client.transport_stats()
+    finally:
+        client.session.close()  # nessun pool keep-alive lasciato aperto dal batch
+
+    succeeded = sum(1 for r in results if r["ok"])
+    return {
+        "ok": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "jobs": results,
+        "transport": transport,
+        "timings": merge_timings(r["summary"].get("timings") for r in results if r["summary"]),
+    }
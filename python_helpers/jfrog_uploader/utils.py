@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import atexit
 import hashlib
+import io
+import json
 import os
 import shutil
+import sqlite3
 import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from .metrics import span
+from .models import ArchiveStats
 
 try:
     from zoneinfo import ZoneInfo
@@ -15,6 +28,38 @@ except Exception:
 ARTIFACTORY_FIXED_PREFIX = "test/testreport/"
 
 
+def state_dir(*parts: str) -> Path:
+    """
+    Cartella locale per stato/cache dell'uploader (creata se manca).
+    JFROG_UPLOADER_HOME se impostata, altrimenti ~/.cache/jfrog_uploader.
+    """
+    root = os.environ.get("JFROG_UPLOADER_HOME") or str(
+        Path.home() / ".cache" / "jfrog_uploader"
+    )
+    d = Path(root).joinpath(*parts)
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def load_json_state(path: Path) -> Optional[dict]:
+    """Legge un file di stato JSON; None se manca o è corrotto."""
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def save_json_state(path: Path, data: dict) -> None:
+    """Scrittura atomica (tmp + replace): un crash non lascia mai un file a metà."""
+    path = Path(path)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
 def normalize_dest(dest: str) -> str:
     """
     Normalizza un path "umano" in un path Artifactory-style.
@@ -70,36 +115,872 @@ def build_remote_folder_name(dest: str, ts: str, as_folder: bool = False) -> str
     return base
 
 
-def ensure_zip(path: Path) -> Path:
+# estensioni già compresse: deflate costa CPU e non riduce quasi nulla
+DEFAULT_STORED_EXTENSIONS = frozenset(
+    {
+        ".png", ".jpg", ".jpeg", ".gif", ".webp", ".webm", ".mp4", ".mkv", ".avi",
+        ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".zst", ".jar", ".whl", ".pdf",
+    }
+)
+ARCHIVE_FORMATS = ("zip", "tar")
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """
+    Politica di compressione per-file dell'archivio:
+    - estensioni in 'stored_extensions' → memorizzate così come sono
+    - livello deflate per estensione ('levels', es. {".txt": 9}), altrimenti 'level'
+    - file oltre 'large_file_threshold' byte → 'large_file_level' (compressione veloce)
+    - 'format': "zip" (default) oppure "tar" (nessuna compressione, contenitore più veloce)
+    """
+
+    level: int = 6
+    levels: Dict[str, int] = field(default_factory=dict)
+    stored_extensions: frozenset = DEFAULT_STORED_EXTENSIONS
+    large_file_threshold: int = 64 * 1024 * 1024
+    large_file_level: int = 1
+    format: str = "zip"
+
+    def level_for(self, path: Path, size: int) -> int:
+        """Livello deflate 0-9 per il file (0 = stored)."""
+        ext = Path(path).suffix.lower()
+        if ext in self.stored_extensions:
+            return 0
+        if ext in self.levels:
+            return self.levels[ext]
+        if size > self.large_file_threshold:
+            return self.large_file_level
+        return self.level
+
+    @property
+    def suffix(self) -> str:
+        return f".{self.format}"
+
+
+DEFAULT_COMPRESSION = CompressionPolicy()
+
+
+def write_archive(
+    fileobj, root: Path, policy: Optional[CompressionPolicy] = None
+) -> ArchiveStats:
+    """
+    Scrive la directory 'root' come archivio su 'fileobj' secondo la policy
+    (ordine stabile: stesso contenuto → stessi byte). Ritorna le statistiche.
+    """
+    policy = policy or DEFAULT_COMPRESSION
+    if policy.format not in ARCHIVE_FORMATS:
+        raise ValueError(
+            f"Invalid archive format: {policy.format} (expected one of {ARCHIVE_FORMATS})"
+        )
+    root = Path(root)
+    started = time.perf_counter()
+    stats: ArchiveStats = {
+        "format": policy.format,
+        "files": 0,
+        "stored_files": 0,
+        "deflated_files": 0,
+        "input_bytes": 0,
+    }
+    if policy.format == "tar":
+        # "w|": stream puro, nessun seek sulla destinazione
+        import tarfile
+
+        with tarfile.open(fileobj=fileobj, mode="w|", format=tarfile.PAX_FORMAT) as tf:
+            for full, rel in list_files(root):
+                tf.add(str(full), arcname=rel, recursive=False)
+                stats["files"] += 1
+                stats["stored_files"] += 1
+                stats["input_bytes"] += full.stat().st_size
+    else:
+        with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for dirpath, dirs, files in os.walk(root):
+                dirs.sort()
+                rel_root = Path(dirpath).relative_to(root)
+                for d in dirs:
+                    zf.write(Path(dirpath) / d, arcname=str(rel_root / d))
+                for name in sorted(files):
+                    full = Path(dirpath) / name
+                    size = full.stat().st_size
+                    level = policy.level_for(full, size)
+                    arcname = str(rel_root / name)
+                    if level == 0:
+                        zf.write(full, arcname=arcname, compress_type=zipfile.ZIP_STORED)
+                        stats["stored_files"] += 1
+                    else:
+                        zf.write(full, arcname=arcname, compresslevel=level)
+                        stats["deflated_files"] += 1
+                    stats["files"] += 1
+                    stats["input_bytes"] += size
+    stats["seconds"] = round(time.perf_counter() - started, 4)
+    return stats
+
+
+def _finish_archive_stats(stats: ArchiveStats, output_bytes: int) -> ArchiveStats:
+    stats["output_bytes"] = output_bytes
+    stats["ratio"] = (
+        round(output_bytes / stats["input_bytes"], 4) if stats["input_bytes"] else 1.0
+    )
+    return stats
+
+
+def build_archive(
+    path: Path, policy: Optional[CompressionPolicy] = None
+) -> tuple[Path, ArchiveStats]:
+    """Archivia la directory in una cartella temporanea; ritorna (path archivio, statistiche)."""
+    path = Path(path)
+    policy = policy or DEFAULT_COMPRESSION
+    tmpdir = Path(tempfile.mkdtemp(prefix="artifact_zip_"))
+    _track_temp_dir(tmpdir)
+    archive_path = tmpdir / f"{path.name}{policy.suffix}"
+    try:
+        with span("zip") as sp, archive_path.open("wb") as f:
+            stats = write_archive(f, path, policy)
+            sp["bytes"] = stats["input_bytes"]
+    except BaseException:
+        _remove_temp_dir(tmpdir)
+        raise
+    return archive_path, _finish_archive_stats(stats, archive_path.stat().st_size)
+
+
+def ensure_zip(path: Path, policy: Optional[CompressionPolicy] = None) -> Path:
     """
     Se 'path' è una directory, crea uno zip temporaneo; se è file, lo restituisce.
+    Lo zip temporaneo va eliminato con remove_temp_zip() a upload concluso.
+    'policy' sceglie formato e compressione per file (default: file già compressi
+    memorizzati così come sono, deflate 6 sul resto).
     """
     path = Path(path)
     if path.is_file():
         return path
     if not path.exists():
         raise FileNotFoundError(f"Artifact path not found: {path}")
-    # zip tmp
-    tmpdir = Path(tempfile.mkdtemp(prefix="artifact_zip_"))
-    zip_path = tmpdir / f"{path.name}.zip"
-    shutil.make_archive(str(zip_path.with_suffix("")), "zip", root_dir=str(path))
-    return zip_path
+    return build_archive(path, policy)[0]
+
+
+def remove_temp_zip(original: Path, zip_path: Path) -> None:
+    """Elimina lo zip temporaneo creato da ensure_zip (no-op se 'zip_path' è l'input originale)."""
+    if Path(zip_path) != Path(original):
+        _remove_temp_dir(Path(zip_path).parent)
+
+
+# cartelle temporanee create dal processo e non ancora rimosse: le elimina atexit
+# (upload interrotto da un'eccezione non gestita, chiamante che dimentica remove_temp_zip)
+_temp_dirs: set[str] = set()
+_temp_dirs_lock = threading.Lock()
+
+
+def _track_temp_dir(d: Path) -> None:
+    with _temp_dirs_lock:
+        _temp_dirs.add(str(d))
 
 
-def _hash_of_file(p: Path, algo: str) -> str:
-    h = hashlib.new(algo)
-    with Path(p).open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
+def _remove_temp_dir(d: Path) -> None:
+    shutil.rmtree(d, ignore_errors=True)
+    with _temp_dirs_lock:
+        _temp_dirs.discard(str(d))
+
+
+@atexit.register
+def _cleanup_temp_dirs() -> None:
+    with _temp_dirs_lock:
+        leftovers = list(_temp_dirs)
+        _temp_dirs.clear()
+    for d in leftovers:
+        shutil.rmtree(d, ignore_errors=True)
+
+
+# soglia oltre la quale lo zip in streaming viene riversato su disco
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
+
+class _HashingSpool:
+    """
+    Destinazione di scrittura per zipfile: calcola i digest mentre lo zip viene scritto
+    e tiene i byte in memoria finché non superano 'max_size' (poi file temporaneo anonimo).
+    Non espone seek(): zipfile usa i data descriptor e non riscrive mai i byte già hashati.
+    """
+
+    def __init__(self, algos: tuple[str, ...], max_size: int) -> None:
+        self._hashers = {a: hashlib.new(a) for a in algos}
+        self._max_size = max_size
+        self._file: BinaryIO = io.BytesIO()
+        self._rolled = False
+        self.size = 0
+
+    def write(self, data) -> int:
+        n = len(data)
+        for h in self._hashers.values():
+            h.update(data)
+        if not self._rolled and self.size + n > self._max_size:
+            disk = tempfile.TemporaryFile(prefix="artifact_zip_")
+            disk.write(self._file.getbuffer())
+            self._file = disk
+            self._rolled = True
+        self._file.write(data)
+        self.size += n
+        return n
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def checksums(self) -> dict[str, str]:
+        return {a: h.hexdigest() for a, h in self._hashers.items()}
+
+    def detach(self) -> BinaryIO:
+        """Ritorna il file sottostante riposizionato all'inizio (il chiamante lo chiude)."""
+        self._file.seek(0)
+        return self._file
+
+
+def zip_to_stream(
+    path: Path,
+    algos: tuple[str, ...] = ("sha1", "sha256"),
+    spool_max_size: int = SPOOL_MAX_SIZE,
+    policy: Optional[CompressionPolicy] = None,
+) -> tuple[BinaryIO, dict[str, str], ArchiveStats]:
+    """
+    Zippa la directory 'path' in streaming calcolando i checksum nello stesso passaggio.
+    Ritorna (file_object, checksums, statistiche): il file è in memoria se piccolo, altrimenti
+    un TemporaryFile che il sistema elimina alla chiusura. Il chiamante deve chiuderlo.
+    """
+    path = Path(path)
+    if not path.is_dir():
+        raise FileNotFoundError(f"Artifact directory not found: {path}")
+    spool = _HashingSpool(algos, spool_max_size)
+    try:
+        with span("zip", stream=True) as sp:
+            stats = write_archive(spool, path, policy)
+            sp["bytes"] = stats["input_bytes"]
+    except BaseException:
+        spool.detach().close()
+        raise
+    return spool.detach(), spool.checksums(), _finish_archive_stats(stats, spool.size)
+
+
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+class ChecksumCache:
+    """
+    Cache persistente dei digest (SQLite), valida finché il file non cambia:
+    una riga per path, usata solo se (size, mtime_ns, inode) coincidono.
+    - LRU: oltre 'max_entries' righe vengono eliminate quelle usate meno di recente
+    - processi concorrenti: WAL + busy timeout; ogni errore SQLite degrada a "miss"
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_entries: int = 50_000) -> None:
+        self.db_path = Path(db_path) if db_path else state_dir() / "checksums.sqlite"
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS checksums ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+                " digests TEXT, last_used REAL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _identity(p: Path) -> tuple[str, int, int, int]:
+        st = os.stat(p)
+        return str(Path(p).resolve()), st.st_size, st.st_mtime_ns, st.st_ino
+
+    def get(self, p: Path, algos: tuple[str, ...]) -> Optional[dict[str, str]]:
+        try:
+            path, size, mtime_ns, inode = self._identity(p)
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT digests FROM checksums WHERE path=? AND size=? AND mtime_ns=? AND inode=?",
+                (path, size, mtime_ns, inode),
+            ).fetchone()
+            if row is None:
+                return None
+            digests = json.loads(row[0])
+            if not all(a in digests for a in algos):
+                return None
+            conn.execute(
+                "UPDATE checksums SET last_used=? WHERE path=?", (time.time(), path)
+            )
+            return {a: digests[a] for a in algos}
+        except (sqlite3.Error, OSError, ValueError):
+            return None
+
+    def put(self, p: Path, digests: dict[str, str]) -> None:
+        try:
+            path, size, mtime_ns, inode = self._identity(p)
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT digests FROM checksums WHERE path=? AND size=? AND mtime_ns=? AND inode=?",
+                (path, size, mtime_ns, inode),
+            ).fetchone()
+            merged = {**(json.loads(row[0]) if row else {}), **digests}
+            conn.execute(
+                "INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, inode, json.dumps(merged), time.time()),
+            )
+            self._writes += 1
+            if self._writes % 100 == 1:
+                self.evict()
+        except (sqlite3.Error, OSError, ValueError):
+            pass
+
+    def evict(self) -> None:
+        """Tiene solo le 'max_entries' righe usate più di recente."""
+        self._conn().execute(
+            "DELETE FROM checksums WHERE path NOT IN ("
+            " SELECT path FROM checksums ORDER BY last_used DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+
+_default_cache: Optional[ChecksumCache] = None
+_default_cache_lock = threading.Lock()
+# cache di default che non si possono creare (HOME non scrivibile, ...): non si riprova
+_unavailable_caches: set[str] = set()
+
+
+def default_checksum_cache() -> Optional[ChecksumCache]:
+    """
+    Cache condivisa del processo; None se disattivata (JFROG_CHECKSUM_CACHE=0) o se la
+    cartella di stato non si può creare: l'upload procede senza cache.
+    """
+    global _default_cache
+    if os.environ.get("JFROG_CHECKSUM_CACHE", "1") in ("0", "false", "False"):
+        return None
+    with _default_cache_lock:
+        if _default_cache is None and "checksums" not in _unavailable_caches:
+            try:
+                _default_cache = ChecksumCache()
+            except OSError:
+                _unavailable_caches.add("checksums")
+        return _default_cache
+
+
+class _HashingWriter:
+    """
+    Come _HashingSpool ma su un file già aperto: digest calcolati mentre l'archivio viene
+    scritto, senza seek() (zipfile usa i data descriptor) → nessuna rilettura per l'hash.
+    """
+
+    def __init__(self, f: BinaryIO, algos: tuple[str, ...]) -> None:
+        self._f = f
+        self._hashers = {a: hashlib.new(a) for a in algos}
+        self.size = 0
+
+    def write(self, data) -> int:
+        for h in self._hashers.values():
+            h.update(data)
+        self._f.write(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def checksums(self) -> dict[str, str]:
+        return {a: h.hexdigest() for a, h in self._hashers.items()}
+
+
+def tree_fingerprint(root: Path, policy: Optional[CompressionPolicy] = None) -> str:
+    """
+    Impronta di una directory per la cache degli archivi: nome, path relativi, size e
+    mtime_ns di ogni file (più le cartelle, che lo zip include) e parametri della policy.
+    Nessuna lettura dei contenuti: costa uno stat per file.
+    """
+    root = Path(root)
+    policy = policy or DEFAULT_COMPRESSION
+    h = hashlib.sha256()
+    h.update(
+        json.dumps(
+            [
+                root.name,
+                policy.format,
+                policy.level,
+                sorted(policy.levels.items()),
+                sorted(policy.stored_extensions),
+                policy.large_file_threshold,
+                policy.large_file_level,
+            ]
+        ).encode("utf-8")
+    )
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        rel_root = Path(dirpath).relative_to(root).as_posix()
+        for d in dirs:
+            h.update(f"d\0{rel_root}/{d}\n".encode("utf-8", "surrogateescape"))
+        for name in sorted(files):
+            st = os.stat(os.path.join(dirpath, name))
+            h.update(
+                f"f\0{rel_root}/{name}\0{st.st_size}\0{st.st_mtime_ns}\n".encode(
+                    "utf-8", "surrogateescape"
+                )
+            )
     return h.hexdigest()
 
 
+@dataclass(frozen=True)
+class CachedArchive:
+    path: Path
+    checksums: Dict[str, str]
+    stats: ArchiveStats
+    temporary: bool = False  # fuori cache o hardlink privato: lo rimuove release_archive()
+    key: str = ""  # tree_fingerprint (vuota per gli archivi fuori cache)
+
+
+def _write_hashed_archive(
+    archive_path: Path, path: Path, policy: CompressionPolicy, algos: tuple[str, ...]
+) -> tuple[dict[str, str], ArchiveStats]:
+    """Scrive l'archivio su 'archive_path' calcolando i digest nello stesso passaggio."""
+    with span("zip") as sp, archive_path.open("wb") as f:
+        writer = _HashingWriter(f, algos)
+        stats = write_archive(writer, path, policy)
+        sp["bytes"] = stats["input_bytes"]
+    return writer.checksums(), _finish_archive_stats(stats, writer.size)
+
+
+# build abbandonate (processo ucciso senza atexit) più vecchie di così vengono rimosse
+_STALE_BUILD_SECONDS = 6 * 3600
+
+
+class ArchiveCache:
+    """
+    Archivi di directory riusabili tra tentativi, repo e processi (retry dopo un errore,
+    stessa cartella verso un secondo repo): chiave = tree_fingerprint, entry = archivio +
+    checksum + statistiche, prodotti in una sola passata (compressione e hash insieme).
+    - LRU per dimensione: oltre 'max_bytes' vengono eliminati gli archivi usati meno di
+      recente (mai quelli in uso nel processo); un archivio più grande del limite, o di una
+      directory modificata durante la compressione, non entra in cache e resta temporaneo
+    - entry pubblicate con rename atomico: build concorrenti della stessa directory al più
+      comprimono due volte, nessuno legge mai un archivio a metà
+    - chi usa un archivio ne riceve un hardlink (copia se il filesystem non li supporta) in
+      una cartella privata ".use-*": l'eviction di un altro processo toglie solo il nome in
+      cache, mai i dati di un upload in corso
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = 2 * 1024**3) -> None:
+        self.root = Path(root) if root else state_dir("archives")
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._pinned: Dict[str, int] = {}  # chiave → upload in corso che la stanno leggendo
+
+    @contextmanager
+    def use(
+        self,
+        path: Path,
+        policy: Optional[CompressionPolicy] = None,
+        algos: tuple[str, ...] = ("sha1", "sha256"),
+    ) -> Iterator[CachedArchive]:
+        """Archivio della directory (dalla cache o appena creato), protetto dall'eviction finché in uso."""
+        entry = self.acquire(path, policy, algos)
+        try:
+            yield entry
+        finally:
+            release_archive(entry, self)
+
+    def acquire(
+        self,
+        path: Path,
+        policy: Optional[CompressionPolicy] = None,
+        algos: tuple[str, ...] = ("sha1", "sha256"),
+        key: Optional[str] = None,
+    ) -> CachedArchive:
+        """Come use(), ma l'entry va restituita con release_archive(entry, cache)."""
+        path = Path(path)
+        if not path.is_dir():
+            raise FileNotFoundError(f"Artifact directory not found: {path}")
+        policy = policy or DEFAULT_COMPRESSION
+        key = key or tree_fingerprint(path, policy)
+        self.pin(key)
+        try:
+            entry = self.lookup(key, algos)
+            if entry is None:
+                entry = self.build(key, path, policy, algos)
+        except BaseException:
+            self.unpin(key)
+            raise
+        return entry
+
+    def pin(self, key: str) -> None:
+        with self._lock:
+            self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, key: str) -> None:
+        with self._lock:
+            n = self._pinned.get(key, 0) - 1
+            if n > 0:
+                self._pinned[key] = n
+            else:
+                self._pinned.pop(key, None)
+
+    def lookup(self, key: str, algos: tuple[str, ...] = ("sha1", "sha256")) -> Optional[CachedArchive]:
+        """Entry già in cache per la chiave; None se assente o corrotta (che viene rimossa)."""
+        entry = self.root / key
+        meta = load_json_state(entry / "meta.json")
+        if meta is None:
+            return None
+        try:
+            archive = entry / meta["archive"]
+            stats: ArchiveStats = meta["stats"]
+            if archive.stat().st_size != stats["output_bytes"]:
+                raise ValueError("size mismatch")
+            sums = {a: meta["checksums"][a] for a in algos}
+            os.utime(entry / "meta.json")  # ultimo uso, per l'LRU
+        except (OSError, KeyError, TypeError, ValueError):
+            shutil.rmtree(entry, ignore_errors=True)  # entry corrotta: si ricostruisce
+            return None
+        try:
+            private = self._private_link(archive)
+        except OSError:  # eliminata da un altro processo nel frattempo
+            return None
+        with span("zip", cached=True):
+            pass
+        return CachedArchive(private, sums, {**stats, "cached": True}, temporary=True, key=key)
+
+    def _private_link(self, archive: Path) -> Path:
+        """Hardlink (o copia) dell'archivio in una cartella ".use-*" del processo."""
+        tmp = Path(tempfile.mkdtemp(prefix=".use-", dir=self.root))
+        _track_temp_dir(tmp)
+        dst = tmp / archive.name
+        try:
+            try:
+                os.link(archive, dst)
+            except OSError:
+                if not archive.exists():
+                    raise
+                shutil.copyfile(archive, dst)
+        except BaseException:
+            _remove_temp_dir(tmp)
+            raise
+        return dst
+
+    def build(
+        self,
+        key: str,
+        path: Path,
+        policy: CompressionPolicy,
+        algos: tuple[str, ...] = ("sha1", "sha256"),
+        evict: bool = True,
+    ) -> CachedArchive:
+        """Crea l'archivio e lo pubblica in cache (se ci sta e la directory non è cambiata)."""
+        tmp = Path(tempfile.mkdtemp(prefix=".build-", dir=self.root))
+        _track_temp_dir(tmp)
+        archive_path = tmp / f"{path.name}{policy.suffix}"
+        try:
+            sums, stats = _write_hashed_archive(archive_path, path, policy, algos)
+            stats["cached"] = False
+            temporary = CachedArchive(archive_path, sums, stats, temporary=True)
+            if stats["output_bytes"] > self.max_bytes or tree_fingerprint(path, policy) != key:
+                return temporary
+            save_json_state(
+                tmp / "meta.json",
+                {"archive": archive_path.name, "checksums": sums, "stats": stats},
+            )
+            private = self._private_link(archive_path)  # prima di pubblicare: evict-safe
+            try:
+                os.rename(tmp, self.root / key)
+            except OSError:  # un'altra build l'ha pubblicata per prima
+                _remove_temp_dir(private.parent)
+                won = self.lookup(key, algos)
+                if won is None:
+                    return temporary
+                _remove_temp_dir(tmp)
+                return won
+        except BaseException:
+            _remove_temp_dir(tmp)
+            raise
+        with _temp_dirs_lock:
+            _temp_dirs.discard(str(tmp))
+        if evict:
+            self.evict()
+        return CachedArchive(private, sums, stats, temporary=True, key=key)
+
+    def evict(self) -> None:
+        """Elimina gli archivi usati meno di recente finché la cache supera 'max_bytes'."""
+        now = time.time()
+        entries = []
+        total = 0
+        for e in self.root.iterdir():
+            try:
+                if e.name.startswith((".build-", ".use-")):
+                    if now - e.stat().st_mtime > _STALE_BUILD_SECONDS:
+                        shutil.rmtree(e, ignore_errors=True)
+                    continue
+                size = sum(f.stat().st_size for f in e.iterdir())
+                last_used = (e / "meta.json").stat().st_mtime
+            except OSError:
+                continue
+            entries.append((last_used, size, e))
+            total += size
+        with self._lock:
+            pinned = set(self._pinned)
+        for _, size, e in sorted(entries, key=lambda x: x[0]):
+            if total <= self.max_bytes:
+                break
+            if e.name in pinned:
+                continue
+            shutil.rmtree(e, ignore_errors=True)
+            total -= size
+
+
+def release_archive(entry: CachedArchive, cache: Optional[ArchiveCache] = None) -> None:
+    """Fine uso di un archivio: rimuove i temporanei, sblocca l'eviction per quelli in cache."""
+    if entry.temporary:
+        _remove_temp_dir(entry.path.parent)
+    if entry.key and cache is not None:
+        cache.unpin(entry.key)
+
+
+def _archive_worker(
+    args: tuple[str, CompressionPolicy, tuple[str, ...], Optional[str], int, str]
+) -> CachedArchive:
+    """Process pool di archive_many: crea un archivio (in cache se 'cache_root')."""
+    path, policy, algos, cache_root, max_bytes, key = args
+    src = Path(path)
+    if cache_root is not None:
+        entry = ArchiveCache(Path(cache_root), max_bytes).build(key, src, policy, algos, evict=False)
+    else:
+        tmp = Path(tempfile.mkdtemp(prefix="artifact_zip_"))
+        _track_temp_dir(tmp)
+        archive_path = tmp / f"{src.name}{policy.suffix}"
+        try:
+            sums, stats = _write_hashed_archive(archive_path, src, policy, algos)
+        except BaseException:
+            _remove_temp_dir(tmp)
+            raise
+        entry = CachedArchive(archive_path, sums, stats, temporary=True)
+    if entry.temporary:  # ne diventa proprietario il processo padre (atexit compreso)
+        with _temp_dirs_lock:
+            _temp_dirs.discard(str(entry.path.parent))
+    return entry
+
+
+def archive_many(
+    paths: list[Path],
+    policy: Optional[CompressionPolicy] = None,
+    workers: Optional[int] = None,
+    cache: Optional[ArchiveCache] = None,
+    algos: tuple[str, ...] = ("sha1", "sha256"),
+) -> Iterator[tuple[int, CachedArchive | BaseException]]:
+    """
+    Archivia molte directory in parallelo su un process pool (un processo per core),
+    calcolando i checksum durante la compressione. Produce (indice in 'paths', entry)
+    man mano che ogni archivio è pronto, così il chiamante può avviarne subito l'upload
+    mentre gli altri sono ancora in compressione; gli errori arrivano come eccezione al
+    posto dell'entry. Le directory già in 'cache' escono per prime, senza ricomprimere.
+    Ogni entry va restituita con release_archive(entry, cache); se il consumatore si
+    ferma prima della fine, le build rimaste vengono annullate e ripulite.
+    """
+    policy = policy or DEFAULT_COMPRESSION
+    ready: list[tuple[int, CachedArchive | BaseException]] = []
+    pending: Dict[int, str] = {}  # indice → fingerprint (pinnata) delle directory da comprimere
+    for i, p in enumerate(paths):
+        try:
+            if not Path(p).is_dir():
+                raise FileNotFoundError(f"Artifact directory not found: {p}")
+            key = tree_fingerprint(Path(p), policy) if cache is not None else ""
+            if key:
+                cache.pin(key)  # fino a release_archive: nessuna eviction nel frattempo
+                hit = cache.lookup(key, algos)
+                if hit is not None:
+                    ready.append((i, hit))
+                    continue
+            pending[i] = key
+        except Exception as e:
+            ready.append((i, e))
+
+    def _job(i: int) -> tuple:
+        root = str(cache.root) if cache is not None else None
+        return (str(paths[i]), policy, algos, root, cache.max_bytes if cache else 0, pending[i])
+
+    def _done(i: int, result: CachedArchive | BaseException) -> tuple[int, CachedArchive | BaseException]:
+        key = pending.pop(i)
+        if isinstance(result, CachedArchive) and result.temporary:
+            _track_temp_dir(result.path.parent)  # creato nel processo figlio
+        if not isinstance(result, CachedArchive) or not result.key:
+            _unpin(cache, key)  # errore o archivio fuori cache: nulla da proteggere
+        return i, result
+
+    pool = None
+    futures: dict = {}
+    try:
+        yield from ready
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        if workers <= 1:
+            for i in list(pending):
+                try:
+                    result: CachedArchive | BaseException = _archive_worker(_job(i))
+                except Exception as e:
+                    result = e
+                yield _done(i, result)
+        elif pending:
+            from concurrent.futures import as_completed
+
+            # i processi figli non vedono il collettore delle metriche: uno span per il pool
+            with span("zip", folders=len(pending), pooled=True) as sp:
+                pool = _process_pool(workers)
+                futures = {pool.submit(_archive_worker, _job(i)): i for i in pending}
+                for fut in as_completed(list(futures)):
+                    i = futures.pop(fut)
+                    try:
+                        result = fut.result()
+                        sp["bytes"] += result.stats.get("input_bytes", 0)
+                    except Exception as e:
+                        result = e
+                    yield _done(i, result)
+    finally:
+        # consumatore uscito prima della fine: annulla le build e ripulisce quelle concluse
+        for fut in futures:
+            fut.cancel()
+        if pool is not None:
+            pool.shutdown(wait=True)
+        for fut, i in futures.items():
+            if not fut.cancelled() and fut.exception() is None:
+                release_archive(_done(i, fut.result())[1], cache)
+        for key in pending.values():
+            _unpin(cache, key)
+    if cache is not None:
+        cache.evict()
+
+
+def _unpin(cache: Optional[ArchiveCache], key: str) -> None:
+    if cache is not None and key:
+        cache.unpin(key)
+
+
+_default_archive_cache: Optional[ArchiveCache] = None
+
+
+def default_archive_cache() -> Optional[ArchiveCache]:
+    """
+    Cache degli archivi condivisa dal processo; None se disattivata (JFROG_ARCHIVE_CACHE=0
+    oppure JFROG_ARCHIVE_CACHE_MB=0) o se la cartella di stato non si può creare.
+    Limite di default 2048 MB.
+    """
+    global _default_archive_cache
+    if os.environ.get("JFROG_ARCHIVE_CACHE", "1") in ("0", "false", "False"):
+        return None
+    try:
+        max_mb = float(os.environ.get("JFROG_ARCHIVE_CACHE_MB") or 2048)
+    except ValueError:
+        max_mb = 2048
+    if max_mb <= 0:
+        return None
+    with _default_cache_lock:
+        if _default_archive_cache is None and "archives" not in _unavailable_caches:
+            try:
+                _default_archive_cache = ArchiveCache(max_bytes=int(max_mb * 1024 * 1024))
+            except OSError:  # cartella di stato non creabile: archivi temporanei (build_archive)
+                _unavailable_caches.add("archives")
+        return _default_archive_cache
+
+
+def checksums_of_file(
+    p: Path,
+    algos: tuple[str, ...] = ("sha1", "sha256"),
+    cache: Optional[ChecksumCache] = None,
+) -> dict[str, str]:
+    """
+    Calcola più digest (es. sha1 + sha256, opzionale md5) con UNA sola lettura del file.
+    Buffer preallocato riusato con readinto/memoryview: nessuna copia per chunk.
+    Con 'cache' i digest di un file non modificato vengono riusati senza rileggerlo.
+    Ritorna {"sha1": "...", "sha256": "..."}.
+    """
+    with span("hash", cached=False) as sp:
+        if cache is not None:
+            hit = cache.get(p, algos)
+            if hit is not None:
+                sp["cached"] = True
+                return hit
+        hashers = {a: hashlib.new(a) for a in algos}
+        buf = bytearray(HASH_BUFFER_SIZE)
+        view = memoryview(buf)
+        with Path(p).open("rb", buffering=0) as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                sp["bytes"] += n
+                chunk = view[:n]
+                for h in hashers.values():
+                    h.update(chunk)
+    digests = {a: h.hexdigest() for a, h in hashers.items()}
+    if cache is not None:
+        cache.put(p, digests)
+    return digests
+
+
+def _process_pool(workers: int):
+    """
+    Process pool senza fork: i chiamanti (batch, worker di serve) hanno altri thread attivi
+    e un fork ne copierebbe i lock nello stato in cui sono. forkserver dove c'è, altrimenti spawn.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+def _checksums_worker(args: tuple[str, tuple[str, ...], bool]) -> dict[str, str]:
+    path, algos, use_cache = args
+    return checksums_of_file(
+        Path(path), algos, cache=default_checksum_cache() if use_cache else None
+    )
+
+
+def checksums_of_files(
+    paths: list[Path],
+    algos: tuple[str, ...] = ("sha1", "sha256"),
+    workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> list[dict[str, str]]:
+    """
+    Digest di molti file su un process pool (un processo per core), nell'ordine di 'paths'.
+    Sotto una manciata di file il pool costa più di quanto fa risparmiare: hash inline.
+    """
+    jobs = [(str(p), algos, use_cache) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    if len(jobs) < 8 or workers == 1:
+        return [_checksums_worker(j) for j in jobs]
+    # i processi figli non vedono il collettore: un solo span per tutto il pool
+    with span("hash", files=len(jobs)) as sp, _process_pool(workers) as pool:
+        sp["bytes"] = sum(os.path.getsize(p) for p in paths)
+        return list(pool.map(_checksums_worker, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def list_files(root: Path) -> list[tuple[Path, str]]:
+    """File di una directory come (path locale, path relativo con '/'), in ordine stabile."""
+    root = Path(root)
+    out: list[tuple[Path, str]] = []
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            full = Path(dirpath) / name
+            out.append((full, full.relative_to(root).as_posix()))
+    return out
+
+
 def sha1_of_file(p: Path) -> str:
-    return _hash_of_file(p, "sha1")
+    return checksums_of_file(p, ("sha1",))["sha1"]
 
 
 def sha256_of_file(p: Path) -> str:
-    return _hash_of_file(p, "sha256")
+    return checksums_of_file(p, ("sha256",))["sha256"]
 
 
 def as_matrix_properties(props: dict[str, str] | None) -> str:
@@ -0,0 +1,98 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# i test importano jfrog_uploader dalla cartella python_helpers, come la CLI
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def unwritable_home(tmp_path, monkeypatch):
+    """HOME che non può contenere ~/.cache (è un file): state_dir() fallisce con OSError."""
+    from jfrog_uploader import utils
+
+    home = tmp_path / "home"
+    home.write_text("not a directory")
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.delenv("JFROG_UPLOADER_HOME", raising=False)
+    monkeypatch.setattr(utils, "_default_cache", None)
+    monkeypatch.setattr(utils, "_default_archive_cache", None)
+    monkeypatch.setattr(utils, "_unavailable_caches", set())
+    return home
+
+
+@pytest.fixture
+def fake_jazz():
+    """
+    Classe JazzClient con il trasporto simulato in memoria (_request): login con cookie di
+    sessione, sessione scadibile (authrequired), executionresult con Result ID derivato
+    dall'executionworkitem del body, allegati con Location progressiva.
+    """
+    import random
+    import re
+    import threading
+    import time
+
+    from requests.structures import CaseInsensitiveDict
+
+    from jazz_client import AUTH_MSG_HEADER, JazzClient, JazzResponse
+
+    class FakeJazzClient(JazzClient):
+        PASSWORD = "secret"
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.state = threading.Lock()
+            self.cookie = None
+            self.valid = set()
+            self.logins = 0
+            self.posts = []  # executionresult accettati, in ordine di arrivo
+            self.attachments = []
+            self.expireAfter = None  # scade la sessione al POST executionresult numero N
+            self.delay = 0.0
+
+        def expire(self):
+            with self.state:
+                self.valid.clear()
+
+        def _request(self, method, url, **kwargs):
+            headers = CaseInsensitiveDict()
+            if url.endswith("j_security_check"):
+                with self.state:
+                    self.logins += 1
+                    ok = kwargs["data"]["j_password"] == self.PASSWORD
+                    headers["Location"] = f"/qm/secure/identity?s={self.logins}" if ok else "/qm/auth/authfailed"
+                return JazzResponse(302, "Found", headers)
+            if "/secure/identity" in url:
+                with self.state:
+                    self.cookie = url.rsplit("=", 1)[1]
+                    self.valid.add(self.cookie)
+                return JazzResponse(200, "OK", headers)
+            with self.state:
+                authorized = self.cookie in self.valid
+            if self.delay:
+                time.sleep(random.uniform(0, self.delay))
+            if not authorized:
+                headers[AUTH_MSG_HEADER] = "authrequired"
+                return JazzResponse(200, "OK", headers, "<html>login</html>")
+            if "/attachment/" in url:
+                with self.state:
+                    self.attachments.append(kwargs["files"]["data"][0])
+                    headers["Location"] = f"{url}urn:com.ibm.rqm:attachment:{len(self.attachments)}"
+                return JazzResponse(201, "Created", headers)
+            if "/executionresult/" in url and method == "POST":
+                with self.state:
+                    if self.expireAfter is not None and len(self.posts) + 1 >= self.expireAfter:
+                        self.expireAfter = None
+                        self.valid.clear()
+                        headers[AUTH_MSG_HEADER] = "authrequired"
+                        return JazzResponse(200, "OK", headers, "<html>login</html>")
+                    workItem = re.search(r"executionworkitem:(\d+)", kwargs["data"].decode()).group(1)
+                    self.posts.append(workItem)
+                headers["Location"] = f"{url}urn:com.ibm.rqm:executionresult:9{workItem}"
+                text = f'<rqm:resultId xmlns:rqm="http://schema.ibm.com/rqm/2007#executionresult">9{workItem}</rqm:resultId>'
+                return JazzResponse(201, "Created", headers, text)
+            return JazzResponse(201 if method == "POST" else 200, "OK", headers, "")
+
+    return FakeJazzClient
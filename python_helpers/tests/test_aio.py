@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from jfrog_uploader import aio, utils
+from jfrog_uploader.fakeserver import FakeArtifactory
+
+pytest.importorskip("aiohttp")
+
+
+def _inputs(tmp_path):
+    folder = tmp_path / "report"
+    folder.mkdir()
+    (folder / "index.html").write_text("<p>PASS</p>" * 50)
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    return folder, results
+
+
+def test_async_upload_against_fake_server(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    folder, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        summary = asyncio.run(aio.upload_test_artifacts(
+            artifact_path=str(folder),
+            results_json_path=str(results),
+            dest="ws/run",
+            jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+            repo="repo",
+            timestamp="20260101000000",
+        ))
+        stored = sorted(p.rsplit("/", 2)[-2:] for _, p in srv.list_keys())
+    assert stored == [["run_20260101000000", "report.zip"], ["run_20260101000000", "results.json"]]
+    assert summary["stats"]["artifact"]["bytes_sent"] > 0
+
+
+def test_temp_zip_removed_when_hashing_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    folder, results = _inputs(tmp_path)
+    built = []
+
+    def build(*a, **k):
+        out = utils.build_archive(*a, **k)
+        built.append(out[0])
+        return out
+
+    def fail(*a, **k):
+        raise OSError("read error")
+
+    monkeypatch.setattr(aio, "build_archive", build)
+    monkeypatch.setattr(aio, "checksums_of_file", fail)
+    with pytest.raises(OSError):
+        asyncio.run(aio.upload_test_artifacts(
+            artifact_path=str(folder),
+            results_json_path=str(results),
+            dest="ws/run",
+            jfrog={"base_url": "http://127.0.0.1:9", "access_token": "x"},
+            repo="repo",
+            dry_run=True,
+        ))
+    assert built and not built[0].parent.exists()
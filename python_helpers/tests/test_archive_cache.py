@@ -0,0 +1,34 @@
+from jfrog_uploader import utils
+
+
+def _tree(tmp_path, name="report", size=4096):
+    folder = tmp_path / name
+    folder.mkdir()
+    (folder / "data.bin").write_bytes(bytes(range(256)) * (size // 256))
+    return folder
+
+
+def test_archive_in_use_survives_eviction_by_another_process(tmp_path):
+    root = tmp_path / "cache"
+    folder = _tree(tmp_path)
+    mine = utils.ArchiveCache(root)
+    other = utils.ArchiveCache(root, max_bytes=0)  # altro processo: pin non condivisi
+    with mine.use(folder) as entry:
+        assert entry.key and entry.path.parent.name.startswith(".use-")
+        expected = entry.path.read_bytes()
+        other.evict()
+        assert not (root / entry.key).exists()
+        assert entry.path.read_bytes() == expected
+    assert not entry.path.exists()  # hardlink privato rimosso a fine uso
+
+
+def test_cache_hit_returns_private_link(tmp_path):
+    root = tmp_path / "cache"
+    folder = _tree(tmp_path)
+    cache = utils.ArchiveCache(root)
+    with cache.use(folder) as first:
+        pass
+    with cache.use(folder) as second:
+        assert second.stats["cached"] is True
+        assert second.checksums == first.checksums
+        assert second.path != root / second.key / second.path.name
@@ -0,0 +1,24 @@
+import json
+import multiprocessing
+
+import pytest
+
+pytest.importorskip("requests")
+
+from jazz_client import AttachmentManager
+
+
+def _save_entries(args):
+    path, run = args
+    for j in range(10):
+        m = AttachmentManager(None, 1, path)
+        m._added[f"{run}-{j}"] = f"https://jazz/attachment/{run}/{j}"
+        m.close()
+
+
+def test_concurrent_saves_keep_every_entry(tmp_path):
+    path = str(tmp_path / "attachments.json")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        pool.map(_save_entries, [(path, run) for run in range(4)])
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 40
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from jazz_client import AttachmentManager, JazzResponse
+
+URL = "https://jazz/qm/attachment/"
+
+
+class CountingClient:
+    """uploadAttachment finto: conta le chiamate, può bloccarle o farle fallire."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+        self.fail = None  # None | "empty" | eccezione da sollevare
+
+    def uploadAttachment(self, url, path):
+        self.calls.append(path)
+        self.release.wait(5)
+        if isinstance(self.fail, BaseException):
+            raise self.fail
+        if self.fail == "empty":
+            return JazzResponse(error="refused")
+        return JazzResponse(201, "Created", {"Location": f"{url}{len(self.calls)}"})
+
+
+def _log(tmp_path, name="run.log", text="PASS\n"):
+    p = tmp_path / name
+    p.write_text(text)
+    return str(p)
+
+
+def test_same_file_uploaded_once_per_run(tmp_path):
+    client = CountingClient()
+    manager = AttachmentManager(client, workers=2)
+    log = _log(tmp_path)
+    first = manager.locations(URL, [log, log])
+    second = manager.locations(URL, [log])
+    manager.close()
+    assert len(client.calls) == 1
+    assert first == second * 2 == [URL + "1"] * 2
+    assert manager.stats == {"referenced": 3, "uploaded": 1, "reused": 2, "failed": 0}
+
+
+def test_reference_during_upload_waits_for_it(tmp_path):
+    client = CountingClient()
+    client.release.clear()
+    manager = AttachmentManager(client, workers=4)
+    log = _log(tmp_path)
+    futures = [manager._locationFuture(URL, log) for _ in range(3)]
+    assert len({id(f) for f in futures}) == 1  # stesso upload in volo
+    client.release.set()
+    assert [f.result() for f in futures] == [URL + "1"] * 3
+    manager.close()
+    assert len(client.calls) == 1
+
+
+def test_failures_are_not_remembered(tmp_path):
+    client = CountingClient()
+    manager = AttachmentManager(client, workers=1)
+    log = _log(tmp_path)
+    client.fail = "empty"
+    assert manager.locations(URL, [log]) == [""]
+    client.fail = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        manager.locations(URL, [log])
+    client.fail = None
+    assert manager.locations(URL, [log]) == [URL + "3"]
+    manager.close()
+    assert len(client.calls) == 3 and manager.stats["failed"] == 2 and not manager._inflight
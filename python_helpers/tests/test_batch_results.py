@@ -0,0 +1,46 @@
+from jfrog_uploader.fakeserver import FakeArtifactory
+from jfrog_uploader.uploader import upload_test_artifacts_batch
+
+
+def test_shared_results_uploaded_when_first_job_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    results = tmp_path / "results.json"
+    results.write_text('{"passed": 2}')
+    ok = tmp_path / "ok.txt"
+    ok.write_text("PASS\n")
+    jobs = [
+        {"artifact_path": str(tmp_path / "missing.txt"), "results_json_path": str(results), "dest": "ws/run"},
+        {"artifact_path": str(ok), "results_json_path": str(results), "dest": "ws/run"},
+        {"artifact_path": str(ok), "results_json_path": str(results), "dest": "ws/other"},
+    ]
+    with FakeArtifactory() as srv:
+        batch = upload_test_artifacts_batch(
+            jobs, jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0}, repo="repo"
+        )
+        stored = [p for _, p in srv.list_keys()]
+    assert [j["ok"] for j in batch["jobs"]] == [False, True, True]
+    assert sum(p.endswith("results.json") for p in stored) == 2  # una per cartella remota
+    assert batch["jobs"][1]["summary"]["stats"]["results"]["bytes_sent"] == results.stat().st_size
+
+
+def test_worker_shared_results_uploaded_when_first_job_fails(tmp_path, monkeypatch):
+    from jfrog_uploader.server import UploadWorker
+
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    monkeypatch.setattr("jfrog_uploader.server.current_datetime", lambda: "20260101000000")
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    ok = tmp_path / "ok.txt"
+    ok.write_text("PASS\n")
+    events = []
+    with FakeArtifactory() as srv:
+        worker = UploadWorker({"base_url": srv.base_url, "access_token": "x", "retries": 0}, "repo", workers=1)
+        for artifact in (tmp_path / "missing.txt", ok):
+            worker.submit(
+                {"artifact_path": str(artifact), "results_json_path": str(results), "dest": "ws/run"},
+                events.append,
+            )
+        worker.close(wait=True)
+        stored = [p for _, p in srv.list_keys()]
+    assert [e["ok"] for e in events if e["event"] == "result"] == [False, True]
+    assert sum(p.endswith("results.json") for p in stored) == 1
@@ -0,0 +1,33 @@
+from jfrog_uploader.fakeserver import FakeArtifactory
+from jfrog_uploader.uploader import upload_test_artifacts
+
+
+def _upload(srv, artifact, results, dest):
+    return upload_test_artifacts(
+        artifact_path=str(artifact),
+        results_json_path=str(results),
+        dest=dest,
+        jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+        repo="repo",
+        checksum_deploy=True,
+        use_checksum_cache=False,
+    )
+
+
+def test_known_content_skips_the_body_unknown_falls_back_to_put(tmp_path):
+    artifact = tmp_path / "report.bin"
+    artifact.write_bytes(b"same bytes" * 1000)
+    results = tmp_path / "results.json"
+    results.write_text('{"passed": 1}')
+    with FakeArtifactory() as srv:
+        first = _upload(srv, artifact, results, "ws/first")  # contenuto nuovo: 404 e PUT completo
+        received = srv.stats()["bytes_received"]
+        second = _upload(srv, artifact, results, "ws/second")  # stesso contenuto: solo checksum
+        stats = srv.stats()
+    size = artifact.stat().st_size
+    assert first["stats"]["artifact"] == {"size": size, "bytes_sent": size, "bytes_saved": 0, "checksum_deploy": False}
+    assert second["stats"]["artifact"] == {"size": size, "bytes_sent": 0, "bytes_saved": size, "checksum_deploy": True}
+    assert second["stats"]["results"]["checksum_deploy"] is True
+    assert stats["bytes_received"] == received  # nessun body nel secondo upload
+    assert stats["requests"]["PUT-checksum"] == 4 and stats["requests"]["PUT"] == 2
+    assert stats["files"] == 4
@@ -0,0 +1,30 @@
+import hashlib
+import os
+
+from jfrog_uploader.utils import HASH_BUFFER_SIZE, ChecksumCache, checksums_of_file
+
+ALGOS = ("sha1", "sha256", "md5")
+
+
+def _expected(data):
+    return {a: hashlib.new(a, data).hexdigest() for a in ALGOS}
+
+
+def test_digests_match_hashlib(tmp_path):
+    # più buffer pieni più un resto: copre il riuso del buffer e l'ultimo readinto parziale
+    data = os.urandom(3 * HASH_BUFFER_SIZE + 12345)
+    big = tmp_path / "big.bin"
+    big.write_bytes(data)
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert checksums_of_file(big, ALGOS) == _expected(data)
+    assert checksums_of_file(empty, ALGOS) == _expected(b"")
+
+
+def test_cached_digests_match_hashlib(tmp_path):
+    data = os.urandom(HASH_BUFFER_SIZE + 1)
+    p = tmp_path / "a.bin"
+    p.write_bytes(data)
+    cache = ChecksumCache(tmp_path / "checksums.sqlite")
+    assert checksums_of_file(p, ALGOS, cache=cache) == _expected(data)
+    assert checksums_of_file(p, ALGOS, cache=cache) == _expected(data)
@@ -0,0 +1,62 @@
+import os
+
+from jfrog_uploader.fakeserver import FakeArtifactory
+from jfrog_uploader.uploader import upload_test_artifacts
+
+
+def _inputs(tmp_path, size=5349):
+    artifact = tmp_path / "big.bin"
+    artifact.write_bytes(os.urandom(size))
+    results = tmp_path / "r.json"
+    results.write_text("{}")
+    return artifact, results
+
+
+def _upload(srv, artifact, results, **kwargs):
+    return upload_test_artifacts(
+        artifact_path=str(artifact),
+        results_json_path=str(results),
+        dest="ws/big",
+        jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+        repo="repo",
+        chunk_threshold=1024,
+        part_size=1024,
+        use_checksum_cache=False,
+        **kwargs,
+    )
+
+
+def test_chunked_stats_count_only_artifact_bytes(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    artifact, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        summary = _upload(srv, artifact, results)
+        parts = [p for _, p in srv.list_keys() if ".part-" in p]
+    assert summary["chunked"] is True
+    assert summary["artifact_url"].endswith("big.bin.parts.json")
+    assert len(parts) == 6
+    stats = summary["stats"]["artifact"]
+    assert stats["bytes_sent"] == stats["size"] == 5349
+    assert stats["bytes_saved"] == 0
+
+
+def test_retry_after_results_failure_resumes_without_409(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    artifact, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        real_put = srv.put
+
+        def put_failing_results(repo, path, item):
+            if path.endswith("r.json"):
+                raise ConnectionError("results JSON lost")
+            return real_put(repo, path, item)
+
+        srv.put = put_failing_results
+        try:
+            _upload(srv, artifact, results)
+        except Exception:
+            pass
+        srv.put = real_put
+        summary = _upload(srv, artifact, results)
+    assert summary["stats"]["artifact"]["bytes_sent"] == 0
+    assert summary["stats"]["results"]["bytes_sent"] == 2
@@ -0,0 +1,20 @@
+from jfrog_uploader import cli
+
+
+def test_invalid_numeric_env_falls_back_to_defaults(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    monkeypatch.setenv("JFROG_RETRIES", "four")
+    monkeypatch.setenv("JFROG_RATE_LIMIT_MBPS", "fast")
+    artifact = tmp_path / "a.txt"
+    artifact.write_text("PASS\n")
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    code = cli.main([
+        "--artifact_result", str(artifact),
+        "--json_result", str(results),
+        "--dest", "ws/run",
+        "--base-url", "http://127.0.0.1:9",
+        "--dry-run",
+    ])
+    assert code == 0
+    assert cli._env_number("JFROG_RETRIES", 4) == 4
@@ -0,0 +1,55 @@
+from jfrog_uploader import uploader
+from jfrog_uploader.fakeserver import FakeArtifactory
+
+
+def _track_clients(monkeypatch):
+    closed = []
+    real = uploader._client_from_config
+
+    def client_from_config(*args, **kwargs):
+        c = real(*args, **kwargs)
+        close = c.session.close
+        c.session.close = lambda: (closed.append(c), close())
+        closed.append(None)  # creato
+        return c
+
+    monkeypatch.setattr(uploader, "_client_from_config", client_from_config)
+    return closed
+
+
+def _inputs(tmp_path):
+    artifact = tmp_path / "a.txt"
+    artifact.write_text("PASS\n")
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    return artifact, results
+
+
+def test_single_upload_closes_its_own_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    events = _track_clients(monkeypatch)
+    artifact, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        summary = uploader.upload_test_artifacts(
+            artifact_path=str(artifact),
+            results_json_path=str(results),
+            dest="ws/run",
+            jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+            repo="repo",
+        )
+    assert summary["transport"]["requests"] > 0
+    assert events[0] is None and events[1] is not None and len(events) == 2
+
+
+def test_batch_closes_its_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    events = _track_clients(monkeypatch)
+    artifact, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        out = uploader.upload_test_artifacts_batch(
+            [{"artifact_path": str(artifact), "results_json_path": str(results), "dest": f"ws/{i}"} for i in range(3)],
+            jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+            repo="repo",
+        )
+    assert out["ok"] and out["transport"]["requests"] > 0
+    assert events[0] is None and events[1] is not None and len(events) == 2
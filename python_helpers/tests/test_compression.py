@@ -0,0 +1,28 @@
+import io
+import zipfile
+
+from jfrog_uploader.utils import CompressionPolicy, write_archive
+
+
+def test_level_chosen_per_extension_and_size():
+    policy = CompressionPolicy(level=6, levels={".txt": 9, ".log": 3}, large_file_threshold=1000, large_file_level=1)
+    assert policy.level_for("shot.PNG", 10) == 0  # già compresso: stored, anche in maiuscolo
+    assert policy.level_for("report.txt", 10) == 9
+    assert policy.level_for("huge.log", 10**6) == 3  # il livello per estensione vince sulla soglia
+    assert policy.level_for("data.bin", 10**6) == 1
+    assert policy.level_for("data.bin", 10) == 6
+    assert CompressionPolicy(level=0).level_for("a.txt", 10) == 0
+
+
+def test_archive_entries_follow_the_policy(tmp_path):
+    root = tmp_path / "report"
+    root.mkdir()
+    (root / "shot.png").write_bytes(b"\x89PNG" + bytes(1000))
+    (root / "log.txt").write_text("PASS\n" * 500)
+    buf = io.BytesIO()
+    stats = write_archive(buf, root, CompressionPolicy(levels={".txt": 9}))
+    with zipfile.ZipFile(buf) as zf:
+        types = {i.filename: i.compress_type for i in zf.infolist()}
+        assert zf.read("log.txt") == b"PASS\n" * 500
+    assert types == {"log.txt": zipfile.ZIP_DEFLATED, "shot.png": zipfile.ZIP_STORED}
+    assert (stats["stored_files"], stats["deflated_files"]) == (1, 1)
@@ -0,0 +1,53 @@
+import pytest
+
+from jfrog_uploader.fakeserver import FakeArtifactory
+from jfrog_uploader.uploader import UploadError, _client_from_config, upload_test_artifacts
+
+
+def _inputs(tmp_path):
+    folder = tmp_path / "report"
+    folder.mkdir()
+    for i in range(3):
+        (folder / f"f{i}.txt").write_text(f"PASS {i}\n")
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    return folder, results
+
+
+def _upload(srv, folder, results, **kwargs):
+    return upload_test_artifacts(
+        artifact_path=str(folder),
+        results_json_path=str(results),
+        dest="ws/delta",
+        jfrog={"base_url": srv.base_url, "access_token": "x", "retries": 0},
+        repo="repo",
+        delta=True,
+        **kwargs,
+    )
+
+
+def test_delta_dry_run_sends_no_requests(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    folder, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        summary = _upload(srv, folder, results, dry_run=True)
+        assert srv.counters == {}
+    assert summary["artifact_url"].endswith("report.manifest.json")
+
+
+def test_failed_latest_manifest_put_raises(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    folder, results = _inputs(tmp_path)
+    with FakeArtifactory() as srv:
+        client = _client_from_config({"base_url": srv.base_url, "access_token": "x", "retries": 0}, "repo")
+        real_put = client.put_file
+
+        def put_file(local_path, remote_path, *args, **kwargs):
+            if "_latest/" in remote_path:
+                return 503, remote_path
+            return real_put(local_path, remote_path, *args, **kwargs)
+
+        client.put_file = put_file
+        with pytest.raises(UploadError) as err:
+            _upload(srv, folder, results, client=client)
+    assert err.value.status == 503
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+pytest.importorskip("requests")
+
+from jazz_client import JazzClient, JazzResponse
+
+
+def test_login_succeeded_only_with_a_non_failure_location(fake_jazz):
+    client = fake_jazz("https://jazz.example/", "qm/")
+    assert client.loginSucceeded(client.login("user", "secret"))
+    assert not client.loginSucceeded(client.login("user", "wrong"))
+    assert not JazzClient.loginSucceeded(JazzResponse(200, "OK"))
+    assert client.generation == 2
+
+
+def test_result_id_and_auth_required_parsing(fake_jazz):
+    client = fake_jazz("https://jazz.example/", "qm/")
+    client.login("user", "secret")
+    body = '<ns2:executionresult><ns2:executionworkitem href="x/urn:com.ibm.rqm:executionworkitem:42"/>'
+    response = client.postXml("https://jazz.example/qm/service/res/P/executionresult/", body)
+    assert response.ok and response.statusCodeNum == "201" and response.resultId == "942"
+    client.expire()
+    response = client.postXml("https://jazz.example/qm/service/res/P/executionresult/", body)
+    assert response.authRequired and response.resultId == ""
+
+
+def test_concurrent_auth_required_triggers_a_single_login(fake_jazz):
+    client = fake_jazz("https://jazz.example/", "qm/")
+    client.login("user", "secret")
+    client.expire()
+    session = client.generation
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        client.reauthenticate(session)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert client.logins == 2 and client.generation == session + 1
+
+
+def test_network_error_is_status_zero():
+    client = JazzClient("http://127.0.0.1:9/", "qm/", timeout=(2, 2))
+    try:
+        response = client.get("http://127.0.0.1:9/qm/")
+    finally:
+        client.close()
+    assert response.status == 0 and response.statusCodeNum == "" and response.error
+
+
+def test_http_login_cookie_and_attachment_over_real_requests(tmp_path):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, status, headers=(), body=b""):
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            seen.append(("POST", self.path, self.headers.get("Cookie"), body))
+            if self.path.endswith("j_security_check"):
+                self._reply(302, [("Location", "/qm/secure/identity")])
+            else:
+                self._reply(201, [("Location", "/qm/attachment/1")])
+
+        def do_GET(self):
+            seen.append(("GET", self.path, self.headers.get("Cookie"), b""))
+            self._reply(200, [("Set-Cookie", "JSESSIONID=abc; Path=/")])
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    log = tmp_path / "run.log"
+    log.write_text("PASS\n")
+    client = JazzClient(base, "qm/")
+    try:
+        assert client.loginSucceeded(client.login("user", "secret"))
+        response = client.uploadAttachment(base + "qm/attachment/", str(log))
+    finally:
+        client.close()
+        httpd.shutdown()
+    assert response.status == 201 and response.location == "/qm/attachment/1"
+    assert [(m, p) for m, p, _, _ in seen] == [
+        ("POST", "/qm/j_security_check"), ("GET", "/qm/secure/identity"), ("POST", "/qm/attachment/")
+    ]
+    assert b"j_username=user" in seen[0][3]
+    assert seen[2][2] == "JSESSIONID=abc" and b'name="data"; filename="run.log"' in seen[2][3]
@@ -0,0 +1,162 @@
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("requests")
+
+import updateTCR
+from updateTCR import SEPARATOR, getEntryValue
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 1, 2, 3, 4, 5, 678901, tzinfo=tz)
+
+
+class FixedAttachments:
+    def locations(self, url, paths):
+        return [url + "urn:com.ibm.rqm:attachment:" + os.path.basename(p) for p in paths]
+
+
+@pytest.fixture(autouse=True)
+def fixed_clock(monkeypatch):
+    monkeypatch.setattr(updateTCR, "datetime", FixedDatetime)
+
+
+# --- implementazione precedente (replace() sui template), come riferimento ------------
+
+
+def oldServiceUrl(projectArea, streamID=None, resourceName="executionresult", resourceID=None):
+    urnID = ""
+    if resourceID is not None and len(resourceID) > 0:
+        urnID = getEntryValue("URN_ID").replace("<resource_name>", resourceName).replace("<resource_id>", resourceID)
+    cfgContext = ""
+    if streamID is not None and len(streamID) > 0:
+        cfgContext = getEntryValue("CONFIG_CONTEXT").replace("<stream_id>", streamID)
+    alias = projectArea.replace(" ", "+").replace("(", "%28").replace(")", "%29")
+    return getEntryValue("RESOURCE_URL_WITHOUT_GC").replace("<resource_name>", resourceName).replace("<project_area>", alias) + urnID + cfgContext
+
+
+def oldTCRContent(tcerInfo, projectArea, streamID, attachments):
+    content = [getEntryValue("VERSION"), getEntryValue("NS2_RESOURCE_OPEN_TAG").replace("<resource_name>", "executionresult")]
+    tcrName = tcerInfo["Name"] + "_" + FixedDatetime.now().strftime("%Y%m%d_%H%M%S")
+    content.append(getEntryValue("NS4_TITLE").replace("<title>", tcrName))
+    for c in [x for x in tcerInfo if "[Category]" in x]:
+        content.append(getEntryValue("NS2_CATEGORY").replace("<category_name>", c.replace("[Category]", "").strip()).replace("<category_value>", tcerInfo[c]))
+    others = {"executionworkitem": tcerInfo["ID"]}
+    for column, resource in (("Test Plan ID", "testplan"), ("Test Case ID", "testcase"),
+                             ("Build Record ID", "buildrecord"), ("Test Script ID", "remotescript")):
+        if column in tcerInfo and len(tcerInfo[column]) > 0:
+            others[resource] = tcerInfo[column]
+    for k, v in others.items():
+        resourceUrl = getEntryValue("RESOURCE_URL_WITHOUT_GC").replace("<project_area>", projectArea.replace(" ", "+").replace("(", "%28").replace(")", "%29")).replace("<resource_name>", k) + "urn:com.ibm.rqm:" + k + ":" + v
+        content.append(getEntryValue("NS2_RESOURCE_LINK").replace("<resource_url>", resourceUrl).replace("<resource_name>", k))
+    stateLabel = tcerInfo["Last Result"]
+    if len(stateLabel) > 0:
+        content.append(getEntryValue("NS2_STATE_LABEL").replace("<status_label>", stateLabel))
+        content.append(getEntryValue("NS6_STATE").replace("<status>", getEntryValue(stateLabel.upper())))
+    if len(tcerInfo.get("Log Path", "")) > 0:
+        logs = [x.replace("&", "&amp;").strip() for x in tcerInfo["Log Path"].split(SEPARATOR)]
+        url = oldServiceUrl(projectArea, streamID, "attachment")
+        locations = attachments.locations(url, logs)
+        if len(tcerInfo.get("Test Script ID", "")) > 0:
+            for location in locations:
+                content.append(getEntryValue("NS2_RESOURCE_LINK").replace("<resource_url>", location).replace("<resource_name>", "attachment"))
+        else:
+            content.append(getEntryValue("DETAILS_OPEN_TAG"))
+            for l, location in zip(logs, locations):
+                content.append(getEntryValue("DETAILS_LINK").replace("<link_path>", location).replace("<link_name>", os.path.basename(l)))
+            content.append(getEntryValue("DETAILS_CLOSE_TAG"))
+    content.append(getEntryValue("NS2_RESOURCE_CLOSE_TAG").replace("<resource_name>", "executionresult"))
+    return "".join(content)
+
+
+def oldTSRContent(suiteInfo, projectArea, suiteURL, testResults):
+    content = [getEntryValue("VERSION"), getEntryValue("NS2_RESOURCE_OPEN_TAG").replace("<resource_name>", "testsuitelog")]
+    content.append(getEntryValue("NS4_TITLE").replace("<title>", suiteInfo["Name"] + "_" + FixedDatetime.now().strftime("%Y%m%d_%H%M%S")))
+    stateLabel = suiteInfo.get("State", "")
+    if len(stateLabel) > 0:
+        content.append(getEntryValue("NS2_STATE_LABEL").replace("<status_label>", stateLabel))
+        content.append(getEntryValue("NS6_STATE").replace("<status>", getEntryValue(stateLabel.upper())))
+    content.append(f"<ns18:testcasestotal>{suiteInfo['Total Tests']}</ns18:testcasestotal>")
+    content.append(f"<ns18:testcasespassed>{suiteInfo['Total Pass']}</ns18:testcasespassed>")
+    content.append(f"<ns18:testcasesfailed>{suiteInfo['Total Fail']}</ns18:testcasesfailed>")
+    content.append(f"<ns18:testcasesblocked>{suiteInfo['Total Block']}</ns18:testcasesblocked>")
+    curTime = str(FixedDatetime.now(updateTCR.UTC).now()).replace(' ', 'T') + 'Z'
+    content.append(f"<ns18:starttime>{curTime}</ns18:starttime>")
+    content.append(f"<ns18:endtime>{curTime}</ns18:endtime>")
+    content.append("<ns18:suiteelements>")
+    for index, tcer in enumerate(suiteInfo["Test Case Execution Records"]):
+        content.append(f"<ns18:suiteelement><ns18:index>{index}</ns18:index>")
+        content.append(f"<ns18:executionworkitem href=\"{oldServiceUrl(projectArea, None, 'executionworkitem', tcer['ID'])}\"/>")
+        content.append(f"<ns18:testcase href=\"{oldServiceUrl(projectArea, None, 'testcase', tcer['Test Case ID'])}\"/>")
+        if len(tcer["Test Script ID"]) > 0:
+            content.append(f"<ns18:remotescript href=\"{oldServiceUrl(projectArea, None, 'remotescript', tcer['Test Script ID'])}\"/>")
+        content.append("</ns18:suiteelement>")
+        planID, buildID = tcer["Test Plan ID"], tcer["Build Record ID"]
+    content.append("</ns18:suiteelements>")
+    for testResult in testResults:
+        content.append(f"<ns2:executionresult href=\"{oldServiceUrl(projectArea, None, 'executionresult', testResult)}\"/>")
+    content.append(f"<ns2:suiteexecutionrecord href=\"{oldServiceUrl(projectArea, None, 'suiteexecutionrecord', suiteInfo['Suite ID'])}\"/>")
+    if suiteURL is not None:
+        content.append(f"<ns2:testsuite href=\"{suiteURL}\"/>")
+    content.append(f"<ns2:testplan href=\"{oldServiceUrl(projectArea, None, 'testplan', planID)}\"/>")
+    content.append(f"<ns2:buildrecord href=\"{oldServiceUrl(projectArea, None, 'buildrecord', buildID)}\"/>")
+    content.append(getEntryValue("NS2_RESOURCE_CLOSE_TAG").replace("<resource_name>", "testsuitelog"))
+    return "".join(content)
+
+
+def record(i, **overrides):
+    r = {
+        "ID": str(100 + i), "Name": f"TC_{i}", "Test Suite Execution Record ID": "10",
+        "Test Suite Execution Records": "Suite_10", "Last Result": ("Passed", "Failed", "Blocked")[i % 3],
+        "Test Plan ID": "42", "Test Case ID": str(500 + i), "Build Record ID": "7",
+        "Test Script ID": "" if i % 2 else str(300 + i), "Log Path": f"logs/tc_{i}.log;logs/suite.log",
+        "[Category] Platform": "linux-x86_64",
+    }
+    r.update(overrides)
+    return r
+
+
+@pytest.mark.parametrize("i", range(4))
+def test_tcr_body_matches_previous_implementation(i):
+    tcer = record(i)
+    new = updateTCR.generateTCRContent(tcer, "HHS (Test)", "_stream01", FixedAttachments())
+    assert new and new == oldTCRContent(tcer, "HHS (Test)", "_stream01", FixedAttachments())
+
+
+def test_tsr_body_matches_previous_implementation(capsys):
+    tcers = [record(i) for i in range(5)]
+    [suite] = updateTCR.getTestSuites(tcers).values()
+    results = ["9100", "9101"]
+    new = updateTCR.generateTSRContent(suite, "HHS (Test)", "https://jazz/testsuite/1", results)
+    assert new and new == oldTSRContent(suite, "HHS (Test)", "https://jazz/testsuite/1", results)
+
+
+def test_special_characters_are_escaped():
+    tcer = record(1, **{"Name": 'Limits <"max"> & recovery', "[Category] Owner <team>": 'R&D "core"'})
+    body = updateTCR.generateTCRContent(tcer, "HHS (Test)", None, FixedAttachments())
+    root = ET.fromstring(body.encode("utf-8"))
+    title = root.find("{http://purl.org/dc/elements/1.1/}title").text
+    assert title.startswith('Limits <"max"> & recovery_')
+    categories = {c.get("term"): c.get("value") for c in root.iter("{http://jazz.net/xmlns/alm/qm/v0.1/}category")}
+    assert categories["Owner <team>"] == 'R&D "core"'
+
+
+def test_template_keeps_literals_and_repeated_fields():
+    from jazz_xml import Template
+
+    t = Template('<a x="{<v>}"><p><v>|<w></p></a>', ("v", "w"))
+    assert t.fields == ("v", "w")
+    assert t.render("1&2", "<") == '<a x="{1&amp;2}"><p>1&amp;2|&lt;</p></a>'
+    assert t.bind(w="W").fill(v="raw&") == '<a x="{raw&}"><p>raw&|W</p></a>'
+
+
+def test_attachment_id_column_links_an_existing_attachment():
+    linked = updateTCR.generateTCRContent(record(1, **{"Attachment ID": "77"}), "HHS (Test)", None, FixedAttachments())
+    assert 'attachment href="' in linked and "urn:com.ibm.rqm:attachment:77" in linked
+    empty = updateTCR.generateTCRContent(record(1, **{"Attachment ID": ""}), "HHS (Test)", None, FixedAttachments())
+    assert empty and "urn:com.ibm.rqm:attachment:77" not in empty
@@ -0,0 +1,32 @@
+from jfrog_uploader.fakeserver import FakeArtifactory
+from jfrog_uploader.jobqueue import UploadQueue, drain
+
+
+def _queue(tmp_path):
+    artifact = tmp_path / "a.txt"
+    artifact.write_text("PASS\n")
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    return UploadQueue(tmp_path / "q" / "jobs.sqlite"), artifact, results
+
+
+def test_drain_leaves_jobs_of_another_server(tmp_path):
+    queue, artifact, results = _queue(tmp_path)
+    with FakeArtifactory() as srv:
+        jfrog = {"base_url": srv.base_url, "access_token": "x", "retries": 0}
+        other = queue.enqueue(str(artifact), str(results), "ws/a", repo="repo", base_url="http://elsewhere:8081/")
+        mine = queue.enqueue(str(artifact), str(results), "ws/b", repo="repo", base_url=srv.base_url + "/")
+        summary = drain(queue, jfrog, workers=1, wait=True)
+    assert summary["attempted"] == 1
+    assert queue.get(mine)["status"] == "done"
+    assert queue.get(other)["status"] == "pending" and queue.get(other)["attempts"] == 0
+
+
+def test_completion_after_lost_lease_is_not_counted(tmp_path, monkeypatch):
+    queue, artifact, results = _queue(tmp_path)
+    monkeypatch.setattr(UploadQueue, "complete", lambda self, job_id, owner, summary: False)
+    with FakeArtifactory() as srv:
+        jfrog = {"base_url": srv.base_url, "access_token": "x", "retries": 0}
+        queue.enqueue(str(artifact), str(results), "ws/a", repo="repo", base_url=srv.base_url)
+        summary = drain(queue, jfrog, workers=1, wait=False)
+    assert (summary["succeeded"], summary["lost"]) == (0, 1)
@@ -0,0 +1,13 @@
+from jfrog_uploader import client as client_mod
+from jfrog_uploader.client import JFrogClient
+
+
+def test_listing_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(client_mod, "LISTING_CACHE_SIZE", 16)
+    c = JFrogClient("http://127.0.0.1:9", "repo", listing_ttl=60)
+    monkeypatch.setattr(c, "stat", lambda path: (404, None))
+    for i in range(100):
+        assert c._children(f"ws/run_{i}") == (True, None)
+    assert len(c._listings) == 16
+    assert "ws/run_99" in c._listings and "ws/run_0" not in c._listings
+    assert len(c._listing_locks) == client_mod.LISTING_LOCK_STRIPES
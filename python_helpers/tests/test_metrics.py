@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from jfrog_uploader import metrics
+from jfrog_uploader.metrics import Metrics, bind, span
+
+
+def test_spans_in_pool_threads_reach_the_caller_collector():
+    events = []
+    sink = metrics.register_metrics_sink(events.append)
+
+    def work(i):
+        with span("put", nbytes=100, path=f"f{i}"):
+            assert metrics.current() is collector
+        return i
+
+    try:
+        collector = Metrics(dest="ws/run")
+        with collector.activate():
+            with span("hash", nbytes=10):
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    assert sorted(pool.map(bind(work), range(8))) == list(range(8))
+                    # senza bind i thread del pool non vedono il collettore
+                    assert pool.submit(metrics.current).result() is None
+    finally:
+        metrics.unregister_metrics_sink(sink)
+    timings = collector.timings()
+    assert timings["put"]["count"] == 8 and timings["put"]["bytes"] == 800
+    assert timings["hash"]["count"] == 1 and timings["hash"]["bytes"] == 10
+    # lo span esterno contiene quelli del pool
+    assert timings["hash"]["seconds"] >= max(e["seconds"] for e in events if e["phase"] == "put")
+    assert {e["path"] for e in events if e["phase"] == "put"} == {f"f{i}" for i in range(8)}
+    assert all(e["dest"] == "ws/run" for e in events)
+    assert metrics.current() is None
+
+
+def test_span_without_collector_is_a_no_op():
+    with span("zip", nbytes=5) as sp:
+        sp["bytes"] = 7
+    assert metrics.current() is None
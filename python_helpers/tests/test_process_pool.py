@@ -0,0 +1,45 @@
+import hashlib
+import threading
+
+from jfrog_uploader import utils
+
+
+def test_process_pool_does_not_fork():
+    with utils._process_pool(2) as pool:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_checksums_of_files_from_a_worker_thread(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    paths = []
+    for i in range(10):
+        p = tmp_path / f"f{i}.bin"
+        p.write_bytes(bytes([i]) * 1000)
+        paths.append(p)
+    out = []
+    t = threading.Thread(target=lambda: out.append(utils.checksums_of_files(paths, workers=2, use_cache=False)))
+    t.start()
+    t.join()
+    assert [d["sha256"] for d in out[0]] == [hashlib.sha256(p.read_bytes()).hexdigest() for p in paths]
+
+
+def test_archive_many_from_a_worker_thread(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    folders = []
+    for i in range(3):
+        d = tmp_path / f"report{i}"
+        d.mkdir()
+        (d / "index.html").write_text(f"<p>{i}</p>" * 100)
+        folders.append(d)
+    out = []
+
+    def run():
+        for i, entry in utils.archive_many(folders, workers=2):
+            out.append((i, entry))
+            utils.release_archive(entry, None)
+
+    t = threading.Thread(target=run)
+    t.start()
+    t.join()
+    assert sorted(i for i, _ in out) == [0, 1, 2]
+    assert all(isinstance(e, utils.CachedArchive) for _, e in out)
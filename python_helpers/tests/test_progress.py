@@ -0,0 +1,60 @@
+import io
+
+from jfrog_uploader.progress import PROGRESS_CHUNK, ProgressBody, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_paces_to_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, burst=500, clock=clock, sleep=clock.sleep)
+    assert bucket.consume(500) == 0.0  # il burst iniziale passa subito
+    for _ in range(4):
+        bucket.consume(500)
+    assert clock.now == 2.0  # 2500 byte a 1000 B/s, meno 500 di burst
+    assert clock.slept == [0.5, 0.5, 0.5, 0.5]
+
+
+def test_token_bucket_refills_while_idle():
+    clock = FakeClock()
+    bucket = TokenBucket(1000, burst=1000, clock=clock, sleep=clock.sleep)
+    bucket.consume(1000)
+    clock.now += 10  # inattivo a lungo: non accumula oltre la capacità
+    assert bucket.consume(1000) == 0.0
+    assert bucket.consume(500) == 0.5
+
+
+def test_progress_body_counts_bytes_and_restarts_on_seek():
+    data = b"x" * (PROGRESS_CHUNK * 2 + 10)
+    events = []
+    body = ProgressBody(io.BytesIO(data), name="a.bin", callback=events.append, interval=3600)
+    assert len(body) == len(data)
+    assert b"".join(body) == data
+    assert body.sent == len(data)
+    # primo blocco subito, poi nulla fino all'evento finale (intervallo lungo)
+    assert [(e["bytes_sent"], e["done"]) for e in events] == [(PROGRESS_CHUNK, False), (len(data), True)]
+    assert events[-1] == {"event": "progress", "path": "a.bin", "bytes_sent": len(data), "total": len(data), "done": True}
+    body.seek(0)  # retry del transport: il conteggio riparte
+    assert body.sent == 0
+    body.read(100)
+    assert body.sent == 100 and len(events) == 2  # nessun evento intermedio entro 'interval'
+
+
+def test_progress_body_respects_the_limiter():
+    clock = FakeClock()
+    bucket = TokenBucket(PROGRESS_CHUNK, burst=PROGRESS_CHUNK, clock=clock, sleep=clock.sleep)
+    body = ProgressBody(io.BytesIO(b"y" * PROGRESS_CHUNK * 3), limiter=bucket)
+    while body.read(PROGRESS_CHUNK):
+        pass
+    assert clock.now == 2.0
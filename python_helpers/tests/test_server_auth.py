@@ -0,0 +1,89 @@
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from jfrog_uploader.server import UploadWorker, serve_socket
+
+
+class _Ready:
+    """Cattura l'evento "ready" stampato da serve_socket."""
+
+    def __init__(self, capsys):
+        self._capsys = capsys
+
+    def wait(self):
+        for _ in range(200):
+            out = self._capsys.readouterr().out
+            if out:
+                return json.loads(out.splitlines()[0])
+            time.sleep(0.01)
+        raise AssertionError("server not ready")
+
+
+def _start(tmp_path, monkeypatch, **kwargs):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    worker = UploadWorker({"base_url": "http://127.0.0.1:9", "access_token": "x"}, "repo", workers=1)
+    t = threading.Thread(target=serve_socket, args=(worker,), kwargs=kwargs, daemon=True)
+    t.start()
+    return worker, t
+
+
+def _session(sock, *requests):
+    f = sock.makefile("rwb")
+    out = []
+    for r in requests:
+        f.write((json.dumps(r) + "\n").encode())
+        f.flush()
+        line = f.readline()
+        if not line:
+            break
+        out.append(json.loads(line))
+    return out
+
+
+def _shutdown(address, token=None):
+    host, port = address.split(":")
+    with socket.create_connection((host, int(port))) as s:
+        _session(s, *([{"op": "auth", "token": token}] if token else []), {"op": "shutdown"})
+
+
+def test_tcp_requires_token(tmp_path, monkeypatch, capsys):
+    _, t = _start(tmp_path, monkeypatch, port=0)
+    ready = _Ready(capsys).wait()
+    host, port = ready["address"].split(":")
+    token_file = ready["token_file"]
+    assert stat.S_IMODE(os.stat(token_file).st_mode) == 0o600
+    token = open(token_file).read()
+
+    with socket.create_connection((host, int(port))) as s:
+        replies = _session(s, {"op": "ping"}, {"op": "ping"})
+    assert replies == [{"event": "error", "error": "Authentication required"}]
+
+    with socket.create_connection((host, int(port))) as s:
+        replies = _session(s, {"op": "auth", "token": "wrong"})
+    assert replies[0]["event"] == "error"
+
+    with socket.create_connection((host, int(port))) as s:
+        replies = _session(s, {"op": "auth", "token": token}, {"op": "ping", "id": 1})
+    assert [r["event"] for r in replies] == ["authenticated", "pong"]
+
+    _shutdown(ready["address"], token)
+    t.join(5)
+    assert not os.path.exists(token_file)
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets only")
+def test_unix_socket_is_private(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "w.sock")
+    _, t = _start(tmp_path, monkeypatch, path=path)
+    _Ready(capsys).wait()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with socket.socket(socket.AF_UNIX) as s:
+        s.connect(path)
+        assert _session(s, {"op": "shutdown"})[0]["event"] == "shutdown"
+    t.join(5)
@@ -0,0 +1,34 @@
+from jfrog_uploader import server
+from jfrog_uploader.fakeserver import FakeArtifactory
+
+
+def test_worker_reuses_and_closes_one_client_per_repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("JFROG_UPLOADER_HOME", str(tmp_path / "state"))
+    created = []
+    real = server._client_from_config
+
+    def client_from_config(jfrog, repo, **kwargs):
+        c = real(jfrog, repo, **kwargs)
+        c.closed = False
+        close = c.session.close
+        c.session.close = lambda: (setattr(c, "closed", True), close())
+        created.append(c)
+        return c
+
+    monkeypatch.setattr(server, "_client_from_config", client_from_config)
+    results = tmp_path / "results.json"
+    results.write_text("{}")
+    events = []
+    with FakeArtifactory() as srv:
+        worker = server.UploadWorker({"base_url": srv.base_url, "access_token": "x", "retries": 0}, "main", workers=2)
+        for i in range(4):
+            artifact = tmp_path / f"a{i}.txt"
+            artifact.write_text("PASS\n")
+            worker.submit(
+                {"artifact_path": str(artifact), "results_json_path": str(results), "dest": f"ws/{i}", "repo": "other"},
+                events.append,
+            )
+        worker.close(wait=True)
+    assert [e["ok"] for e in events if e["event"] == "result"] == [True] * 4
+    assert sorted(c.repo for c in created) == ["main", "other"]
+    assert all(c.closed for c in created)
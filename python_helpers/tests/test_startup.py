@@ -0,0 +1,16 @@
+import json
+
+from jfrog_uploader import startup
+
+
+def test_cli_startup_within_budget(tmp_path, capsys):
+    report = tmp_path / "startup.json"
+    code = startup.main(["--runs", "3", "--json", str(report)])
+    rows = {r["scenario"]: r for r in json.loads(report.read_text())["results"]}
+    assert set(rows) == {"help", "dry-run"}
+    assert rows["help"]["budget_ms"] == 60 and rows["dry-run"]["budget_ms"] == 150
+    for r in rows.values():
+        assert r["exit_code"] == 0, r
+        assert r["forbidden_imports"] == [], r
+        assert r["within_budget"], r
+    assert code == 0
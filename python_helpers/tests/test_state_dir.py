@@ -0,0 +1,44 @@
+from jfrog_uploader import utils
+from jfrog_uploader.uploader import upload_test_artifacts
+
+JFROG = {"base_url": "http://127.0.0.1:9", "token": "t"}
+
+
+def test_checksum_cache_disabled_when_state_dir_unwritable(unwritable_home):
+    assert utils.default_checksum_cache() is None
+    assert utils.default_checksum_cache() is None  # nessun nuovo tentativo
+
+
+def test_file_dry_run_without_checksum_cache(unwritable_home, tmp_path):
+    artifact = tmp_path / "a.txt"
+    artifact.write_text("PASS\n")
+    results = tmp_path / "r.json"
+    results.write_text("{}")
+    summary = upload_test_artifacts(
+        artifact_path=str(artifact),
+        results_json_path=str(results),
+        dest="ws/check",
+        jfrog=JFROG,
+        repo="repo",
+        dry_run=True,
+        use_archive_cache=False,
+    )
+    assert summary["checksums"]["artifact"]["sha256"] == utils.checksums_of_file(artifact)["sha256"]
+
+
+def test_directory_dry_run_without_any_cache(unwritable_home, tmp_path):
+    folder = tmp_path / "report"
+    folder.mkdir()
+    (folder / "log.txt").write_text("PASS\n" * 100)
+    results = tmp_path / "r.json"
+    results.write_text("{}")
+    summary = upload_test_artifacts(
+        artifact_path=str(folder),
+        results_json_path=str(results),
+        dest="ws/check",
+        jfrog=JFROG,
+        repo="repo",
+        dry_run=True,
+    )
+    assert utils.default_archive_cache() is None
+    assert summary["archive"]["files"] == 1
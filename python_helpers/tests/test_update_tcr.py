@@ -0,0 +1,59 @@
+import csv
+
+import pytest
+
+pytest.importorskip("requests")
+
+import updateTCR
+
+HEADER = ["ID", "Name", "Test Suite Execution Record ID", "Test Suite Execution Records", "Last Result",
+          "Test Plan ID", "Test Case ID", "Build Record ID", "Test Script ID", "Log Path", "[Category] Platform"]
+
+
+def _csv(tmp_path, records=12):
+    shared = tmp_path / "suite.log"
+    shared.write_text("suite log\n")
+    path = tmp_path / "tcers.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(HEADER)
+        for i in range(records):
+            w.writerow([str(100 + i), f"TC_{i}", str(10 + i % 3), f"Suite_{i % 3}", "Passed" if i % 4 else "Failed",
+                        "42", str(500 + i), "7", "", str(shared), "linux"])
+    return path
+
+
+def test_concurrent_publish_keeps_input_order(tmp_path, monkeypatch, capsys, fake_jazz):
+    clients = []
+
+    def client(*args, **kwargs):
+        c = fake_jazz(*args, **kwargs)
+        c.delay = 0.01  # completamento fuori ordine
+        c.expireAfter = 4  # sessione scaduta a metà run
+        clients.append(c)
+        return c
+
+    suites = []
+    monkeypatch.setattr(updateTCR, "JazzClient", client)
+    monkeypatch.setattr(updateTCR, "updateTSR", lambda tcers, pa, stream, resultDict, c: suites.append(dict(resultDict)))
+    csvFile = _csv(tmp_path)
+
+    updateTCR.updateTCR(str(csvFile), "HHS (Test)", None, "user", "secret", retries=2,
+                        exportOutputFile=True, updateSuite=True, workers=4)
+
+    out = capsys.readouterr().out
+    assert "COMPLETED!!!" in out and "Error:" not in out
+    ids = [line.split(": ", 1)[1] for line in out.splitlines() if line.startswith("TCER ID: ")]
+    assert ids == [str(100 + i) for i in range(12)]
+
+    c = clients[0]
+    assert c.logins == 2  # login iniziale + un solo re-login per la sessione scaduta
+    assert sorted(c.posts) == [str(100 + i) for i in range(12)]
+    assert c.attachments == ["suite.log"]  # log condiviso caricato una volta
+
+    [output] = tmp_path.glob("tcers_output_*.csv")
+    with open(output, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["ID"] for r in rows] == [str(100 + i) for i in range(12)]
+    assert all(r["Upload Result Status"] == "PASS" and r["Result ID"] == "9" + r["ID"] for r in rows)
+    assert suites == [{"9" + str(100 + i): str(10 + i % 3) for i in range(12)}]
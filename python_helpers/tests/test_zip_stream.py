@@ -0,0 +1,67 @@
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+
+import pytest
+
+from jfrog_uploader import utils
+from jfrog_uploader.utils import build_archive, zip_to_stream
+
+
+@pytest.fixture
+def report(tmp_path):
+    root = tmp_path / "report"
+    (root / "sub").mkdir(parents=True)
+    (root / "log.txt").write_text("PASS\n" * 2000)
+    (root / "sub" / "blob.bin").write_bytes(os.urandom(200_000))
+    return root
+
+
+@pytest.mark.parametrize("spool_max_size", [utils.SPOOL_MAX_SIZE, 1024])
+def test_stream_digests_match_the_zip_bytes(report, spool_max_size):
+    # 1024: lo spool passa su disco a metà archivio, i digest devono restare quelli dei byte scritti
+    body, sums, stats = zip_to_stream(report, ("sha1", "sha256", "md5"), spool_max_size)
+    with body:
+        data = body.read()
+    assert sums == {a: hashlib.new(a, data).hexdigest() for a in sums}
+    assert stats["output_bytes"] == len(data)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.read("log.txt") == b"PASS\n" * 2000
+        assert zf.getinfo("sub/blob.bin").file_size == 200_000
+
+
+def _failing_write_archive(real):
+    def write_archive(f, path, policy=None):
+        real(f, path, policy)
+        raise OSError("disk full")
+
+    return write_archive
+
+
+def test_stream_closes_the_spool_on_error(report, monkeypatch):
+    opened = []
+    real_tempfile = tempfile.TemporaryFile
+
+    def tracking_tempfile(*args, **kwargs):
+        f = real_tempfile(*args, **kwargs)
+        opened.append(f)
+        return f
+
+    monkeypatch.setattr(utils.tempfile, "TemporaryFile", tracking_tempfile)
+    monkeypatch.setattr(utils, "write_archive", _failing_write_archive(utils.write_archive))
+    with pytest.raises(OSError, match="disk full"):
+        zip_to_stream(report, spool_max_size=1024)
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_build_archive_removes_its_temp_dir_on_error(report, tmp_path, monkeypatch):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    monkeypatch.setattr(utils, "write_archive", _failing_write_archive(utils.write_archive))
+    with pytest.raises(OSError, match="disk full"):
+        build_archive(report)
+    assert list(scratch.iterdir()) == []
+    assert not any(d.startswith(str(scratch)) for d in utils._temp_dirs)
@@ -7,22 +7,26 @@
 from enum import Enum
 from datetime import datetime, timezone
 UTC = timezone.utc
-import subprocess
-import tempfile
 import csv, os, re, sys
 import optparse
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import lru_cache
+from jazz_client import AttachmentManager, JazzClient
+from jazz_xml import ServiceUrls, XmlTemplates
 #########################################
 
 
 # VARIABLES
-# TEMP_DATA_FILE = tempfile.gettempdir() + "\\data.xml"
-# TEMP_COOKIE_FILE = tempfile.gettempdir() + "\\cookie.txt"
-TEMP_DATA_FILE = os.path.join(tempfile.gettempdir(), "data.xml")
-TEMP_COOKIE_FILE = os.path.join(tempfile.gettempdir(), "cookie.txt")
-
+# request bodies are sent from memory and cookies live in the JazzClient session:
+# no shared temp files, so several pushes can run side by side on one host
 SEPARATOR = ";"
 
+# per-thread log buffer: with --workers > 1 each record prints its lines in one block, in input order
+_logBuffer = threading.local()
+
 
 #########################################
 class Entries(Enum):
@@ -49,14 +53,6 @@ class Entries(Enum):
     DETAILS_CLOSE_TAG = "</div></details>"
     DETAILS_OPEN_TAG = "<details xmlns=\"http://jazz.net/xmlns/alm/qm/v0.1/executionresult/v0.1\"><div xmlns=\"http://www.w3.org/1999/xhtml\">"
     NS2_RESOURCE_CLOSE_TAG = "</ns2:<resource_name>>"
-    # AUTHENTICATE_COMMAND = "curl -d \"j_username=<user_name>\" -d \"j_password=<password>\" \"" + URL + CONTEXT + "j_security_check\" -c \"<cookie_file>\" -s -i"
-    # CREATE_COMMAND = "curl -b \"<cookie_file>\" --data @<data_xml_file> \"<url>\" -s -i"
-    # ATTACHMENT_COMMAND = "curl -b \"<cookie_file>\" -F \"data=@<attachment_file>\" \"<url>\" -s -i"
-    # GET_COMMAND = "curl -b \"<cookie_file>\" -X GET \"<url>\" -s"
-    AUTHENTICATE_COMMAND = "curl -k -L -d \"j_username=<user_name>\" -d \"j_password=<password>\" \"" + URL + CONTEXT + "j_security_check\" -c \"<cookie_file>\" -s -i"
-    CREATE_COMMAND = "curl -k -L -b \"<cookie_file>\" --data @<data_xml_file> \"<url>\" -s -i"
-    ATTACHMENT_COMMAND = "curl -k -L -b \"<cookie_file>\" -F \"data=@<attachment_file>\" \"<url>\" -s -i"
-    GET_COMMAND = "curl -k -L -b \"<cookie_file>\" -X GET \"<url>\" -s"
     PASSED = "com.ibm.rqm.execution.common.state.passed"
     FAILED = "com.ibm.rqm.execution.common.state.failed"
     BLOCKED = "com.ibm.rqm.execution.common.state.blocked"
@@ -68,13 +64,19 @@ class Entries(Enum):
     DEFFERED = "com.ibm.rqm.execution.common.state.deferred"
     
 
-class ResponsesPatterns(Enum):
-    STATUS_CODE_NUM = r"(?<=HTTP/1.1 )\d+"
-    STATUS_CODE_FULL = r"(?<=HTTP/1.1 )[0-9A-Za-z ]+"
-    CONTENT_LOCATION = r"(?<=Content-Location: )[0-9A-Za-z_/:\-]+"
-    LOCATION = r"(?<=\nLocation: )[0-9A-Za-z_/:.\+\%\-]+"
-    RESULT_ID = r"(?<=\<rqm:resultId xmlns:rqm\=\"http://schema.ibm.com/rqm/2007\#executionresult\"\>)\d+"
+def log(message):
+    lines = getattr(_logBuffer, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(message)
 
+def runBuffered(fn, *args):
+    _logBuffer.lines = []
+    try:
+        return fn(*args), _logBuffer.lines
+    finally:
+        _logBuffer.lines = None
 
 def getEntryValue(k):
     try:
@@ -151,72 +153,34 @@ def getTestSuites(tcers):
         r[suiteID] = d
     return r
 
-# def runCommand(command):
-#     output = ""
-#     if len(command) > 0:
-#         proc=subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, )
-#         output = proc.communicate()[0].decode() 
-#         print("Output CMD: " + output)           
-#     return output
+# XML fragments compiled once per run from Entries; values are escaped by the templates
+TEMPLATES = XmlTemplates(Entries)
 
-def runCommand(command):
-    if not command:
-        return ""
-    proc = subprocess.Popen(
-        command,
-        shell=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    out, err = proc.communicate()
-
-    out = out.decode(errors="ignore")
-    err = err.decode(errors="ignore")
-
-    if err.strip():
-        print("STDERR:", err)  # <-- NOW YOU CAN SEE REAL ERROR
-    return out
-
-def parseResponse(response):
-    r = {}
-    for item in ResponsesPatterns:
-        k = item.name.lower().replace("_", " ")
-        v = item.value
-        value = ""
-        m = re.search(v, response)
-        if m is not None:
-            value = m.group(0).strip()            
-        r[k] = value    
-    return r
+@lru_cache(maxsize=None)
+def getServiceUrls(projectArea, streamID=None):
+    """Project area alias, resource URL prefixes and stream configuration, computed once."""
+    return ServiceUrls(Entries, projectArea, streamID)
 
 def getProjectAreaAlias(projectArea):
-    return projectArea.replace(" ", "+").replace("(", "%28").replace(")", "%29")
+    return getServiceUrls(projectArea).alias
 
 def generateServiceUrl(projectArea, streamID=None, resourceName="executionresult", resourceID=None):
-    urnID = ""
-    if resourceID is not None and len(resourceID) > 0:
-        urnID = getEntryValue("URN_ID").replace("<resource_name>", resourceName).replace("<resource_id>", resourceID)
-    cfgContext = ""
-    if streamID is not None and len(streamID) > 0:
-        cfgContext = getEntryValue("CONFIG_CONTEXT").replace("<stream_id>", streamID)
-    
-    URL = getEntryValue("RESOURCE_URL_WITHOUT_GC").replace("<resource_name>", resourceName).replace("<project_area>", getProjectAreaAlias(projectArea)) + urnID + cfgContext
-    return URL
+    return getServiceUrls(projectArea, streamID or None).url(resourceName, resourceID)
 
-def generateTCRContent(tcerInfo, projectArea, streamID=""):    
+def generateTCRContent(tcerInfo, projectArea, streamID="", attachments=None):    
     try:
+        urls = getServiceUrls(projectArea)
         content = []
-        content.append(getEntryValue("VERSION"))
-        content.append((getEntryValue("NS2_RESOURCE_OPEN_TAG")).replace("<resource_name>", "executionresult"))
+        content.append(TEMPLATES.open("executionresult"))
         
         # add title
         tcrName = tcerInfo["Name"] + "_" + datetime.now().strftime("%Y%m%d_%H%M%S")
-        print("TCR Name: " + tcrName)
-        content.append((getEntryValue("NS4_TITLE")).replace("<title>", tcrName))
+        log("TCR Name: " + tcrName)
+        content.append(TEMPLATES.title(tcrName))
         
         # add categories
         categories = [x for x in tcerInfo if "[Category]" in x]        
-        for c in categories: content.append((getEntryValue("NS2_CATEGORY")).replace("<category_name>", c.replace("[Category]", "").strip()).replace("<category_value>", tcerInfo[c]))
+        for c in categories: content.append(TEMPLATES.category(c.replace("[Category]", "").strip(), tcerInfo[c]))
         
         others = {}
         others["executionworkitem"] = tcerInfo["ID"]        
@@ -225,81 +189,69 @@ def generateTCRContent(tcerInfo, projectArea, streamID=""):
         if "Build Record ID" in tcerInfo and len(tcerInfo["Build Record ID"]) > 0: others["buildrecord"] = tcerInfo["Build Record ID"]
         if "Test Script ID" in tcerInfo and len(tcerInfo["Test Script ID"]) > 0: others["remotescript"] = tcerInfo["Test Script ID"]        
         # Attachment ID k can thiet vi se tu dong upload len.
-        if "Attachment ID" in tcerInfo and len(tcerInfo["attachment"]) > 0: others["attachment"] = tcerInfo["Attachment ID"]
+        if "Attachment ID" in tcerInfo and len(tcerInfo["Attachment ID"]) > 0: others["attachment"] = tcerInfo["Attachment ID"]
         
         # add others resources
         for k, v in others.items():
             if len(v) > 0:
-                resourceUrl = getEntryValue("RESOURCE_URL_WITHOUT_GC").replace("<project_area>", getProjectAreaAlias(projectArea)).replace("<resource_name>", k) + "urn:com.ibm.rqm:" + k + ":" + v
-                content.append((getEntryValue("NS2_RESOURCE_LINK")).replace("<resource_url>", resourceUrl).replace("<resource_name>", k))
+                content.append(TEMPLATES.link(k, urls.url(k, v)))
         
         # update state
         stateLabel = tcerInfo["Last Result"]
         if len(stateLabel) > 0:
-            state = getEntryValue(stateLabel.upper())
-            content.append((getEntryValue("NS2_STATE_LABEL")).replace("<status_label>", stateLabel))
-            content.append((getEntryValue("NS6_STATE")).replace("<status>", state))        
+            content.append(TEMPLATES.state(stateLabel))
         
         # Add attachment link
         if "Log Path" in tcerInfo and len(tcerInfo["Log Path"]) > 0:
             logPath = tcerInfo["Log Path"]
-            logs = logPath.split(SEPARATOR)
-            logs = [x.replace("&", "&amp;").strip() for x in logs]            
+            logs = [x.strip() for x in logPath.split(SEPARATOR)]
 
             attachmentResourceUrl = generateServiceUrl(projectArea, streamID, "attachment")
+            # every distinct file is uploaded once per run (concurrently), then its Location is reused
+            for l in logs: log("Upload attachment: " + l)
+            locations = attachments.locations(attachmentResourceUrl, logs)
             if "Test Script ID" in tcerInfo and len(tcerInfo["Test Script ID"]) > 0:
-                for l in logs:
-                    print("Upload attachment: " + l)
-                    attachmentCommand = getEntryValue("ATTACHMENT_COMMAND").replace("<attachment_file>", l).replace("<url>", attachmentResourceUrl).replace("<cookie_file>", TEMP_COOKIE_FILE)
-                    attachmentResponse = runCommand(attachmentCommand)
-                    attachmentLocation = parseResponse(attachmentResponse)["location"]                    
-                    content.append((getEntryValue("NS2_RESOURCE_LINK")).replace("<resource_url>", attachmentLocation).replace("<resource_name>", "attachment"))                    
+                for attachmentLocation in locations:
+                    content.append(TEMPLATES.link("attachment", attachmentLocation))
             else:                
-                content.append(getEntryValue("DETAILS_OPEN_TAG"))                
-                for l in logs:
-                    print("Upload attachment: " + l)
-                    attachmentCommand = getEntryValue("ATTACHMENT_COMMAND").replace("<attachment_file>", l).replace("<url>", attachmentResourceUrl).replace("<cookie_file>", TEMP_COOKIE_FILE)
-                    attachmentResponse = runCommand(attachmentCommand)                    
-                    attachmentLocation = parseResponse(attachmentResponse)["location"]                    
-                    linkName = os.path.basename(l)
-                    content.append(getEntryValue("DETAILS_LINK").replace("<link_path>", attachmentLocation).replace("<link_name>", linkName))
+                content.append(TEMPLATES.detailsOpen)
+                for l, attachmentLocation in zip(logs, locations):
+                    content.append(TEMPLATES.detailsLink(attachmentLocation, os.path.basename(l)))
                 
-                content.append(getEntryValue("DETAILS_CLOSE_TAG"))
+                content.append(TEMPLATES.detailsClose)
         
-        content.append((getEntryValue("NS2_RESOURCE_CLOSE_TAG")).replace("<resource_name>", "executionresult"))
+        content.append(TEMPLATES.close("executionresult"))
         return "".join(content)
     except:
         return ""
 
 def generateTSRContent(suiteInfo, projectArea, suiteURL=None, testResults=[]):
     try:
+        urls = getServiceUrls(projectArea)
         content = []        
-        content.append(getEntryValue("VERSION"))
-        content.append((getEntryValue("NS2_RESOURCE_OPEN_TAG")).replace("<resource_name>", "testsuitelog"))
+        content.append(TEMPLATES.open("testsuitelog"))
         tserName = suiteInfo["Name"] if "Name" in suiteInfo else ''
         print("Test Suite Executon Record: " + tserName)
         tserName = tserName + "_" + datetime.now().strftime("%Y%m%d_%H%M%S")
         print("Test Suite Result Name: " + tserName)
-        content.append((getEntryValue("NS4_TITLE")).replace("<title>", tserName))
+        content.append(TEMPLATES.title(tserName))
         
         # update state
         stateLabel = suiteInfo["State"] if "State" in suiteInfo else ''
         if len(stateLabel) > 0:
-            state = getEntryValue(stateLabel.upper())
-            content.append((getEntryValue("NS2_STATE_LABEL")).replace("<status_label>", stateLabel))
-            content.append((getEntryValue("NS6_STATE")).replace("<status>", state))        
+            content.append(TEMPLATES.state(stateLabel))
         
         # update statistic        
-        content.append(f"<ns18:testcasestotal>{suiteInfo['Total Tests']}</ns18:testcasestotal>")
-        content.append(f"<ns18:testcasespassed>{suiteInfo['Total Pass']}</ns18:testcasespassed>")
-        content.append(f"<ns18:testcasesfailed>{suiteInfo['Total Fail']}</ns18:testcasesfailed>")
-        content.append(f"<ns18:testcasesblocked>{suiteInfo['Total Block']}</ns18:testcasesblocked>")
+        content.append(TEMPLATES.element("ns18:testcasestotal", suiteInfo['Total Tests']))
+        content.append(TEMPLATES.element("ns18:testcasespassed", suiteInfo['Total Pass']))
+        content.append(TEMPLATES.element("ns18:testcasesfailed", suiteInfo['Total Fail']))
+        content.append(TEMPLATES.element("ns18:testcasesblocked", suiteInfo['Total Block']))
         
         # add start time and end time, if not set time, default start time will be 1970
         #curTime = datetime.utcnow().isoformat(timespec='milliseconds') + 'Z'
         curTime = str(datetime.now(UTC).now()).replace(' ', 'T') + 'Z'
-        content.append(f"<ns18:starttime>{curTime}</ns18:starttime>")
-        content.append(f"<ns18:endtime>{curTime}</ns18:endtime>")
+        content.append(TEMPLATES.element("ns18:starttime", curTime))
+        content.append(TEMPLATES.element("ns18:endtime", curTime))
         
         tcerDictList = suiteInfo['Test Case Execution Records']
         buildID = ""
@@ -309,21 +261,18 @@ def generateTSRContent(suiteInfo, projectArea, suiteURL=None, testResults=[]):
         index = 0
         for tcerDict in tcerDictList:
             content.append("<ns18:suiteelement>")            
-            content.append(f"<ns18:index>{str(index)}</ns18:index>")            
+            content.append(TEMPLATES.element("ns18:index", index))
             buildID = tcerDict["Build Record ID"]
             planID = tcerDict["Test Plan ID"]
             tcerid = tcerDict["ID"]
             tcid = tcerDict["Test Case ID"]
             scriptID = tcerDict["Test Script ID"]
             
-            tcerURL = generateServiceUrl(projectArea, streamID=None, resourceName="executionworkitem", resourceID=tcerid)
-            tcURL = generateServiceUrl(projectArea, streamID=None, resourceName="testcase", resourceID=tcid)
-            content.append(f"<ns18:executionworkitem href=\"{tcerURL}\"/>")
-            content.append(f"<ns18:testcase href=\"{tcURL}\"/>")            
+            content.append(TEMPLATES.ns18Link("executionworkitem", urls.url("executionworkitem", tcerid)))
+            content.append(TEMPLATES.ns18Link("testcase", urls.url("testcase", tcid)))
             
             if len(scriptID) > 0:
-                scriptURL = generateServiceUrl(projectArea, streamID=None, resourceName="remotescript", resourceID=scriptID)
-                content.append(f"<ns18:remotescript href=\"{scriptURL}\"/>")
+                content.append(TEMPLATES.ns18Link("remotescript", urls.url("remotescript", scriptID)))
             
             index += 1
             
@@ -332,32 +281,26 @@ def generateTSRContent(suiteInfo, projectArea, suiteURL=None, testResults=[]):
         
         # update test case result
         for testResult in testResults:
-            testResultURL = generateServiceUrl(projectArea, streamID=None, resourceName="executionresult", resourceID=testResult)
-            content.append(f"<ns2:executionresult href=\"{testResultURL}\"/>")
+            content.append(TEMPLATES.link("executionresult", urls.url("executionresult", testResult)))
         
         tserID = suiteInfo["Suite ID"]
         print(f"TSER ID: {tserID}")
-        tserIDURL = generateServiceUrl(projectArea, streamID=None, resourceName="suiteexecutionrecord", resourceID=tserID)
-        content.append(f"<ns2:suiteexecutionrecord href=\"{tserIDURL}\"/>")
+        content.append(TEMPLATES.link("suiteexecutionrecord", urls.url("suiteexecutionrecord", tserID)))
         
         if suiteURL is not None:
-            content.append(f"<ns2:testsuite href=\"{suiteURL}\"/>")
+            content.append(TEMPLATES.link("testsuite", suiteURL))
             
-        planURL = generateServiceUrl(projectArea, streamID=None, resourceName="testplan", resourceID=planID)
-        if len(planURL) > 0:
-            content.append(f"<ns2:testplan href=\"{planURL}\"/>")
+        content.append(TEMPLATES.link("testplan", urls.url("testplan", planID)))
             
         # add build id and test plan id
-        buildURL = generateServiceUrl(projectArea, streamID=None, resourceName="buildrecord", resourceID=buildID)
-        if len(buildURL) > 0:
-            content.append(f"<ns2:buildrecord href=\"{buildURL}\"/>")
+        content.append(TEMPLATES.link("buildrecord", urls.url("buildrecord", buildID)))
         
-        content.append((getEntryValue("NS2_RESOURCE_CLOSE_TAG")).replace("<resource_name>", "testsuitelog"))
+        content.append(TEMPLATES.close("testsuitelog"))
         return "".join(content)
     except:
         return ""
     
-def updateTSR(tcerInfoList, projectArea, streamID=None, resultDict=[]):
+def updateTSR(tcerInfoList, projectArea, streamID=None, resultDict=[], client=None):
     if len(tcerInfoList) > 0:
         suiteInfoDict = getTestSuites(tcerInfoList)
         suitesIncResultDict = getKeysByValue(resultDict)
@@ -367,7 +310,7 @@ def updateTSR(tcerInfoList, projectArea, streamID=None, resultDict=[]):
             for k, v in suiteInfoDict.items():
                 print("******************************************")
                 tserURL = generateServiceUrl(projectArea, streamID, "suiteexecutionrecord", k)
-                response = runCommand(getEntryValue("GET_COMMAND").replace("<url>", tserURL).replace("<cookie_file>", TEMP_COOKIE_FILE))
+                response = client.get(tserURL).text
                 
                 # get suite
                 suitePattern = r"(?<=\<ns2:testsuite href=\")[0-9A-Za-z_/:.\+\-]+"                        
@@ -382,16 +325,10 @@ def updateTSR(tcerInfoList, projectArea, streamID=None, resultDict=[]):
 
                 if len(v) > 0:
                     tsrContent = generateTSRContent(v, projectArea, suiteURL, testResults)
-                    f = open(TEMP_DATA_FILE,'w')
-                    f.write(tsrContent)
-                    f.close()
-                    
                     serviceLink = generateServiceUrl(projectArea, streamID, "testsuitelog")
-                    createCommand = getEntryValue("CREATE_COMMAND").replace("<data_xml_file>", TEMP_DATA_FILE).replace("<url>", serviceLink).replace("<cookie_file>", TEMP_COOKIE_FILE)
-                    response = runCommand(createCommand)
-                    responseDict = parseResponse(response)
-                    statusCodeNum = responseDict["status code num"]
-                    statusCodeFull = responseDict["status code full"]
+                    response = client.postXml(serviceLink, tsrContent)
+                    statusCodeNum = response.statusCodeNum
+                    statusCodeFull = response.statusCodeFull
                     
                     print(f"Status code full: {statusCodeFull}")
                     updateStatus = "FAIL"
@@ -400,119 +337,137 @@ def updateTSR(tcerInfoList, projectArea, streamID=None, resultDict=[]):
                     print(f"Update Suite Result Status: {updateStatus}")
 
 
-def updateTCR(csvFile, projectArea, streamID, user, password, retries=1, resultFilter="All", exportOutputFile=False, updateSuite=False):
+def publishTCR(client, attachments, tcerInfo, projectArea, streamID, serviceLink, retries):
+    """Build, POST and retry one TCR. Returns (uploadStatus, statusCodeNum, resultID, retryTimes)."""
+    log("******************************************")
+    log("TCER ID: " + tcerInfo["ID"])
+    log("TCER Name: " + tcerInfo["Name"])
+
+    tcrData = generateTCRContent(tcerInfo, projectArea, streamID, attachments)
+    session = client.generation
+    response = client.postXml(serviceLink, tcrData)
+    statusCodeNum = response.statusCodeNum
+
+    uploadStatus = "FAIL"
+    # retry (a 200 carrying "authrequired" is the login page, not a created result)
+    i = 0
+    while (statusCodeNum not in ["201", "200"] or response.authRequired) and i < int(retries):
+        log("Retry times: " + str(i))
+
+        # login again if required (only once per expired session, whichever worker sees it first)
+        if response.authRequired:
+            log("Login again because authentication required.")
+            client.reauthenticate(session)
+
+        session = client.generation
+        response = client.postXml(serviceLink, tcrData)
+        statusCodeNum = response.statusCodeNum
+
+        i += 1
+
+    if statusCodeNum in ["201", "200"] and not response.authRequired: uploadStatus = "PASS"
+
+    resultID = response.resultId
+    log("Status code full: " + response.statusCodeFull)
+    log("Result ID: " + resultID)
+    log("Upload Result Status: " + uploadStatus)
+    return uploadStatus, statusCodeNum, resultID, i
+
+def openOutputFile(csvFile):
+    """
+    Create the output CSV of this run: <csv>_output_<timestamp>.csv, or <..>_<pid>[_<n>].csv
+    if another run started in the same second. Created exclusively ("x"), never shared.
+    """
+    base = csvFile.replace(".csv", "_output_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))
+    name, n = base + ".csv", 0
+    while True:
+        try:
+            return open(name, "x", encoding="utf-8")
+        except FileExistsError:
+            n += 1
+            name = f"{base}_{os.getpid()}" + (f"_{n}" if n > 1 else "") + ".csv"
+
+def updateTCR(csvFile, projectArea, streamID, user, password, retries=1, resultFilter="All", exportOutputFile=False, updateSuite=False, workers=1, attachmentWorkers=4, attachmentCache=None):
     try:
         if os.path.exists(csvFile):
-            outputFile = ""
-            if bool(exportOutputFile):
-                outputFile = csvFile.replace(".csv", "_output_" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".csv")
-
-            # remove existing cookie file to make sure no unexpected error
-            if os.path.exists(TEMP_COOKIE_FILE): os.remove(TEMP_COOKIE_FILE)            
-            
-            # Login
-            loginCommand = getEntryValue("AUTHENTICATE_COMMAND").replace("<user_name>", user).replace("<password>", password).replace("<cookie_file>", TEMP_COOKIE_FILE)
-            loginResponse = runCommand(loginCommand)
-            loginLocation = parseResponse(loginResponse)["location"]            
-            # Login successfully
-            if len(loginLocation) > 0 and "auth/authfailed" not in loginLocation:
-
-                print("Login Successfully!!!!!")
-                # get service link
-                serviceLink = generateServiceUrl(projectArea, streamID, "executionresult")
-                # parsing csv file
-                tcerInfoList = parseCSVFile(csvFile)
-                writeHeader = True
-                resultDict = {}
-                
-                # Loop all tcers
-                for tcerInfo in tcerInfoList:
-                    run = True
-                    if resultFilter.upper() != "ALL": run = tcerInfo["Last Result"] == resultFilter                    
-                    if run:                    
-                        print("******************************************")
-                        print("TCER ID: " + tcerInfo["ID"])
-                        print("TCER Name: " + tcerInfo["Name"])                        
-                        # get tser id
-                        tserID = tcerInfo["Test Suite Execution Record ID"]
-                        
-                        fd = None
-                        if len(outputFile) > 0:
-                            fd = open(outputFile, "a", encoding="utf-8")
-                            if writeHeader:
-                                headers = list(tcerInfo.keys())
-                                headers.append("Upload Result Status")
-                                headers.append("Status Code")
-                                headers.append("Result ID")
-                                headers.append("Retry Times")
-                                fd.writelines(",".join(headers)+ "\n")
-                                writeHeader = False
-                        
-                        # write data to temp file
-                        tcrData = generateTCRContent(tcerInfo, projectArea, streamID)
-                        f = open(TEMP_DATA_FILE,'w')
-                        f.write(tcrData)
-                        f.close()
-                        
-                        # get command
-                        createCommand = getEntryValue("CREATE_COMMAND").replace("<data_xml_file>", TEMP_DATA_FILE).replace("<url>", serviceLink).replace("<cookie_file>", TEMP_COOKIE_FILE)
-                        response = runCommand(createCommand)
-                        responseDict = parseResponse(response)
-                        statusCodeNum = responseDict["status code num"]
-                        
-                        uploadStatus = "FAIL"
-                        # retry
-                        i = 0
-                        while (statusCodeNum not in ["201", "200"]) and i < int(retries):
-                            print("Retry times: " + str(i))
-                            
-                            # login again if required
-                            if "X-com-ibm-team-repository-web-auth-msg: authrequired" in response:                            
-                                print("Login again because authentication required.")
-                                loginResponse = runCommand(loginCommand)                            
-                            
-                            response = runCommand(createCommand)
-                            responseDict = parseResponse(response)
-                            statusCodeNum = responseDict["status code num"]
-                            
-                            i += 1                            
-                        
-                        if statusCodeNum in ["201", "200"]: uploadStatus = "PASS"
-                        
-                        statusCodeFull = responseDict["status code full"]
-                        resultID = responseDict["result id"]
-                        print("Status code full: " + statusCodeFull)
-                        print("Result ID: " + resultID)
-                        print("Upload Result Status: " + uploadStatus)
-                        
-                        if len(resultID) > 0:
-                            resultDict[resultID] = tserID
-                        
+            fd = None
+
+            # one keep-alive session for the whole run, cookies kept in memory
+            client = JazzClient(getEntryValue("URL"), getEntryValue("CONTEXT"), poolSize=max(10, int(workers)))
+            try:
+                # Login
+                loginResponse = client.login(user, password)
+                # Login successfully
+                if client.loginSucceeded(loginResponse):
+
+                    print("Login Successfully!!!!!")
+                    # get service link
+                    serviceLink = generateServiceUrl(projectArea, streamID, "executionresult")
+                    # parsing csv file
+                    tcerInfoList = parseCSVFile(csvFile)
+                    writeHeader = True
+                    resultDict = {}
+
+                    attachments = AttachmentManager(client, attachmentWorkers, attachmentCache)
+                    try:
+                        # Loop all tcers (publishTCR runs on "workers" threads; output is written in input order)
+                        tcers = [x for x in tcerInfoList if resultFilter.upper() == "ALL" or x["Last Result"] == resultFilter]
+                        workers = max(1, int(workers))
+                        with ThreadPoolExecutor(max_workers=workers) as pool:
+                            if workers == 1:
+                                outcomes = ((publishTCR(client, attachments, x, projectArea, streamID, serviceLink, retries), None) for x in tcers)
+                            else:
+                                outcomes = pool.map(lambda x: runBuffered(publishTCR, client, attachments, x, projectArea, streamID, serviceLink, retries), tcers)
+                            # closing: on an error the records not started yet are cancelled, not published
+                            with closing(outcomes):
+                                for tcerInfo, (outcome, lines) in zip(tcers, outcomes):
+                                    if lines is not None:
+                                        print("\n".join(lines))
+                                    uploadStatus, statusCodeNum, resultID, i = outcome
+                                    # get tser id
+                                    tserID = tcerInfo["Test Suite Execution Record ID"]
+                                    if len(resultID) > 0:
+                                        resultDict[resultID] = tserID
+
+                                    if bool(exportOutputFile):
+                                        if fd is None:
+                                            fd = openOutputFile(csvFile)
+                                        if writeHeader:
+                                            headers = list(tcerInfo.keys())
+                                            headers.append("Upload Result Status")
+                                            headers.append("Status Code")
+                                            headers.append("Result ID")
+                                            headers.append("Retry Times")
+                                            fd.writelines(",".join(headers)+ "\n")
+                                            writeHeader = False
+
+                                        values = list(tcerInfo.values())
+                                        values.append(uploadStatus)
+                                        values.append(statusCodeNum)
+                                        values.append(resultID)
+                                        values.append(str(i))
+
+                                        values = ["\"" + x + "\"" for x in values]
+                                        fd.writelines(",".join(values) + "\n")
+                                        fd.flush()
+                    finally:
                         if fd is not None:
-                            values = list(tcerInfo.values())
-                            values.append(uploadStatus)
-                            values.append(statusCodeNum)
-                            values.append(resultID)
-                            values.append(str(i))
-                            
-                            values = ["\"" + x + "\"" for x in values]
-                            fd.writelines(",".join(values) + "\n")
                             fd.close()
-            
-                # run xong update test suite result
-                if bool(updateSuite):
-                    print("***** START UPDATING TEST SUITE RESULT *****")
-                    updateTSR(tcerInfoList, projectArea, streamID, resultDict)  
-                    print("***** END UPDATING TEST SUITE RESULT *****")
-                
-            # Login failed
-            else:
-                print("Login Unsuccessfully!!!!!")            
-            
-            # Delete temp file
-            if os.path.exists(TEMP_DATA_FILE): os.remove(TEMP_DATA_FILE)
-            if os.path.exists(TEMP_COOKIE_FILE): os.remove(TEMP_COOKIE_FILE)
-            
+                        attachments.close()
+                    print("Attachments: {referenced} referenced, {uploaded} uploaded, {reused} reused, {failed} failed".format(**attachments.stats))
+
+                    # run xong update test suite result
+                    if bool(updateSuite):
+                        print("***** START UPDATING TEST SUITE RESULT *****")
+                        updateTSR(tcerInfoList, projectArea, streamID, resultDict, client)
+                        print("***** END UPDATING TEST SUITE RESULT *****")
+
+                # Login failed
+                else:
+                    print("Login Unsuccessfully!!!!!")
+            finally:
+                client.close()
+
             print("COMPLETED!!!")
         else:
             print(csvFile + " NOT EXIST.")
@@ -560,6 +515,20 @@ def cli():
                  , default=False
                  , help="Update test suite result after updating test case execution records. Default is False")
 
+    p.add_option('--workers', '-w'
+                 , default=1
+                 , type="int"
+                 , help="Test case results published in parallel. Output file and log keep the input order. Default is 1")
+
+    p.add_option('--attachmentWorkers'
+                 , default=4
+                 , type="int"
+                 , help="Attachments uploaded in parallel. Each distinct log file is uploaded once per run. Default is 4")
+
+    p.add_option('--attachmentCache'
+                 , default=None
+                 , help="JSON file remembering uploaded attachments (file hash -> location) across runs. Default is none")
+
     
     options, arguments = p.parse_args()
     
@@ -575,7 +544,10 @@ def cli():
             , options.retries
             , options.resultFilters
             , options.exportOutputFile
-            , options.updateSuiteResult)
+            , options.updateSuiteResult
+            , options.workers
+            , options.attachmentWorkers
+            , options.attachmentCache)
 
 if __name__ == '__main__':
     cli()